@@ -0,0 +1,37 @@
+"""
+Measure the cold start of the application - importing it and creating the app in a new interpreter, like a worker
+process does when it boots. Every run is a separate process, so nothing is cached between them.
+
+    python -m benchmarks.app_startup [number of runs]
+"""
+import statistics
+import subprocess
+import sys
+
+RUNS = 20
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from config import create_app
+create_app()
+print(time.perf_counter() - start, len(sys.modules))
+"""
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True
+        ).stdout.split()
+        times.append(float(output[0]))
+    print(
+        f"create_app: median {statistics.median(times) * 1000:.0f} ms, "
+        f"min {min(times) * 1000:.0f} ms, {output[1]} modules loaded"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the CPU cost of compressing the list of resources with the bytes it saves, for every algorithm and a few
+compression levels, on libraries of different sizes. The resources look like the ones returned by /my_resources/,
+with a few sentences of notes and two tags each.
+
+Run it from the project folder:
+
+    python -m benchmarks.compression
+"""
+import gzip
+import json
+import time
+
+import brotli
+import zstandard
+from faker import Faker
+
+SIZES = (100, 1000, 10000)
+REPEAT = 5
+
+ALGORITHMS = (
+    ("gzip", 1, lambda data, level: gzip.compress(data, compresslevel=level)),
+    ("gzip", 6, lambda data, level: gzip.compress(data, compresslevel=level)),
+    ("gzip", 9, lambda data, level: gzip.compress(data, compresslevel=level)),
+    ("br", 1, lambda data, level: brotli.compress(data, quality=level)),
+    ("br", 4, lambda data, level: brotli.compress(data, quality=level)),
+    ("br", 6, lambda data, level: brotli.compress(data, quality=level)),
+    ("zstd", 1, lambda data, level: zstandard.ZstdCompressor(level).compress(data)),
+    ("zstd", 3, lambda data, level: zstandard.ZstdCompressor(level).compress(data)),
+    ("zstd", 9, lambda data, level: zstandard.ZstdCompressor(level).compress(data)),
+)
+
+
+def make_body(size, fake):
+    """The body of a /my_resources/ response with the given number of resources, before it's encoded."""
+    resources = [
+        {
+            "resource_id": number,
+            "title": fake.sentence(nb_words=4),
+            "author": fake.name(),
+            "link": fake.url(),
+            "notes": fake.paragraph(nb_sentences=5),
+            "rating": round(fake.pyfloat(min_value=0, max_value=5), 1),
+            "status": fake.random_element(["Read", "To Read", "Dropped"]),
+            "owner_id": 1,
+            "file_url": None,
+            "tags": [{"tag": fake.word()}, {"tag": fake.word()}],
+            "created_datetime": fake.date_time().isoformat(),
+            "updated_datetime": fake.date_time().isoformat(),
+        }
+        for number in range(size)
+    ]
+    body = {
+        "message": "Below is a list of all resources you have previously registered \N{slightly smiling face}",
+        "resources": resources,
+        "next_cursor": None,
+    }
+    return body
+
+
+def make_payload(size, fake):
+    """The encoded body of a /my_resources/ response with the given number of resources."""
+    return json.dumps(make_body(size, fake)).encode()
+
+
+def main():
+    fake = Faker()
+    Faker.seed(2022)
+    for size in SIZES:
+        data = make_payload(size, fake)
+        print(f"{size} resources, {len(data) / 1024:.0f} KiB of JSON")
+        for name, level, compress in ALGORITHMS:
+            best = float("inf")
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                compressed = compress(data, level)
+                best = min(best, time.perf_counter() - start)
+            print(
+                f"{name:>6} {level:>2}: {len(compressed) / 1024:8.0f} KiB "
+                f"({len(data) / len(compressed):4.1f}x smaller) in {best * 1000:8.2f} ms "
+                f"({len(data) / best / 1024 / 1024:6.0f} MiB/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
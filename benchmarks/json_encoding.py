@@ -0,0 +1,54 @@
+"""
+Compare the time it takes to encode and decode the list of 10 000 resources with the standard json module (which
+flask_restful uses by default) and with orjson (which the API uses). The resources look like the ones returned by
+/my_resources/.
+
+Run it from the project folder:
+
+    python -m benchmarks.json_encoding
+"""
+import json
+import time
+
+from faker import Faker
+
+from benchmarks.compression import make_body
+from utils import json_encoding
+
+SIZE = 10000
+REPEAT = 20
+
+ENCODERS = (
+    ("json", lambda body: json.dumps(body).encode()),
+    ("orjson", json_encoding.dumps),
+)
+DECODERS = (
+    ("json", json.loads),
+    ("orjson", json_encoding.loads),
+)
+
+
+def best_time(function, argument):
+    """The shortest run time of the function, in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    fake = Faker()
+    Faker.seed(2022)
+    body = make_body(SIZE, fake)
+    data = json_encoding.dumps(body)
+    print(f"{SIZE} resources, {len(data) / 1024:.0f} KiB of JSON")
+    for name, encode in ENCODERS:
+        print(f"encode {name:>6}: {best_time(encode, body):8.2f} ms")
+    for name, decode in DECODERS:
+        print(f"decode {name:>6}: {best_time(decode, data):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
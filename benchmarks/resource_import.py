@@ -0,0 +1,67 @@
+"""
+Measure how long it takes to import 100 000 resources, with tags, through the import endpoint. The benchmark uses the
+test database - its tables are created at the start and dropped at the end, like in the tests.
+
+Run it from the project folder, with the same .env file the application uses:
+
+    python -m benchmarks.resource_import
+"""
+import io
+import time
+
+from config import create_app
+from db import db
+from managers.auth import AuthManager
+from models import UserModel, UserRole
+
+ROWS = 100000
+
+
+def make_csv(rows):
+    """A CSV file with the given number of resources, each with two of ten tags."""
+    lines = ["title,author,link,notes,rating,tags"]
+    for number in range(rows):
+        lines.append(
+            f"Book number {number},Author {number % 1000},https://example.com/{number},"
+            f"Some notes,{number % 6},tag{number % 10}; tag{(number + 1) % 10}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main():
+    app = create_app("config.TestingConfig")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        try:
+            user = UserModel(
+                first_name="Bench",
+                last_name="Mark",
+                email="benchmark@example.com",
+                password="not-a-real-hash",
+                user_role=UserRole.user,
+            )
+            db.session.add(user)
+            db.session.commit()
+            headers = {
+                "Authorization": f"Bearer {AuthManager.encode_token(user)}",
+                "Content-Type": "text/csv",
+            }
+            data = make_csv(ROWS)
+
+            start = time.perf_counter()
+            resp = app.test_client().post(
+                "/import_resources/", headers=headers, data=io.BytesIO(data)
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"imported {resp.json['imported']} resources "
+                f"({len(resp.json['errors'])} errors) in {elapsed:.2f} s"
+            )
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
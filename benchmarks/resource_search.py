@@ -0,0 +1,125 @@
+"""
+Measure the full-text search over a large library. The resource table is seeded with 1 000 000 resources of 10 users
+(the number can be changed with the first argument), then a few searches of one user are timed, next to the same
+searches made with ILIKE over the title, author and notes. The benchmark uses the test database - its tables are
+created at the start and dropped at the end, like in the tests.
+
+Run it from the project folder, with the same .env file the application uses:
+
+    python -m benchmarks.resource_search [rows]
+"""
+import statistics
+import sys
+import time
+
+from sqlalchemy import or_, text
+
+from config import create_app
+from db import db
+from managers.resource import ResourceManager
+from models import ResourceModel, UserModel, UserRole
+
+ROWS = 1000000
+USERS = 10
+REPEAT = 50
+QUERIES = ("dune", "desert planet", '"jane austen" -emma', "whale or river")
+
+WORDS = (
+    "dune desert planet spice sand worm empire emma jane austen pride prejudice whale sea captain river journey "
+    "war peace love letter winter summer garden house city night day time light shadow stone fire water king "
+    "queen child mother father friend stranger secret island mountain forest road ship star moon sun dream"
+).split()
+
+SEED = text(
+    """
+    INSERT INTO resource (title, author, notes, owner_id, status)
+    SELECT
+        words[1 + (i * 7) % cardinality(words)] || ' ' || words[1 + (i * 13) % cardinality(words)],
+        'Author ' || words[1 + (i * 17) % cardinality(words)] || ' ' || (i % 5000),
+        words[1 + (i * 19) % cardinality(words)] || ' ' || words[1 + (i * 23) % cardinality(words)] || ' and '
+            || words[1 + (i * 29) % cardinality(words)] || ' ' || words[1 + (i * 31) % cardinality(words)],
+        (:first_user_id + i % :users),
+        'pending'
+    FROM generate_series(1, :rows) AS i, (SELECT CAST(:words AS text[]) AS words) AS w
+    """
+)
+
+
+def timed(function):
+    """The median and the 99th percentile of the function's run time, in milliseconds."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), statistics.quantiles(times, n=100)[98]
+
+
+def ilike_search(owner_id, q, limit=50):
+    """The same search made with ILIKE, which has to read every resource of the user."""
+    pattern = f"%{q}%"
+    return (
+        ResourceModel.query.filter(
+            ResourceModel.owner_id == owner_id,
+            or_(
+                ResourceModel.title.ilike(pattern),
+                ResourceModel.author.ilike(pattern),
+                ResourceModel.notes.ilike(pattern),
+            ),
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    app = create_app("config.TestingConfig")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        try:
+            users = [
+                UserModel(
+                    first_name="Bench",
+                    last_name="Mark",
+                    email=f"benchmark{number}@example.com",
+                    password="not-a-real-hash",
+                    user_role=UserRole.user,
+                )
+                for number in range(USERS)
+            ]
+            db.session.add_all(users)
+            db.session.commit()
+            first_user_id = min(user.user_id for user in users)
+
+            start = time.perf_counter()
+            db.session.execute(
+                SEED,
+                {
+                    "first_user_id": first_user_id,
+                    "users": USERS,
+                    "rows": rows,
+                    "words": WORDS,
+                },
+            )
+            db.session.commit()
+            db.session.execute(text("ANALYZE resource"))
+            print(f"seeded {rows} resources in {time.perf_counter() - start:.1f} s")
+
+            for q in QUERIES:
+                search = timed(
+                    lambda: ResourceManager.search_resources(first_user_id, q)
+                )
+                ilike = timed(lambda: ilike_search(first_user_id, q))
+                print(
+                    f"{q!r:>24}: search p50 {search[0]:7.2f} ms, p99 {search[1]:7.2f} ms"
+                    f" | ilike p50 {ilike[0]:7.2f} ms, p99 {ilike[1]:7.2f} ms"
+                )
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measure the upload throughput of S3Service with different part sizes and numbers of threads, to size them for the
+instance the application runs on. The file is sent as a stream that can't be seeked, like the uploaded files are.
+
+The uploads go to a local S3-compatible server, e.g. MinIO or moto (`moto_server -p 9000`), given by its URL:
+
+    python -m benchmarks.s3_transfer http://localhost:9000 [size in MiB]
+
+The bucket is created, if it doesn't exist. The access keys are read from the same .env file the application uses.
+"""
+import io
+import os
+import sys
+import time
+
+from botocore.exceptions import ClientError
+
+from services.aws_s3_bucket import MIB, S3Service
+from settings import Settings
+from utils.uploads import ChunkReader
+
+SIZE_IN_MIB = 256
+BUCKET = "library-benchmark"
+PART_SIZES_IN_MIB = (8, 16, 32, 64)
+CONCURRENCIES = (1, 4, 10, 20)
+CHUNK = os.urandom(MIB)
+
+
+def make_stream(size):
+    """A stream of the given number of MiB, read 64 KiB at a time, like an uploaded file."""
+    return io.BufferedReader(ChunkReader(CHUNK for _ in range(size)), 64 * 1024)
+
+
+def create_bucket(s3):
+    """Create the bucket of the benchmark, if it doesn't exist yet."""
+    location = {}
+    if s3.region != "us-east-1":
+        location["CreateBucketConfiguration"] = {"LocationConstraint": s3.region}
+    try:
+        s3.s3.create_bucket(Bucket=BUCKET, **location)
+    except ClientError as ex:
+        if ex.response["Error"]["Code"] not in (
+            "BucketAlreadyOwnedByYou",
+            "BucketAlreadyExists",
+        ):
+            raise
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    endpoint_url = sys.argv[1]
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else SIZE_IN_MIB
+
+    for part_size in PART_SIZES_IN_MIB:
+        for concurrency in CONCURRENCIES:
+            settings = Settings.from_env(
+                aws_s3_bucket_name=BUCKET,
+                aws_s3_endpoint_url=endpoint_url,
+                aws_s3_max_pool_connections=max(10, concurrency),
+                aws_s3_multipart_threshold_in_mb=part_size,
+                aws_s3_multipart_chunk_size_in_mb=part_size,
+                aws_s3_max_concurrency=concurrency,
+            )
+            s3 = S3Service(settings)
+            create_bucket(s3)
+
+            start = time.perf_counter()
+            s3.put(make_stream(size), "benchmark.bin")
+            elapsed = time.perf_counter() - start
+            print(
+                f"part {part_size:>3} MiB, {concurrency:>2} threads: {elapsed:6.2f} s "
+                f"({size / elapsed:7.1f} MiB/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the cost of the settings lookups made while serving a login request: reading them through decouple on every
+call, like the application used to, and reading them from the Settings object loaded when the application is created.
+
+Run it from the project folder, with the same .env file the application uses:
+
+    python -m benchmarks.settings_lookup
+"""
+import timeit
+
+from decouple import config
+
+from config import create_app
+from settings import get_settings
+
+NUMBER = 100000
+
+
+def decouple_lookups():
+    """The lookups of a login request, made through decouple."""
+    int(config("PASSWORD_MIN_LENGTH"))
+    int(config("PASSWORD_MAX_LENGTH"))
+    int(config("TOKEN_VALIDITY_VALUE_IN_MINUTES"))
+    config("JWT_SECRET")
+    config("TOKEN_VALIDITY_VALUE_IN_MINUTES")
+
+
+def settings_lookups():
+    """The lookups of a login request, made through the application settings."""
+    settings = get_settings()
+    settings.password_min_length
+    settings.password_max_length
+    settings.token_validity_in_minutes
+    get_settings().jwt_secret
+    get_settings().token_validity_in_minutes
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        for name, function in (
+            ("decouple", decouple_lookups),
+            ("settings", settings_lookups),
+        ):
+            best = min(timeit.repeat(function, number=NUMBER, repeat=5))
+            print(f"{name:>10}: {best / NUMBER * 1e6:.2f} µs per request")
+
+
+if __name__ == "__main__":
+    main()
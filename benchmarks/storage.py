@@ -0,0 +1,58 @@
+"""
+Measure how fast the files are saved to and read from the storage. By default the files go to a temporary folder on the
+local disk, so nothing is sent over the network; with "s3" they go to the bucket in the .env file (or the server in
+AWS_S3_ENDPOINT_URL).
+
+    python -m benchmarks.storage [local|s3] [size in MiB]
+"""
+import sys
+import tempfile
+import time
+
+from benchmarks.s3_transfer import CHUNK, make_stream
+from services.aws_s3_bucket import MIB
+from services.storage import create_storage
+from settings import Settings
+
+SIZE_IN_MIB = 256
+
+
+def measure(name, size, function):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:6.2f} s ({size / elapsed:7.1f} MiB/s)")
+
+
+def read_all(storage, key):
+    """Read a file from the storage, a MiB at a time."""
+    file = storage.get(key)
+    try:
+        while file.read(MIB):
+            pass
+    finally:
+        file.close()
+
+
+def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else "local"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else SIZE_IN_MIB
+
+    with tempfile.TemporaryDirectory() as folder:
+        storage = create_storage(
+            Settings.from_env(storage_backend=backend, local_storage_path=folder)
+        )
+        measure("put (stream)", size, lambda: storage.put(make_stream(size), "a.bin"))
+
+        with tempfile.TemporaryFile() as source:
+            for _ in range(size):
+                source.write(CHUNK)
+            source.seek(0)
+            measure("put (file)", size, lambda: storage.put(source, "b.bin"))
+
+        measure("get", size, lambda: read_all(storage, "a.bin"))
+        storage.delete(["a.bin", "b.bin"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.exc import SQLAlchemyError
+
+from db import db
+from managers.file_deletion import FileDeletionManager
+from services.storage import get_storage
+from settings import get_settings
+
+
+@click.command("drain-file-deletions")
+@click.option("--once", is_flag=True, help="Delete one batch of files and stop.")
+@click.option(
+    "--retry-dead", is_flag=True, help="Try the dead files again, before draining."
+)
+@with_appcontext
+def drain_file_deletions(once, retry_dead):
+    """
+    The background worker deleting the files in the outbox from the storage. It deletes them in batches, one batch
+    right after the other while there are files waiting, and checks the outbox again every few seconds when it's empty.
+    Run it next to the application:
+
+        flask --app main drain-file-deletions
+    """
+    settings = get_settings()
+    storage = get_storage()
+    db.init_app(current_app)
+
+    if retry_dead:
+        click.echo(
+            f"{FileDeletionManager.retry_dead()} dead files are back in the outbox"
+        )
+
+    while True:
+        try:
+            result = FileDeletionManager.drain(
+                storage,
+                settings.file_deletion_batch_size,
+                settings.file_deletion_max_attempts,
+            )
+        except SQLAlchemyError:
+            db.session.rollback()
+            current_app.logger.exception("Couldn't drain the file deletions")
+            result = None
+
+        if result and any(result.values()):
+            click.echo(
+                f"deleted {result['deleted']} files, {result['failed']} will be tried again, "
+                f"{result['dead']} are dead"
+            )
+        if once:
+            break
+        if not result or sum(result.values()) < settings.file_deletion_batch_size:
+            time.sleep(settings.file_deletion_interval_in_seconds)
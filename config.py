@@ -1,11 +1,17 @@
+import click
 from decouple import config
 from flask import Flask
+from flask_compress import Compress
 from flask_cors import CORS
-from flask_migrate import Migrate
 from flask_restful import Api
 
+from commands import drain_file_deletions
 from db import db
 from endpoints.routes import routes
+from settings import Settings
+from utils.cache import TTLCache
+from utils.json_encoding import OrjsonProvider, output_json
+from utils.password_hasher import PasswordHasher
 
 
 class EnvironmentConfig:
@@ -31,17 +37,48 @@ class TestingConfig:
     )
 
 
-def create_app(config="config.EnvironmentConfig"):
+def create_app(config="config.EnvironmentConfig", settings=None):
     """ "
     Creates the FLASK application
     :param config: class, configuration information from the configuration classes
+    :param settings: Settings object, optional; if it isn't provided, the settings are read from the environment
     :return The application
     """
     app = Flask(__name__)
     app.config.from_object(config)
+    settings = settings or Settings.from_env()
+    app.extensions["settings"] = settings
+    app.json = OrjsonProvider(app)
 
     api = Api(app)
-    migrate = Migrate(app, db)
+    api.representation("application/json")(output_json)
+    # The migrations are only run from the command line (flask db ...), so the workers serving requests don't need to
+    # import alembic. Any app created by a flask command gets them.
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
     CORS(app)
+
+    # Compress the large JSON responses with the best algorithm the client accepts. The streamed responses are sent
+    # as they are, so they are never collected in the memory to be compressed.
+    app.config.update(
+        COMPRESS_ALGORITHM=["zstd", "br", "gzip"],
+        COMPRESS_MIN_SIZE=settings.compress_min_size,
+        COMPRESS_LEVEL=settings.compress_gzip_level,
+        COMPRESS_BR_LEVEL=settings.compress_brotli_level,
+        COMPRESS_ZSTD_LEVEL=settings.compress_zstd_level,
+        COMPRESS_STREAMS=False,
+    )
+    Compress(app)
+    app.extensions["user_cache"] = TTLCache(
+        settings.user_cache_size, settings.user_cache_ttl_in_seconds
+    )
+    app.extensions["password_hasher"] = PasswordHasher(
+        settings.password_hash_workers,
+        settings.password_hash_queue_size,
+        settings.password_hash_retry_after_in_seconds,
+    )
     [api.add_resource(*route) for route in routes]
+    app.cli.add_command(drain_file_deletions)
     return app
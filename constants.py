@@ -1,4 +1,19 @@
 import os
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-TEMP_FILE_FOLDER = os.path.join(ROOT_DIR, "temp_files")
+
+# The number of imported resources that are validated and written to the database together
+IMPORT_CHUNK_SIZE = 1000
+
+# How similar a title or author has to be to the typed text to be suggested by the autocomplete, between 0 and 1
+AUTOCOMPLETE_SIMILARITY_THRESHOLD = 0.3
+
+# The characters around the matching words in the snippets of the search results. They aren't HTML, so the stored text
+# can't turn into markup - the clients escape the snippet and replace them with their own highlighting.
+HIGHLIGHT_START = "\u0002"
+HIGHLIGHT_END = "\u0003"
+
+# How long the background worker waits before it tries to delete a file from the S3 bucket again, in seconds. The
+# delay doubles with every failed attempt, up to the maximum.
+FILE_DELETION_RETRY_DELAY_IN_SECONDS = 30
+FILE_DELETION_MAX_RETRY_DELAY_IN_SECONDS = 3600
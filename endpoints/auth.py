@@ -1,17 +1,23 @@
-from decouple import config
 from flask import request
 from flask_api import status
 from flask_restful import Resource
 
+from managers.refresh_token import RefreshTokenManager
 from managers.user import UserManager
-from schemas.request.auth import LoginSchemaRequest, RegisterSchemaRequest
+from schemas.request.auth import (
+    LoginSchemaRequest,
+    RefreshTokenSchemaRequest,
+    RegisterSchemaRequest,
+)
+from settings import get_settings
 from utils.decorators import validate_schema
 
 
 class RegisterResource(Resource):
     """
     A resource for initial user registration. Validates that the provided data matches the requested schema, then creates
-    a record in the user table. If everything is okay, returns a happy message, 201 CREATED and a valid token.
+    a record in the user table. If everything is okay, returns a happy message, 201 CREATED, a valid token and a refresh
+    token.
 
     Headers: "Content-Type": "application/json"
     Body: first_name (mandatory; a string between 1 and 30 characters)
@@ -28,17 +34,18 @@ class RegisterResource(Resource):
     @validate_schema(RegisterSchemaRequest)
     def post(self):
         data = request.get_json()
-        token = UserManager.register(data)
+        token, refresh_token = UserManager.register(data)
         return {
-            "message": f"Welcome to our library! This token will only be valid for the next {config('TOKEN_VALIDITY_VALUE_IN_MINUTES')} minutes. After that you'll need to log in \N{winking face}",
+            "message": f"Welcome to our library! This token will only be valid for the next {get_settings().token_validity_in_minutes} minutes. After that you'll need to log in \N{winking face}",
             "token": token,
+            "refresh_token": refresh_token,
         }, status.HTTP_201_CREATED
 
 
 class LoginResource(Resource):
     """
     A resource for user login. Validates that the provided data matches the requested schema.
-    If everything is okay, returns a happy message, 200 OK and a valid token.
+    If everything is okay, returns a happy message, 200 OK, a valid token and a refresh token.
 
     Headers: "Content-Type": "application/json"
     Body: email (mandatory; the e-mail you registered with)
@@ -48,8 +55,47 @@ class LoginResource(Resource):
     @validate_schema(LoginSchemaRequest)
     def post(self):
         data = request.get_json()
-        token = UserManager.login(data)
+        token, refresh_token = UserManager.login(data)
         return {
-            "message": f"This token will only be valid for the next {config('TOKEN_VALIDITY_VALUE_IN_MINUTES')} minutes. After that you'll need to log in again \N{winking face}",
+            "message": f"This token will only be valid for the next {get_settings().token_validity_in_minutes} minutes. After that you'll need to log in again \N{winking face}",
             "token": token,
+            "refresh_token": refresh_token,
+        }, status.HTTP_200_OK
+
+
+class RefreshTokenResource(Resource):
+    """
+    A resource for getting a new token without logging in again. Validates that the provided refresh token is valid,
+    hasn't expired and hasn't been used before. If everything is okay, returns a happy message, 200 OK, a valid token
+    and a new refresh token - the old refresh token can't be used anymore.
+
+    Headers: "Content-Type": "application/json"
+    Body: refresh_token (mandatory; the refresh token you got when you registered, logged in or refreshed your token)
+    """
+
+    @validate_schema(RefreshTokenSchemaRequest)
+    def post(self):
+        data = request.get_json()
+        token, refresh_token = RefreshTokenManager.refresh(data["refresh_token"])
+        return {
+            "message": f"This token will only be valid for the next {get_settings().token_validity_in_minutes} minutes. After that you'll need to refresh it again \N{winking face}",
+            "token": token,
+            "refresh_token": refresh_token,
+        }, status.HTTP_200_OK
+
+
+class RevokeRefreshTokenResource(Resource):
+    """
+    A resource for revoking a refresh token (e.g. when logging out). If everything is okay, returns a message and 200 OK.
+
+    Headers: "Content-Type": "application/json"
+    Body: refresh_token (mandatory; the refresh token to be revoked)
+    """
+
+    @validate_schema(RefreshTokenSchemaRequest)
+    def post(self):
+        data = request.get_json()
+        RefreshTokenManager.revoke(data["refresh_token"])
+        return {
+            "message": "Your refresh token has been revoked. See you soon \N{slightly smiling face}"
         }, status.HTTP_200_OK
@@ -6,13 +6,30 @@ from managers.auth import auth
 from managers.resource import ResourceManager
 from managers.tag import TagManager
 from schemas.request.resource import (
+    AutocompleteSchemaRequest,
+    BulkStatusSchemaRequest,
+    BulkUpdateResourceSchemaRequest,
+    CompleteUploadSchemaRequest,
+    ListResourceSchemaRequest,
+    PageSchemaRequest,
     ResourceSchemaRequest,
+    SearchResourceSchemaRequest,
     UpdateResourceSchemaRequest,
+    UploadUrlSchemaRequest,
 )
 from schemas.request.tag import TagSchemaRequest
-from schemas.response.resource import ResourceSchemaResponse, FullResourceSchemaResponse
-from schemas.response.tag import TagSchemaResponse
-from utils.decorators import validate_schema
+from schemas.response.resource import (
+    AutocompleteSchemaResponse,
+    ResourceSchemaResponse,
+    FullResourceSchemaResponse,
+    SearchResourceSchemaResponse,
+)
+from schemas.serializers import get_serializer
+from services.storage import get_storage
+from utils.decorators import library_etag, validate_schema, validate_query_schema
+from utils.downloads import send_stored_file
+from utils.importers import iter_csv_rows, iter_json_array
+from utils.uploads import stream_uploaded_file
 
 
 class ResourceRegisterResource(Resource):
@@ -38,29 +55,129 @@ class ResourceRegisterResource(Resource):
         new_resource = ResourceManager.register(data, owner)
         return {
             "message": "You successfully created a new resource! \N{slightly smiling face}",
-            "resource": ResourceSchemaResponse().dump(new_resource),
+            "resource": get_serializer(ResourceSchemaResponse).dump(new_resource),
+        }, status.HTTP_201_CREATED
+
+
+class ImportResourceResource(Resource):
+    """
+    Imports many resources at once, from a JSON array or a CSV file sent as the request body. Validates that the user
+    is logged in and that every resource matches the requested schema. The invalid resources are skipped and listed in
+    the response, together with their row number and errors. If everything is okay, returns a happy message,
+    201 CREATED and the number of imported resources.
+
+    Headers: "Authorization": "Bearer <token>"
+             "Content-Type": "application/json" or "text/csv"
+    Body: a JSON array of resources, each with the same fields as in the resource registration and an optional
+          list of tags (a list of strings, each of maximum length 50 characters)
+          or a CSV file with a header row and the same columns, where the tags are separated by ";"
+    """
+
+    @auth.login_required
+    def post(self):
+        owner = auth.current_user()
+        if request.mimetype == "text/csv":
+            rows = iter_csv_rows(request.stream, list_fields=("tags",))
+        else:
+            rows = iter_json_array(request.stream)
+        imported, errors = ResourceManager.import_resources(rows, owner)
+        return {
+            "message": f"You successfully imported {imported} resources \N{slightly smiling face}",
+            "imported": imported,
+            "errors": errors,
         }, status.HTTP_201_CREATED
 
 
 class ListResourceResource(Resource):
     """
-    Provides a logged in user a list of all previously registered resources.
+    Provides a logged in user a list of their previously registered resources, one page at a time. The resources can be
+    filtered and sorted. If there are more resources, the response contains a next_cursor, which can be used to get the
+    next page.
 
     Headers: "Authorization": "Bearer <token>"
+    Query: limit (optional; the number of resources in a page, between 1 and 500, default 50)
+           cursor (optional; the next_cursor from the previous page)
+           sort (optional; one of "created_datetime" (default), "updated_datetime", "title", "author")
+           order (optional; "asc" (default) or "desc")
+           status (optional; one of "Read", "To Read", "Dropped")
+           min_rating, max_rating (optional; numbers between 0 and 5)
+           author (optional; the exact name of the author)
+           created_from, created_to (optional; ISO 8601 date and time, e.g. 2022-08-21T09:21:44)
     """
 
     @auth.login_required
+    @validate_query_schema(ListResourceSchemaRequest)
+    @library_etag
     def get(self):
         owner = auth.current_user()
-        resources = ResourceManager.get_resources(owner)
+        params = ListResourceSchemaRequest().load(request.args)
+        resources, next_cursor = ResourceManager.get_resources(owner, **params)
 
-        if len(resources) == 0:
+        # Only an unfiltered first page can tell that the user has no resources at all
+        filtered = params.keys() - {"limit", "sort", "order"}
+        if len(resources) == 0 and not filtered:
             return {
                 "message": "You still haven't registered any resources \N{slightly smiling face}"
             }, status.HTTP_200_OK
         return {
             "message": "Below is a list of all resources you have previously registered \N{slightly smiling face}",
-            "resources": FullResourceSchemaResponse().dump(resources, many=True),
+            "resources": get_serializer(FullResourceSchemaResponse).dump(
+                resources, many=True
+            ),
+            "next_cursor": next_cursor,
+        }, status.HTTP_200_OK
+
+
+class SearchResourceResource(Resource):
+    """
+    Searches the logged in user's resources by the words in their title, author and notes, one page at a time.
+    The best matches come first, and every resource comes with a snippet where the matching words are between the
+    \u0002 and \u0003 characters.
+    If there are more matches, the response contains a next_cursor, which can be used to get the next page.
+
+    Headers: "Authorization": "Bearer <token>"
+    Query: q (mandatory; the search terms, e.g. 'dune herbert', '"science fiction" -space' or 'austen or bronte')
+           limit (optional; the number of resources in a page, between 1 and 500, default 50)
+           cursor (optional; the next_cursor from the previous page)
+    """
+
+    @auth.login_required
+    @validate_query_schema(SearchResourceSchemaRequest)
+    def get(self):
+        owner = auth.current_user()
+        params = SearchResourceSchemaRequest().load(request.args)
+        results, next_cursor = ResourceManager.search_resources(owner.user_id, **params)
+        return {
+            "message": f"Below are the resources matching '{params['q']}'",
+            "resources": get_serializer(SearchResourceSchemaResponse).dump(
+                results, many=True
+            ),
+            "next_cursor": next_cursor,
+        }, status.HTTP_200_OK
+
+
+class AutocompleteResource(Resource):
+    """
+    Suggests titles and authors from the logged in user's library while they are typing. The suggestions are
+    typo-tolerant - "jane austin" still suggests "Jane Austen". The most similar suggestions come first.
+
+    Headers: "Authorization": "Bearer <token>"
+    Query: q (mandatory; the typed text, between 2 and 150 characters)
+           field (optional; "title" or "author", to get suggestions only for one of them)
+           limit (optional; the number of suggestions, between 1 and 50, default 10)
+    """
+
+    @auth.login_required
+    @validate_query_schema(AutocompleteSchemaRequest)
+    def get(self):
+        owner = auth.current_user()
+        params = AutocompleteSchemaRequest().load(request.args)
+        suggestions = ResourceManager.autocomplete(owner.user_id, **params)
+        return {
+            "message": f"Below are the suggestions for '{params['q']}'",
+            "suggestions": get_serializer(AutocompleteSchemaResponse).dump(
+                suggestions, many=True
+            ),
         }, status.HTTP_200_OK
 
 
@@ -85,9 +202,6 @@ class TagResourceResource(Resource):
         owner = auth.current_user()
         resource_id = int(data["resource_id"])
 
-        # Get the resource information
-        resource = ResourceManager.get_single_resource(resource_id)
-
         # Make sure the requester is the owner of the resource
         ResourceManager.authenticate_owner(resource_id, owner.user_id)
 
@@ -96,9 +210,11 @@ class TagResourceResource(Resource):
             tag_info = TagManager.register(tag, owner)
             TagManager.assign_tag(resource_id, tag_info.tag_id)
 
+        # Get the resource information together with all its tags
+        resource = ResourceManager.get_resource_with_tags(resource_id)
         return {
             "message": "You successfully tagged the resource \N{slightly smiling face}",
-            "resource": FullResourceSchemaResponse().dump(resource),
+            "resource": get_serializer(FullResourceSchemaResponse).dump(resource),
         }, status.HTTP_201_CREATED
 
 
@@ -162,6 +278,31 @@ class SetResourceToReadResource(Resource):
         }, status.HTTP_200_OK
 
 
+class BulkResourceStatusResource(Resource):
+    """
+    Changes the status of many resources at once. Validates that the user is logged in, that the input data matches
+    the requested format, and that all resources exist and belong to the user. If any of them doesn't, nothing is
+    changed. If everything is right, we get a happy message and 200 OK.
+
+    Headers: "Authorization": "Bearer <token>"
+             "Content-Type": "application/json"
+    Body: resource_ids (mandatory; a list of between 1 and 1000 resource IDs)
+          status (mandatory; one of "Read", "To Read", "Dropped")
+    """
+
+    @auth.login_required
+    @validate_schema(BulkStatusSchemaRequest)
+    def put(self):
+        owner = auth.current_user()
+        data = BulkStatusSchemaRequest().load(request.get_json())
+        count = ResourceManager.set_status_bulk(
+            data["resource_ids"], data["status"], owner.user_id
+        )
+        return {
+            "message": f"You successfully changed the status of {count} resources to {data['status'].value}"
+        }, status.HTTP_200_OK
+
+
 class DeleteResourceResource(Resource):
     """
     Deletes the resource, any files and tag assignments associated with it. Doesn't delete any tags.
@@ -176,11 +317,10 @@ class DeleteResourceResource(Resource):
     @auth.login_required
     def delete(self, resource_id):
         owner = auth.current_user()
-        ResourceManager.authenticate_owner(resource_id, owner.user_id)
-        resource = ResourceManager.get_single_resource(resource_id)
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
 
         # Check if there is a file associated with the resource and delete it, if there is
-        url = FullResourceSchemaResponse().dump(resource)["file_url"]
+        url = resource.file_url
         if url is not None:
             file_name = url.split("/")[-1]
             ResourceManager.delete_file(file_name)
@@ -194,42 +334,44 @@ class DeleteResourceResource(Resource):
 
 class GetResourceByTagResource(Resource):
     """
-    Gets all resources that the user has registered and has assigned under this tag.
+    Gets all resources that the user has registered and has assigned under this tag, one page at a time.
     Validates that the user is logged in, then validates that they are also the owner of the resource.
     Validates that the user has also previously used the tag and has assigned resources under it.
     If everything is right, we get a happy message, 200 OK and a list of resources with all information about them.
+    If there are more resources, the response contains a next_cursor, which can be used to get the next page.
 
     :param tag: string; a tag provided by the user
 
     Headers: "Authorization": "Bearer <token>"
+    Query: limit (optional; the number of resources in a page, between 1 and 500, default 50)
+           cursor (optional; the next_cursor from the previous page)
     """
 
     @auth.login_required
+    @validate_query_schema(PageSchemaRequest)
+    @library_etag
     def get(self, tag):
         owner = auth.current_user()
-
-        # Check if the user has previously used this tag
-        tag_info = TagManager.find_tag(tag, owner.user_id)
-        assigned_resources = []
+        params = PageSchemaRequest().load(request.args)
 
         # Get all resources with this tag
-        assignments = TagManager.find_assignments(
-            TagSchemaResponse().dump(tag_info)["tag_id"]
+        resources, next_cursor = ResourceManager.get_resources_by_tag(
+            tag, owner.user_id, **params
         )
-        if assignments is None or assignments.count() == 0:
+
+        if len(resources) == 0 and "cursor" not in params:
+            # Check if the user has previously used this tag
+            TagManager.find_tag(tag, owner.user_id)
             return {
                 "message": f"You still haven't tagged anything as '{tag}' \N{slightly smiling face}"
             }
 
-        # Fill in the list of all assigned resources
-        for assignment in assignments:
-            resource_id = assignment[1]
-            resource_info = ResourceManager.get_single_resource(resource_id)
-            assigned_resources.append(ResourceSchemaResponse().dump(resource_info))
-
         return {
             "message": f"Below are all resources you tagged as '{tag}'",
-            "resources": assigned_resources,
+            "resources": get_serializer(ResourceSchemaResponse).dump(
+                resources, many=True
+            ),
+            "next_cursor": next_cursor,
         }, status.HTTP_200_OK
 
 
@@ -262,48 +404,182 @@ class UpdateResourceResource(Resource):
         }, status.HTTP_200_OK
 
 
+class BulkUpdateResourceResource(Resource):
+    """
+    Updates many resources at once. Validates that the user is logged in, that every update matches the requested
+    schema, and that all resources exist and belong to the user. If any of them doesn't, nothing is changed.
+    If everything is right, we get a happy message and 200 OK.
+
+    Headers: "Authorization": "Bearer <token>"
+             "Content-Type": "application/json"
+    Body: resources (mandatory; a list of between 1 and 1000 updates, each with the same fields as in the
+                    "Update a resource" endpoint - a mandatory resource_id and the optional fields to be changed)
+    """
+
+    @auth.login_required
+    @validate_schema(BulkUpdateResourceSchemaRequest)
+    def patch(self):
+        owner = auth.current_user()
+        # Loaded through the schema, so the IDs and the values have their proper types (e.g. "5" becomes 5)
+        data = BulkUpdateResourceSchemaRequest().load(request.get_json())
+        count = ResourceManager.update_resources(data["resources"], owner.user_id)
+        return {
+            "message": f"You successfully updated {count} resources."
+        }, status.HTTP_200_OK
+
+
 class UploadFileResource(Resource):
     """
     Uploads a file to a previously registered resource. Validates that the user is logged in, then validates that they are also the
     owner of the resource, and that there is a provided file. If the resourse already has a file connected to it,
     it will be overwritten. If everything is okay, we get a happy message, the URL to the file and 201 CREATED.
+    If the client sends the SHA-256 hash of the file and the user already has a file with the same content in another
+    resource, the file isn't uploaded again - it can be left out of the request.
 
     Headers: "Authorization": "Bearer <token>"
+             "X-Content-SHA256": <optional, the hex SHA-256 hash of the file>
     Form: file=<path to uploaded file>
     """
 
     @auth.login_required
     def post(self, resource_id):
         owner = auth.current_user()
-        ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        # The resource information is needed to check if it's already related to a file in the S3 bucket
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
+
+        # If the user has the content already, don't even read the file
+        sha256 = request.headers.get("X-Content-SHA256")
+        url = ResourceManager.reuse_file(sha256, owner.user_id) if sha256 else None
 
-        # Make sure there is a file attached to the request
-        try:
-            file = request.files["file"]
+        if url is None:
+            # Read the file while it's being received, instead of saving the whole form first. If there isn't a file
+            # in the request, the user is reminded to attach it with 400 BAD REQUEST.
+            file = stream_uploaded_file(request.stream, request.content_type)
 
-            # Get the resource information, so we can check if it's already related to a file in the S3 bucket
-            resource = ResourceManager.get_single_resource(resource_id)
+            # Upload the new file first, so the old one is kept if the upload fails
+            url = ResourceManager.upload_file(resource_id, file, sha256)
 
-            current_url = FullResourceSchemaResponse().dump(resource)["file_url"]
+        # If there is a related file already, delete it forever, together with the update of the link
+        ResourceManager.link_file(resource, url)
+        return {
+            "message": f"You successfully uploaded the file in the following location: {url}"
+        }, status.HTTP_201_CREATED
+
+
+class UploadUrlResource(Resource):
+    """
+    Creates a link for uploading a file of a previously registered resource straight to the S3 bucket, so large files
+    don't have to pass through the application. Validates that the user is logged in and is the owner of the resource.
+    Upload the file with the returned method, headers and link, then complete the upload with the returned key.
+    If everything is okay, we get the link and 200 OK.
+
+    :param resource_id: int; the ID of the resource the file belongs to
 
-            # If there is a related file already, delete it forever
-            if current_url is not None and current_url != "":
-                file_name = current_url.split("/")[-1]
-                ResourceManager.delete_file(file_name)
+    Headers: "Authorization": "Bearer <token>"
+    Body: "filename": <the name of the file, for its extension>,
+          "content_type": <optional, the content type of the file; application/octet-stream by default>,
+          "sha256": <optional, the hex SHA-256 hash of the file; if the user has the content in another resource
+                    already, the file is linked to the resource right away, with 201 CREATED, and doesn't need to be
+                    uploaded>
+    """
 
-            # Upload the new file, then update the resource with the new link
-            url = ResourceManager.upload_file(resource_id, file)
-            data = {"file_url": url}
-            ResourceManager.update_resource(resource_id, data)
+    @auth.login_required
+    @validate_schema(UploadUrlSchemaRequest)
+    def post(self, resource_id):
+        owner = auth.current_user()
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        data = UploadUrlSchemaRequest().load(request.get_json())
+
+        # If the user has the content already, there is nothing to upload
+        url = (
+            ResourceManager.reuse_file(data["sha256"], owner.user_id)
+            if "sha256" in data
+            else None
+        )
+        if url is not None:
+            ResourceManager.link_file(resource, url)
             return {
-                "message": f"You successfully uploaded the file in the following location: {url}"
+                "message": f"You already have this file, so you don't need to upload it \N{slightly smiling face} "
+                f"It's in the following location: {url}",
+                "file_url": url,
             }, status.HTTP_201_CREATED
 
-        # If there isn't a file in the request, remind the user to attach it
-        except:
-            return {
-                "message": "You probably forgot to attach the file \N{slightly smiling face} Please, provide it in the form-data section, with key = file."
-            }, status.HTTP_400_BAD_REQUEST
+        upload = ResourceManager.create_upload_url(
+            resource_id, data["filename"], data["content_type"]
+        )
+        return {
+            "message": "Upload your file with this link \N{slightly smiling face}",
+            **upload,
+        }, status.HTTP_200_OK
+
+
+class CompleteUploadResource(Resource):
+    """
+    Completes an upload made with a link from the upload link endpoint. Validates that the user is logged in and is the
+    owner of the resource, that the key was made for this resource and that the file is in the S3 bucket. If the
+    resource already has a file connected to it, it will be overwritten. If everything is okay, we get a happy message,
+    the URL to the file and 201 CREATED.
+
+    :param resource_id: int; the ID of the resource the file belongs to
+
+    Headers: "Authorization": "Bearer <token>"
+    Body: "key": <the key returned with the upload link>
+    """
+
+    @auth.login_required
+    @validate_schema(CompleteUploadSchemaRequest)
+    def post(self, resource_id):
+        owner = auth.current_user()
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        url = ResourceManager.complete_upload(resource, request.get_json()["key"])
+        return {
+            "message": f"You successfully uploaded the file in the following location: {url}"
+        }, status.HTTP_201_CREATED
+
+
+class DownloadUrlResource(Resource):
+    """
+    Creates a short-lived link for downloading the file of a resource straight from the S3 bucket. Validates that the
+    user is logged in and is the owner of the resource, and that the resource has a file. If everything is okay, we get
+    the link and 200 OK.
+
+    :param resource_id: int; the ID of the resource the file belongs to
+
+    Headers: "Authorization": "Bearer <token>"
+    """
+
+    @auth.login_required
+    def get(self, resource_id):
+        owner = auth.current_user()
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        download = ResourceManager.create_download_url(resource)
+        return {
+            "message": "Download your file with this link \N{slightly smiling face}",
+            **download,
+        }, status.HTTP_200_OK
+
+
+class DownloadFileResource(Resource):
+    """
+    Downloads the file of a resource through the API. Validates that the user is logged in and is the owner of the
+    resource, and that the resource has a file. The file is streamed, so even large files are never kept whole in the
+    memory. Interrupted downloads can be continued with a Range header (206 PARTIAL CONTENT), and a copy the client
+    already has can be checked with If-None-Match or If-Modified-Since (304 NOT MODIFIED).
+
+    :param resource_id: int; the ID of the resource the file belongs to
+
+    Headers: "Authorization": "Bearer <token>"
+             "Range": <optional, e.g. bytes=1048576->
+             "If-Range": <optional, the ETag or Last-Modified date of the partly downloaded file>
+             "If-None-Match": <optional, the ETag of the client's copy>
+             "If-Modified-Since": <optional, the Last-Modified date of the client's copy>
+    """
+
+    @auth.login_required
+    def get(self, resource_id):
+        owner = auth.current_user()
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        return send_stored_file(get_storage(), ResourceManager.file_key(resource))
 
 
 class DeleteFileResource(Resource):
@@ -319,11 +595,10 @@ class DeleteFileResource(Resource):
     @auth.login_required
     def delete(self, resource_id):
         owner = auth.current_user()
-        ResourceManager.authenticate_owner(resource_id, owner.user_id)
+        resource = ResourceManager.authenticate_owner(resource_id, owner.user_id)
 
         # Get the link to the existing file
-        resource = ResourceManager.get_single_resource(resource_id)
-        url = FullResourceSchemaResponse().dump(resource)["file_url"]
+        url = resource.file_url
 
         # If there is no file uploaded for this resource, tell the user that we have figured it out
         if url == "" or url is None:
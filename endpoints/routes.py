@@ -1,26 +1,39 @@
 from endpoints.auth import *
 from endpoints.resource import *
 from endpoints.statistics import *
+from endpoints.storage import StorageLinkResource
 from endpoints.tag import *
 from endpoints.user import GetUserInfoResource, UpdateUserResource
 
 routes = (
     (RegisterResource, "/register/"),
     (LoginResource, "/login/"),
+    (RefreshTokenResource, "/refresh/"),
+    (RevokeRefreshTokenResource, "/revoke/"),
     (ResourceRegisterResource, "/new_resource/"),
+    (ImportResourceResource, "/import_resources/"),
     (ListResourceResource, "/my_resources/"),
+    (SearchResourceResource, "/search_resources/"),
+    (AutocompleteResource, "/autocomplete/"),
     (TagResourceResource, "/tag_resource/"),
     (SetResourceReadResource, "/resource_status/<int:resource_id>/read/"),
     (SetResourceDroppedResource, "/resource_status/<int:resource_id>/dropped/"),
     (SetResourceToReadResource, "/resource_status/<int:resource_id>/to_read/"),
+    (BulkResourceStatusResource, "/resource_status/"),
     (DeleteResourceResource, "/delete_resource/<int:resource_id>/"),
     (ListTagsResource, "/my_tags/"),
     (DeleteTagNameResource, "/delete_tag/<string:tag>/"),
     (GetResourceByTagResource, "/my_resources_with_tag/<string:tag>/"),
     (UpdateResourceResource, "/update_resource/"),
+    (BulkUpdateResourceResource, "/update_resources/"),
     (GeneralStatsResource, "/general_stats/"),
     (GetUserInfoResource, "/my_user/"),
     (UpdateUserResource, "/update_user/"),
     (UploadFileResource, "/upload_file/<int:resource_id>/"),
+    (UploadUrlResource, "/upload_url/<int:resource_id>/"),
+    (CompleteUploadResource, "/upload_complete/<int:resource_id>/"),
+    (DownloadUrlResource, "/download_url/<int:resource_id>/"),
+    (DownloadFileResource, "/download/<int:resource_id>/"),
     (DeleteFileResource, "/delete_file/<int:resource_id>/"),
+    (StorageLinkResource, "/storage/<string:token>/"),
 )
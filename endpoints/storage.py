@@ -0,0 +1,45 @@
+from flask import request
+from flask_api import status
+from flask_restful import Resource
+from werkzeug.exceptions import BadRequest, NotFound
+
+from services.local_storage import LocalStorage
+from services.storage import get_storage
+from utils.downloads import send_stored_file
+
+
+class StorageLinkResource(Resource):
+    """
+    Serves the presigned links of the local storage, the same way the S3 bucket serves its own - the file is uploaded
+    with PUT, in the body of the request, and downloaded with GET. The link itself is the permission, so there is no
+    token in the headers. It's only available when the files are kept on the local disk.
+
+    :param token: string; the signed part of the link, with the key of the file and when the link expires
+
+    Headers (PUT): "Content-Type": <the content type the link was made for>
+    Body (PUT): the file
+    """
+
+    @staticmethod
+    def local_storage():
+        storage = get_storage()
+        if not isinstance(storage, LocalStorage):
+            raise NotFound()
+        return storage
+
+    def get(self, token):
+        storage = self.local_storage()
+        key, _ = storage.verify(token, "GET")
+        return send_stored_file(storage, key)
+
+    def put(self, token):
+        storage = self.local_storage()
+        key, content_type = storage.verify(token, "PUT")
+        if request.content_type != content_type:
+            raise BadRequest(
+                f"Please, upload the file with Content-Type: {content_type} \N{slightly smiling face}"
+            )
+        storage.put(request.stream, key)
+        return {
+            "message": "Your file is uploaded \N{slightly smiling face}"
+        }, status.HTTP_200_OK
@@ -4,6 +4,8 @@ from flask_restful import Resource
 from managers.auth import auth
 from managers.tag import TagManager
 from schemas.response.tag import TagSchemaResponse
+from schemas.serializers import get_serializer
+from utils.decorators import library_etag
 
 
 class ListTagsResource(Resource):
@@ -15,6 +17,7 @@ class ListTagsResource(Resource):
     """
 
     @auth.login_required
+    @library_etag
     def get(self):
         owner = auth.current_user()
         resources = TagManager.get_tags(owner)
@@ -25,7 +28,7 @@ class ListTagsResource(Resource):
             }
         return {
             "message": "Below is a list of all tags you have previously used \N{slightly smiling face}",
-            "tags": TagSchemaResponse().dump(resources, many=True),
+            "tags": get_serializer(TagSchemaResponse).dump(resources, many=True),
         }, status.HTTP_200_OK
 
 
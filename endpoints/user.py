@@ -6,6 +6,7 @@ from managers.auth import auth
 from managers.user import UserManager
 from schemas.request.user import UpdateUserSchemaRequest
 from schemas.response.user import UserSchemaResponse
+from schemas.serializers import get_serializer
 from utils.decorators import validate_schema
 
 
@@ -23,7 +24,7 @@ class GetUserInfoResource(Resource):
         user = UserManager.get_user_info(owner.user_id)
         return {
             "message": f"Below you'll find your user information.",
-            "user": UserSchemaResponse().dump(user),
+            "user": get_serializer(UserSchemaResponse).dump(user),
         }, status.HTTP_200_OK
 
 
@@ -1,12 +1,15 @@
+import time
 from datetime import datetime, timedelta
 
 import jwt
-from decouple import config
+from flask import current_app
 from flask_httpauth import HTTPTokenAuth
 from jwt import ExpiredSignatureError, InvalidTokenError
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.exceptions import Unauthorized
 
 from models import UserModel
+from settings import get_settings
 
 
 class AuthManager:
@@ -18,17 +21,18 @@ class AuthManager:
     def encode_token(user):
         """
         Creates a valid token. It takes the user, extracts the user ID, combines it with the random JWT_SECRET from
-        the .env file and adds information about the expiration date of the token.
+        the application settings and adds information about the expiration date of the token.
 
         :param user: user trying to register or log in
         :return: token: string, a valid token
         """
+        settings = get_settings()
         payload = {
             "sub": user.user_id,
             "exp": datetime.utcnow()
-            + timedelta(minutes=int(config("TOKEN_VALIDITY_VALUE_IN_MINUTES"))),
+            + timedelta(minutes=settings.token_validity_in_minutes),
         }
-        return jwt.encode(payload, key=config("JWT_SECRET"), algorithm="HS256")
+        return jwt.encode(payload, key=settings.jwt_secret, algorithm="HS256")
 
     @staticmethod
     def decode_token(token):
@@ -39,13 +43,25 @@ class AuthManager:
         :param token: string; a token previously provided to the user
         :return: user_id: int
         """
+        return AuthManager.decode_payload(token)["sub"]
+
+    @staticmethod
+    def decode_payload(token):
+        """
+        Decodes the encoded token. If it's valid, returns the whole payload - the user ID and the expiration time.
+        If it's invalid, returns a message with what exactly is the problem in the token.
+
+        :param token: string; a token previously provided to the user
+        :return: payload: dict, with keys "sub" (the user ID) and "exp" (the expiration timestamp)
+        """
         if not token:
             raise Unauthorized(
                 "You need a token to get access to this endpoint \N{winking face}"
             )
         try:
-            payload = jwt.decode(token, key=config("JWT_SECRET"), algorithms=["HS256"])
-            return payload["sub"]
+            return jwt.decode(
+                token, key=get_settings().jwt_secret, algorithms=["HS256"]
+            )
         except ExpiredSignatureError:
             raise Unauthorized("Sorry, your token has expired. Please, log in again.")
         except InvalidTokenError:
@@ -54,16 +70,64 @@ class AuthManager:
             )
 
 
+def user_cache():
+    """
+    Get the cache of the users that were recently resolved from a token. Every application has its own cache.
+
+    :return: TTLCache object, with the tokens as keys and detached UserModel objects as values
+    """
+    return current_app.extensions["user_cache"]
+
+
+def invalidate_cached_user(user_id):
+    """
+    Remove a user from the token cache, so the next request reads them from the database again.
+    Note that the cache lives in the worker process, so other workers will see the change when their entries expire.
+
+    :param user_id: int, the ID of the user that has changed
+    """
+    user_cache().invalidate(lambda user: user.user_id == user_id)
+
+
+def detached_copy(user):
+    """
+    Create a copy of the user, which isn't attached to any database session. It is safe to keep it between requests.
+
+    :param user: UserModel object
+    :return: UserModel object, a detached copy of the user
+    """
+    snapshot = UserModel(
+        **{
+            column.key: getattr(user, column.key)
+            for column in UserModel.__mapper__.column_attrs
+        }
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
 auth = HTTPTokenAuth()
 
 
 @auth.verify_token
 def verify(token):
     """
-    Verifies that the provided token is valid and hasn't expired yet.
+    Verifies that the provided token is valid and hasn't expired yet. The user is cached for the token, but never
+    longer than the token is valid, so the database and the token decoding are skipped for the following requests.
 
     :param token: string; a token previously provided to the user
     :return: user: the user information from the user table
     """
-    user_id = AuthManager.decode_token(token)
-    return UserModel.query.filter_by(user_id=user_id).first()
+    cache = user_cache()
+    user = cache.get(token) if token else None
+    if user is not None:
+        return user
+
+    payload = AuthManager.decode_payload(token)
+    user = UserModel.query.filter_by(user_id=payload["sub"]).first()
+    if user is None:
+        return None
+
+    user = detached_copy(user)
+    cache.set(token, user, ttl=payload["exp"] - time.time())
+    return user
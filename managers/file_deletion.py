@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from sqlalchemy import func
+
+from constants import (
+    FILE_DELETION_MAX_RETRY_DELAY_IN_SECONDS,
+    FILE_DELETION_RETRY_DELAY_IN_SECONDS,
+)
+from db import db
+from models import FileDeletionStatus
+from models.file_deletion import FileDeletionModel
+
+# The most keys S3 accepts in one DeleteObjects request
+MAX_BATCH_SIZE = 1000
+
+
+class FileDeletionManager:
+    @staticmethod
+    def schedule(file_key):
+        """
+        Add a file to the outbox of files to be deleted from the storage. The row is only added to the current
+        session, so it's committed (or rolled back) together with the change that removes the file from its resource.
+
+        :param file_key: string, the key of the file
+        """
+        db.session.add(FileDeletionModel(file_key=file_key))
+
+    @staticmethod
+    def drain(storage, batch_size=MAX_BATCH_SIZE, max_attempts=10):
+        """
+        Delete the next batch of files that are due, with one DeleteObjects request. The rows of the deleted files are
+        removed; the failed ones are tried again later, with a growing delay, until they run out of attempts and are
+        marked as dead. The rows are locked with SKIP LOCKED, so more than one worker can drain the outbox at a time.
+
+        :param storage: Storage object, the storage the files are deleted from
+        :param batch_size: int, the maximum number of files deleted together (up to 1000)
+        :param max_attempts: int, the number of attempts after which a file is marked as dead
+        :return: dict, the number of "deleted", "failed" and "dead" files in the batch
+        """
+        rows = (
+            FileDeletionModel.query.filter(
+                FileDeletionModel.status == FileDeletionStatus.pending,
+                FileDeletionModel.next_attempt_datetime <= func.now(),
+            )
+            .order_by(FileDeletionModel.next_attempt_datetime)
+            .limit(min(batch_size, MAX_BATCH_SIZE))
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            db.session.commit()
+            return {"deleted": 0, "failed": 0, "dead": 0}
+
+        keys = list(dict.fromkeys(row.file_key for row in rows))
+        errors = storage.delete(keys)
+
+        deleted = [row.file_deletion_id for row in rows if row.file_key not in errors]
+        if deleted:
+            FileDeletionModel.query.filter(
+                FileDeletionModel.file_deletion_id.in_(deleted)
+            ).delete(synchronize_session=False)
+
+        dead = 0
+        for row in rows:
+            if row.file_key not in errors:
+                continue
+            row.attempts += 1
+            row.last_error = errors[row.file_key]
+            if row.attempts >= max_attempts:
+                row.status = FileDeletionStatus.dead
+                dead += 1
+            else:
+                delay = min(
+                    FILE_DELETION_RETRY_DELAY_IN_SECONDS * 2 ** (row.attempts - 1),
+                    FILE_DELETION_MAX_RETRY_DELAY_IN_SECONDS,
+                )
+                row.next_attempt_datetime = func.now() + timedelta(seconds=delay)
+        db.session.commit()
+        return {
+            "deleted": len(deleted),
+            "failed": len(rows) - len(deleted) - dead,
+            "dead": dead,
+        }
+
+    @staticmethod
+    def retry_dead():
+        """
+        Give the dead files another chance - they are tried again by the next drain, with all their attempts.
+
+        :return: int, the number of files put back in the outbox
+        """
+        count = FileDeletionModel.query.filter_by(
+            status=FileDeletionStatus.dead
+        ).update(
+            {
+                "status": FileDeletionStatus.pending,
+                "attempts": 0,
+                "next_attempt_datetime": func.now(),
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+        return count
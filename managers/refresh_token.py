@@ -0,0 +1,123 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from werkzeug.exceptions import Unauthorized
+
+from db import db
+from managers.auth import AuthManager
+from models import RefreshTokenModel
+from settings import get_settings
+
+
+class RefreshTokenManager:
+    """
+    A class responsible for the refresh tokens. They let the users get a new access token with a quick database lookup,
+    instead of logging in with their password again. Every refresh token can be used only once - it is replaced by a
+    new one, which is valid for the full period again (sliding expiry).
+    """
+
+    @staticmethod
+    def hash_token(refresh_token):
+        """
+        Hash a refresh token. The tokens are long and random, so a fast hash function is enough to protect them.
+
+        :param refresh_token: string, the refresh token provided to the user
+        :return: string, the hexadecimal SHA-256 hash of the token
+        """
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    @staticmethod
+    def issue(user_id):
+        """
+        Create a new refresh token for the user. It needs to be committed by the caller.
+
+        :param user_id: int, the ID of the user
+        :return: (refresh_token, RefreshTokenModel object): the raw token for the user and its record in the database
+        """
+        refresh_token = secrets.token_urlsafe(48)
+        record = RefreshTokenModel(
+            token_hash=RefreshTokenManager.hash_token(refresh_token),
+            user_id=user_id,
+            expires_datetime=datetime.utcnow()
+            + timedelta(days=get_settings().refresh_token_validity_in_days),
+        )
+        db.session.add(record)
+        return refresh_token, record
+
+    @staticmethod
+    def find(refresh_token):
+        """
+        Find the record of a refresh token and lock it, so it can't be used twice at the same time.
+
+        :param refresh_token: string, the refresh token provided to the user
+        :return: RefreshTokenModel object; Unauthorized, if there is no such token
+        """
+        record = (
+            RefreshTokenModel.query.filter_by(
+                token_hash=RefreshTokenManager.hash_token(refresh_token)
+            )
+            .with_for_update(of=RefreshTokenModel)
+            .first()
+        )
+        if record is None:
+            raise Unauthorized(
+                "Sorry, your refresh token is invalid \N{unamused face}. Please, log in again."
+            )
+        return record
+
+    @staticmethod
+    def refresh(refresh_token):
+        """
+        Exchange a refresh token for a new access token and a new refresh token. The old refresh token is revoked.
+        If an already revoked token is used, somebody may have stolen it, so all tokens of the user are revoked.
+
+        :param refresh_token: string, the refresh token provided to the user
+        :return: (token, refresh_token): a new access token and a new refresh token
+        """
+        record = RefreshTokenManager.find(refresh_token)
+        now = datetime.utcnow()
+
+        if record.revoked_datetime is not None:
+            RefreshTokenManager.revoke_all(record.user_id)
+            db.session.commit()
+            raise Unauthorized(
+                "Sorry, this refresh token has already been used \N{unamused face}. Please, log in again."
+            )
+
+        if record.expires_datetime <= now:
+            db.session.rollback()
+            raise Unauthorized(
+                "Sorry, your refresh token has expired. Please, log in again."
+            )
+
+        new_refresh_token, new_record = RefreshTokenManager.issue(record.user_id)
+        db.session.flush()
+        record.revoked_datetime = now
+        record.replaced_by_id = new_record.refresh_token_id
+        token = AuthManager.encode_token(record.user)
+        db.session.commit()
+        return token, new_refresh_token
+
+    @staticmethod
+    def revoke(refresh_token):
+        """
+        Revoke a refresh token, so it can't be used anymore.
+
+        :param refresh_token: string, the refresh token provided to the user
+        """
+        record = RefreshTokenManager.find(refresh_token)
+        if record.revoked_datetime is None:
+            record.revoked_datetime = datetime.utcnow()
+        db.session.commit()
+
+    @staticmethod
+    def revoke_all(user_id):
+        """
+        Revoke all refresh tokens of the user, which are still active.
+
+        :param user_id: int, the ID of the user
+        """
+        RefreshTokenModel.query.filter_by(
+            user_id=user_id, revoked_datetime=None
+        ).update({"revoked_datetime": datetime.utcnow()}, synchronize_session=False)
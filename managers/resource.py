@@ -1,18 +1,35 @@
-import os
+import re
 import uuid
+from datetime import datetime
 
-from sqlalchemy import func
+from marshmallow import ValidationError
+from sqlalchemy import bindparam, func, literal, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
 from werkzeug.exceptions import BadRequest, Forbidden
 
-from constants import TEMP_FILE_FOLDER
+from constants import (
+    AUTOCOMPLETE_SIMILARITY_THRESHOLD,
+    HIGHLIGHT_END,
+    HIGHLIGHT_START,
+    IMPORT_CHUNK_SIZE,
+)
 from db import db
-from models import ResourceStatus
+from managers.file_deletion import FileDeletionManager
+from managers.stored_file import StoredFileManager
+from managers.user import UserManager
+from models import ResourceStatus, TagModel
 from models.resource import ResourceModel, resource_tag
-from schemas.response.resource import FullResourceSchemaResponse
-from services.aws_s3_bucket import S3Service
-from utils.helpers import delete_local_file
-
-s3 = S3Service()
+from schemas.request.resource import ImportResourceSchemaRequest
+from services.storage import get_storage
+from settings import get_settings
+from utils.helpers import (
+    INVALID_CURSOR_MESSAGE,
+    decode_cursor,
+    encode_cursor,
+)
+from utils.importers import copy_rows
+from utils.uploads import HashingReader
 
 
 class ResourceManager:
@@ -28,28 +45,365 @@ class ResourceManager:
         resource_data["owner_id"] = owner.user_id
         data = ResourceModel(**resource_data)
         db.session.add(data)
+        UserManager.bump_library_version(owner.user_id)
         db.session.commit()
         return data
 
     @staticmethod
-    def get_resources(owner):
+    def import_resources(rows, owner):
+        """
+        Import many resources at once. The rows are validated and written to the database in chunks, with a COPY for
+        the resources and their tag assignments and one INSERT for the new tags per chunk. Invalid rows are skipped and
+        reported back, the valid ones are saved in one transaction.
+
+        :param rows: iterable of dicts, the resources to be imported, each with the same fields as a new resource and
+                     an optional list of tags
+        :param owner: UserModel object, the user who imports the resources
+        :return: (imported, errors): int, the number of imported resources and a list of dicts with the number (starting
+                 from 1) and the validation errors of every invalid row
+        """
+        schema = ImportResourceSchemaRequest()
+        imported = 0
+        errors = []
+        chunk = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                chunk.append(schema.load(row))
+            except ValidationError as ex:
+                errors.append({"row": number, "errors": ex.messages})
+            if len(chunk) == IMPORT_CHUNK_SIZE:
+                imported += ResourceManager._insert_chunk(chunk, owner.user_id)
+                chunk = []
+        if chunk:
+            imported += ResourceManager._insert_chunk(chunk, owner.user_id)
+
+        if imported:
+            UserManager.bump_library_version(owner.user_id)
+        db.session.commit()
+        return imported, errors
+
+    @staticmethod
+    def _insert_chunk(chunk, owner_id):
         """
-        Returns all resources a user has registered.
+        Write a chunk of validated resources and their tags to the database with COPY, without committing.
+        The resource IDs are taken from the sequence first, so the tags can be assigned without reading them back.
+
+        :param chunk: list of dicts, the loaded resources
+        :param owner_id: int, the ID of the user who imports the resources
+        :return: int, the number of inserted resources
+        """
+        resource_ids = db.session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence('resource', 'resource_id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"count": len(chunk)},
+        ).scalars()
+        chunk = list(zip(resource_ids, chunk))
+        copy_rows(
+            "resource",
+            (
+                "resource_id",
+                "title",
+                "author",
+                "link",
+                "notes",
+                "rating",
+                "owner_id",
+                "status",
+            ),
+            (
+                (
+                    resource_id,
+                    resource["title"],
+                    resource["author"],
+                    resource.get("link"),
+                    resource.get("notes"),
+                    resource.get("rating"),
+                    owner_id,
+                    ResourceStatus.pending.name,
+                )
+                for resource_id, resource in chunk
+            ),
+        )
+
+        assignments = [
+            (resource_id, tag)
+            for resource_id, resource in chunk
+            for tag in set(resource.get("tags", []))
+        ]
+        if not assignments:
+            return len(chunk)
+
+        # Create the tags the user hasn't used before and get the IDs of all tags of the chunk
+        names = {tag for _, tag in assignments}
+        db.session.execute(
+            insert(TagModel)
+            .values([{"tag": tag, "owner_id": owner_id} for tag in names])
+            .on_conflict_do_nothing(constraint="_user_tag")
+        )
+        tag_ids = dict(
+            db.session.query(TagModel.tag, TagModel.tag_id).filter(
+                TagModel.owner_id == owner_id, TagModel.tag.in_(names)
+            )
+        )
+        copy_rows(
+            "resource_tag",
+            ("resource_id", "tag_id"),
+            ((resource_id, tag_ids[tag]) for resource_id, tag in assignments),
+        )
+        return len(chunk)
+
+    @staticmethod
+    def get_resources(
+        owner,
+        limit=50,
+        cursor=None,
+        sort="created_datetime",
+        order="asc",
+        status=None,
+        min_rating=None,
+        max_rating=None,
+        author=None,
+        created_from=None,
+        created_to=None,
+    ):
+        """
+        Returns a page of the resources a user has registered, optionally filtered.
 
         :param owner: UserModel object
-        :return: ResourceModel object, containing all resources registered by the user
+        :param limit: int, the maximum number of resources in the page
+        :param cursor: string, optional; the next_cursor of the previous page
+        :param sort: string, the column to sort by: "created_datetime", "updated_datetime", "title" or "author"
+        :param order: string, "asc" or "desc"
+        :param status: ResourceStatus, optional; return only resources with this status
+        :param min_rating: float, optional; return only resources with at least this rating
+        :param max_rating: float, optional; return only resources with at most this rating
+        :param author: string, optional; return only resources by this exact author
+        :param created_from: datetime, optional; return only resources created at or after this moment
+        :param created_to: datetime, optional; return only resources created at or before this moment
+        :return: (resources, next_cursor): list of ResourceModel objects and a string (None, if this is the last page)
+        """
+        # Load the tags of the whole page with one more query, instead of one query per resource
+        query = ResourceModel.query.options(selectinload(ResourceModel.tags)).filter(
+            ResourceModel.owner_id == owner.user_id
+        )
+        if status is not None:
+            query = query.filter(ResourceModel.status == status)
+        if min_rating is not None:
+            query = query.filter(ResourceModel.rating >= min_rating)
+        if max_rating is not None:
+            query = query.filter(ResourceModel.rating <= max_rating)
+        if author is not None:
+            query = query.filter(ResourceModel.author == author)
+        if created_from is not None:
+            query = query.filter(ResourceModel.created_datetime >= created_from)
+        if created_to is not None:
+            query = query.filter(ResourceModel.created_datetime <= created_to)
+
+        return ResourceManager.keyset_page(
+            query, getattr(ResourceModel, sort), order, limit, cursor
+        )
+
+    @staticmethod
+    def get_resources_by_tag(tag, user_id, limit=50, cursor=None):
+        """
+        Returns a page of the user's resources assigned to a tag. The resources are found with a single query, joining
+        the resources, the assignments and the tags.
+
+        :param tag: string, the tag
+        :param user_id: int, the ID of the user
+        :param limit: int, the maximum number of resources in the page
+        :param cursor: string, optional; the next_cursor of the previous page
+        :return: (resources, next_cursor): list of ResourceModel objects and a string (None, if this is the last page)
+        """
+        query = (
+            ResourceModel.query.join(
+                resource_tag, resource_tag.c.resource_id == ResourceModel.resource_id
+            )
+            .join(TagModel, TagModel.tag_id == resource_tag.c.tag_id)
+            .filter(
+                TagModel.tag == tag,
+                TagModel.owner_id == user_id,
+                ResourceModel.owner_id == user_id,
+            )
+        )
+        return ResourceManager.keyset_page(
+            query, ResourceModel.created_datetime, "asc", limit, cursor
+        )
+
+    @staticmethod
+    def keyset_page(query, sort_column, order, limit, cursor=None):
+        """
+        Get a page of resources, sorted by a column and the resource ID. Instead of skipping the previous pages with
+        OFFSET, the query continues right after the last resource of the previous page, so every page is equally fast.
+
+        :param query: BaseQuery object, selecting the resources
+        :param sort_column: Column, the column to sort by; it must not contain NULL values
+        :param order: string, "asc" or "desc"
+        :param limit: int, the maximum number of resources in the page
+        :param cursor: string, optional; the next_cursor of the previous page
+        :return: (resources, next_cursor): list of ResourceModel objects and a string (None, if this is the last page)
+        """
+        key = tuple_(sort_column, ResourceModel.resource_id)
+        if cursor is not None:
+            cursor_sort, cursor_order, value, resource_id = (
+                decode_cursor(cursor) + [None] * 4
+            )[:4]
+            if cursor_sort != sort_column.key or cursor_order != order:
+                raise BadRequest(
+                    "This cursor belongs to a differently sorted list \N{unamused face} Please, use the same sorting for all pages."
+                )
+            if not isinstance(resource_id, int) or not isinstance(value, str):
+                raise BadRequest(INVALID_CURSOR_MESSAGE)
+            if sort_column.type.python_type is datetime:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise BadRequest(INVALID_CURSOR_MESSAGE)
+            position = tuple_(value, resource_id)
+            query = query.filter(key > position if order == "asc" else key < position)
+
+        if order == "asc":
+            query = query.order_by(sort_column.asc(), ResourceModel.resource_id.asc())
+        else:
+            query = query.order_by(sort_column.desc(), ResourceModel.resource_id.desc())
+
+        resources = query.limit(limit + 1).all()
+        if len(resources) <= limit:
+            return resources, None
+
+        resources = resources[:limit]
+        last_value = getattr(resources[-1], sort_column.key)
+        if isinstance(last_value, datetime):
+            last_value = last_value.isoformat()
+        next_cursor = encode_cursor(
+            [sort_column.key, order, last_value, resources[-1].resource_id]
+        )
+        return resources, next_cursor
+
+    @staticmethod
+    def search_resources(owner_id, q, limit=50, cursor=None):
+        """
+        Search the user's resources by the words in their title, author and notes. The resources are ranked by
+        how well they match, with the title counting the most and the notes the least.
+
+        :param owner_id: int, the ID of the user whose resources are searched
+        :param q: string, the search terms, in the format of web search engines (e.g. '"exact phrase" -excluded or other')
+        :param limit: int, the maximum number of resources in the page
+        :param cursor: string, optional; the next_cursor returned with the previous page
+        :return: (results, next_cursor): list of rows with the basic resource information, its "rank" and a "snippet"
+                 with the matching words between HIGHLIGHT_START and HIGHLIGHT_END, and a string (None, if this is the
+                 last page)
+        """
+        offset = 0
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            if (
+                len(values) != 2
+                or values[0] != "search"
+                or not isinstance(values[1], int)
+                or values[1] < 0
+            ):
+                raise BadRequest(INVALID_CURSOR_MESSAGE)
+            offset = values[1]
+
+        query = func.websearch_to_tsquery("english", q)
+        rank = func.ts_rank(ResourceModel.search_vector, query)
+
+        # Rank and page the matches first, so the snippets are made only for the resources in the page
+        page = (
+            db.session.query(ResourceModel.resource_id, rank.label("rank"))
+            .filter(
+                ResourceModel.owner_id == owner_id,
+                ResourceModel.search_vector.op("@@")(query),
+            )
+            .order_by(rank.desc(), ResourceModel.resource_id)
+            .limit(limit + 1)
+            .offset(offset)
+            .subquery()
+        )
+        snippet = func.ts_headline(
+            "english",
+            func.concat_ws(
+                " ... ",
+                ResourceModel.title,
+                ResourceModel.author,
+                ResourceModel.notes,
+            ),
+            query,
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=35, MinWords=15, MaxFragments=2",
+        )
+        results = (
+            db.session.query(
+                ResourceModel.resource_id,
+                ResourceModel.title,
+                ResourceModel.author,
+                ResourceModel.created_datetime,
+                ResourceModel.status,
+                page.c.rank,
+                snippet.label("snippet"),
+            )
+            .join(page, page.c.resource_id == ResourceModel.resource_id)
+            .order_by(page.c.rank.desc(), ResourceModel.resource_id)
+            .all()
+        )
+
+        if len(results) <= limit:
+            return results, None
+        return results[:limit], encode_cursor(["search", offset + limit])
+
+    @staticmethod
+    def autocomplete(owner_id, q, field=None, limit=10):
+        """
+        Suggest titles and authors from the user's library that look like the typed text, even if it's misspelled.
+        The suggestions come from the trigram indexes on the title and author, and the most similar come first.
+
+        :param owner_id: int, the ID of the user whose library is searched
+        :param q: string, the text typed by the user
+        :param field: string, optional; "title" or "author", if only one of them should be suggested
+        :param limit: int, the maximum number of suggestions
+        :return: list of rows with the "field", the suggested "value" and its "similarity" to the text (between 0 and 1)
         """
-        return ResourceModel.query.filter_by(owner_id=owner.user_id).all()
+        # The threshold of the %> operator, only for the current transaction
+        db.session.execute(
+            text(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"
+            ),
+            {"threshold": str(AUTOCOMPLETE_SIMILARITY_THRESHOLD)},
+        )
+
+        queries = []
+        for name in [field] if field else ["title", "author"]:
+            column = getattr(ResourceModel, name)
+            queries.append(
+                db.session.query(
+                    literal(name).label("field"),
+                    column.label("value"),
+                    func.max(func.word_similarity(q, column)).label("similarity"),
+                )
+                .filter(ResourceModel.owner_id == owner_id, column.op("%>")(q))
+                .group_by(column)
+            )
+        suggestions = queries[0].union_all(*queries[1:]).subquery()
+        return (
+            db.session.query(suggestions)
+            .order_by(suggestions.c.similarity.desc(), suggestions.c.value)
+            .limit(limit)
+            .all()
+        )
 
     @staticmethod
     def get_single_resource(resource_id):
         """
-        Get all available information about a resource.
+        Get all available information about a resource. The resource is looked up in the identity map of the database
+        session first, which lives as long as the request, so a resource is fetched from the database only once per
+        request, no matter how many times it's needed.
 
         :param resource_id: int, resource ID
         :return: ResourceModel object, containing all available data about the resource
         """
-        resource = ResourceModel.query.filter_by(resource_id=resource_id).first()
+        resource = db.session.get(ResourceModel, resource_id)
 
         # If the resource doesn't exist, tell the user to think again
         if resource is None:
@@ -59,36 +413,128 @@ class ResourceManager:
 
         return resource
 
+    @staticmethod
+    def get_resource_with_tags(resource_id):
+        """
+        Get all available information about a resource, together with its tags.
+
+        :param resource_id: int, resource ID
+        :return: ResourceModel object, with its tags already loaded
+        """
+        resource = (
+            ResourceModel.query.options(selectinload(ResourceModel.tags))
+            .populate_existing()
+            .filter_by(resource_id=resource_id)
+            .first()
+        )
+
+        # If the resource doesn't exist, tell the user to think again
+        if resource is None:
+            raise BadRequest(
+                "Don't try to trick us, this resource doesn't exist! \N{winking face}"
+            )
+
+        return resource
+
+    @staticmethod
+    def _owner_of(resource_id):
+        """
+        Get the owner of a resource as part of another statement, without a separate query.
+
+        :param resource_id: int, the ID of the resource
+        :return: scalar subquery, returning the ID of the owner
+        """
+        return (
+            db.session.query(ResourceModel.owner_id)
+            .filter(ResourceModel.resource_id == resource_id)
+            .scalar_subquery()
+        )
+
     @staticmethod
     def authenticate_owner(resource_id, user_id):
         """
-        Make sure that the resource belongs to the provided user_id.
+        Make sure that the resource exists and belongs to the provided user_id, with a single query.
 
         :param resource_id: int, the ID of the resource in question
         :param user_id: int, the ID of the user we're checking
-        :return: True: bool; if the resource doesn't belong to the user, the response is Forbidden
+        :return: resource: ResourceModel object; if the resource doesn't belong to the user, the response is Forbidden
         """
         resource = ResourceManager.get_single_resource(resource_id)
-        if not user_id == int(FullResourceSchemaResponse().dump(resource)["owner_id"]):
+        if resource.owner_id != user_id:
             raise Forbidden(
                 "You need to be the owner of this resource to change or delete it \N{unamused face}"
             )
-        return True
+        return resource
 
     @staticmethod
-    def read(resource_id):
+    def set_status(resource_id, status):
         """
-        Change the resource status to "Read".
+        Change the resource status, together with its last update time, in a single statement.
 
         :param resource_id: int, the ID of the resource that will get updated
+        :param status: ResourceStatus, the new status of the resource
         """
         ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"status": ResourceStatus.read}
+            {"status": status, "updated_datetime": func.now()},
+            synchronize_session=False,
         )
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"updated_datetime": func.now()}
+        UserManager.bump_library_version(ResourceManager._owner_of(resource_id))
+        db.session.commit()
+
+    @staticmethod
+    def set_status_bulk(resource_ids, status, user_id):
+        """
+        Change the status of many resources at once. All resources have to exist and belong to the user, otherwise
+        none of them is changed.
+
+        :param resource_ids: list of int, the IDs of the resources that will get updated
+        :param status: ResourceStatus, the new status of the resources
+        :param user_id: int, the ID of the user who owns the resources
+        :return: int, the number of updated resources
+        """
+        resource_ids = set(resource_ids)
+
+        # Update only the user's resources; if everything was right, this is the only statement we need
+        updated = db.session.execute(
+            ResourceModel.__table__.update()
+            .where(
+                ResourceModel.resource_id.in_(resource_ids),
+                ResourceModel.owner_id == user_id,
+            )
+            .values(status=status, updated_datetime=func.now())
+            .returning(ResourceModel.resource_id)
+        ).all()
+        if len(updated) == len(resource_ids):
+            UserManager.bump_library_version(user_id)
+            db.session.commit()
+            return len(updated)
+
+        # Something was wrong, so undo the changes and find out whether the other resources exist at all
+        db.session.rollback()
+        existing = {
+            resource_id
+            for (resource_id,) in db.session.query(ResourceModel.resource_id).filter(
+                ResourceModel.resource_id.in_(resource_ids)
+            )
+        }
+        if existing != resource_ids:
+            raise BadRequest(
+                "Don't try to trick us, these resources don't exist: "
+                f"{sorted(resource_ids - existing)} \N{winking face}"
+            )
+        raise Forbidden(
+            "You need to be the owner of these resources to change or delete them \N{unamused face}"
         )
 
+    @staticmethod
+    def read(resource_id):
+        """
+        Change the resource status to "Read".
+
+        :param resource_id: int, the ID of the resource that will get updated
+        """
+        ResourceManager.set_status(resource_id, ResourceStatus.read)
+
     @staticmethod
     def dropped(resource_id):
         """
@@ -96,12 +542,7 @@ class ResourceManager:
 
         :param resource_id: int, the ID of the resource that will get updated
         """
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"status": ResourceStatus.dropped}
-        )
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"updated_datetime": func.now()}
-        )
+        ResourceManager.set_status(resource_id, ResourceStatus.dropped)
 
     @staticmethod
     def to_read(resource_id):
@@ -110,12 +551,7 @@ class ResourceManager:
 
         :param resource_id: int, the ID of the resource that will get updated
         """
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"status": ResourceStatus.pending}
-        )
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"updated_datetime": func.now()}
-        )
+        ResourceManager.set_status(resource_id, ResourceStatus.pending)
 
     @staticmethod
     def find_assignments(resource_id):
@@ -136,10 +572,12 @@ class ResourceManager:
         :return: If everything is okay - nothing, otherwise - errors
         """
 
-        resource = ResourceManager.get_single_resource(resource_id)
-
-        # Delete the resource
-        db.session.delete(resource)
+        # Delete the tag assignments and the resource directly, without loading them first
+        UserManager.bump_library_version(ResourceManager._owner_of(resource_id))
+        db.session.execute(
+            resource_tag.delete().where(resource_tag.c.resource_id == resource_id)
+        )
+        ResourceModel.query.filter_by(resource_id=resource_id).delete()
         db.session.commit()
 
     @staticmethod
@@ -150,24 +588,85 @@ class ResourceManager:
         :param resource_id: int, the ID of the resource that will get updated
         :param data: dict, a dictionary of the characteristics that need to be changed with the new values
         """
-        for key, value in data.items():
-            resource = ResourceModel.query.filter_by(resource_id=resource_id).update(
-                {key: value}
+        values = {key: value for key, value in data.items() if key != "resource_id"}
+        ResourceModel.query.filter_by(resource_id=resource_id).update(
+            {**values, "updated_datetime": func.now()}, synchronize_session=False
+        )
+        UserManager.bump_library_version(ResourceManager._owner_of(resource_id))
+        db.session.commit()
+
+    @staticmethod
+    def update_resources(updates, user_id):
+        """
+        Update many resources in one transaction. All resources have to exist and belong to the user, otherwise none
+        of them is changed. The resources that change the same fields are updated together, with one statement.
+
+        :param updates: list of dict, each with the resource_id and the characteristics to be changed with the new values
+        :param user_id: int, the ID of the user who owns the resources
+        :return: int, the number of updated resources
+        """
+        resource_ids = [update["resource_id"] for update in updates]
+        if len(set(resource_ids)) != len(resource_ids):
+            raise BadRequest(
+                "Please, send every resource only once \N{slightly smiling face}"
             )
 
-        ResourceModel.query.filter_by(resource_id=resource_id).update(
-            {"updated_datetime": func.now()}
+        # Check that all resources exist and belong to the user with one query
+        owners = dict(
+            db.session.query(ResourceModel.resource_id, ResourceModel.owner_id).filter(
+                ResourceModel.resource_id.in_(resource_ids)
+            )
         )
+        missing = set(resource_ids) - owners.keys()
+        if missing:
+            raise BadRequest(
+                "Don't try to trick us, these resources don't exist: "
+                f"{sorted(missing)} \N{winking face}"
+            )
+        if any(owner_id != user_id for owner_id in owners.values()):
+            raise Forbidden(
+                "You need to be the owner of these resources to change or delete them \N{unamused face}"
+            )
+
+        # Group the updates by the fields they change, so every group is a single executemany UPDATE
+        groups = {}
+        for update in updates:
+            keys = tuple(sorted(key for key in update if key != "resource_id"))
+            groups.setdefault(keys, []).append(
+                {f"new_{key}": value for key, value in update.items()}
+            )
+
+        table = ResourceModel.__table__
+        for keys, params in groups.items():
+            statement = (
+                table.update()
+                .where(
+                    table.c.resource_id == bindparam("new_resource_id"),
+                    table.c.owner_id == user_id,
+                )
+                .values(
+                    {key: bindparam(f"new_{key}") for key in keys},
+                )
+                .values(updated_datetime=func.now())
+            )
+            db.session.execute(statement, params)
+        UserManager.bump_library_version(user_id)
         db.session.commit()
+        return len(updates)
 
     @staticmethod
-    def upload_file(resource_id, file):
+    def upload_file(resource_id, file, sha256=None):
         """
-        Upload a file to the AWS S3 Bucket and put the URL in the resource information.
+        Upload a file to the storage (the AWS S3 Bucket or the local disk). The file is stored while it's being
+        received, without keeping it anywhere first, and its SHA-256 hash is computed on the way. Every content is
+        stored only once - if the same content is stored already, the new copy is deleted and the link to the stored
+        one is returned.
 
         :param resource_id: int, ID of the resource to which the file will be uploaded
-        :param file: file
-        :return: url: string, the link to the file location in the bucket
+        :param file: FileStorage object, with the file name and a stream of the file content
+        :param sha256: string, optional; the hex SHA-256 hash of the file, as sent by the client
+        :return: url: string, the link to the file location in the storage; BadRequest, if the file doesn't match the
+                 hash sent by the client
         """
 
         # Get the file extension
@@ -176,26 +675,145 @@ class ResourceManager:
         # Change the file name
         name = f"{str(uuid.uuid4())}.{extension}"
 
-        # Save the file to the temporary folder
-        file.save(os.path.join(TEMP_FILE_FOLDER, f"{name}"))
-        path = os.path.join(TEMP_FILE_FOLDER, f"{name}")
+        # Upload the file to the storage, hashing it on the way
+        reader = HashingReader(file.stream)
+        storage = get_storage()
+        storage.put(reader, name)
+        digest = reader.hexdigest()
+        if sha256 is not None and digest != sha256:
+            ResourceManager.delete_file(name)
+            db.session.commit()
+            raise BadRequest(
+                "Your file doesn't match the SHA-256 hash you sent \N{pensive face} Please, check it and try again."
+            )
 
-        # Upload the file to the AWS S3 bucket
-        url = s3.upload_file(path, name)
+        # Keep only one copy of every content
+        key = StoredFileManager.add_reference(digest, name)
+        if key != name:
+            FileDeletionManager.schedule(name)
+        return storage.url(key)
 
-        # Delete the file from the local temp folder
-        delete_local_file(name)
+    @staticmethod
+    def reuse_file(sha256, owner_id):
+        """
+        Find a file with the given content among the user's files, so it doesn't need to be uploaded again. The file
+        is counted as used by one more resource. The files of the other users aren't reused, even with the same
+        content - the client would get them without proving it has them. Those files are uploaded and the copies are
+        merged afterwards, by upload_file.
+
+        :param sha256: string, the hex SHA-256 hash of the content, as sent by the client
+        :param owner_id: int, the ID of the user who uploads the file
+        :return: url: string, the link to the stored file; None, if the user has no such file; BadRequest, if the hash
+                 isn't a valid hex SHA-256 hash
+        """
+        if not re.fullmatch(r"[0-9a-f]{64}", sha256):
+            raise BadRequest(
+                "The SHA-256 hash of your file should be 64 lowercase hex characters \N{slightly smiling face}"
+            )
+        key = StoredFileManager.reference(sha256, owner_id)
+        return None if key is None else get_storage().url(key)
+
+    @staticmethod
+    def link_file(resource, url):
+        """
+        Put the URL of a file in the resource information. A previous file of the resource is deleted.
+
+        :param resource: ResourceModel object
+        :param url: string, the link to the new file of the resource
+        """
+        current_url = resource.file_url
+        if current_url:
+            ResourceManager.delete_file(current_url.split("/")[-1])
+        ResourceManager.update_resource(resource.resource_id, {"file_url": url})
+
+    @staticmethod
+    def create_upload_url(resource_id, filename, content_type):
+        """
+        Create a link for uploading a file of the resource straight to the storage, so the file doesn't go
+        through the application. The key of the file starts with the resource ID, so the upload can only be completed
+        for the same resource.
+
+        :param resource_id: int, ID of the resource to which the file will be uploaded
+        :param filename: string, the name of the file, used for its extension
+        :param content_type: string, the Content-Type of the file
+        :return: dict, with the presigned "upload_url", the HTTP "method" and "headers" to upload with, the file "key"
+                 and the number of seconds the link "expires_in"
+        """
+        extension = filename.split(".")[-1]
+        key = f"{resource_id}-{uuid.uuid4()}.{extension}"
+        expires_in = get_settings().aws_s3_upload_url_ttl_in_seconds
+        return {
+            "upload_url": get_storage().presign(key, "PUT", expires_in, content_type),
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "key": key,
+            "expires_in": expires_in,
+        }
+
+    @staticmethod
+    def complete_upload(resource, key):
+        """
+        Link a file uploaded with a presigned link to its resource, once it's in the storage. A previous file of
+        the resource is deleted.
+
+        :param resource: ResourceModel object, the resource the upload link was made for
+        :param key: string, the key of the uploaded file, as returned with the upload link
+        :return: url: string, the link to the file location in the storage; BadRequest, if the key wasn't made for
+                 this resource or the file isn't in the storage
+        """
+        if not re.fullmatch(rf"{resource.resource_id}-[0-9a-f-]{{36}}\.[^/]+", key):
+            raise BadRequest(
+                "Don't try to trick us, this upload link wasn't made for this resource \N{winking face}"
+            )
+        storage = get_storage()
+        if not storage.exists(key):
+            raise BadRequest(
+                "We can't find your file \N{pensive face} Please, upload it with the link first."
+            )
+
+        url = storage.url(key)
+        if resource.file_url != url:
+            ResourceManager.link_file(resource, url)
         return url
 
+    @staticmethod
+    def file_key(resource):
+        """
+        Get the key of the file of a resource in the storage.
+
+        :param resource: ResourceModel object
+        :return: string, the key of the file; BadRequest, if the resource has no file
+        """
+        if not resource.file_url:
+            raise BadRequest(
+                "Don't try to fool us! There is no file associated with this resource \N{slightly smiling face}"
+            )
+        return resource.file_url.split("/")[-1]
+
+    @staticmethod
+    def create_download_url(resource):
+        """
+        Create a link for downloading the file of a resource straight from the storage.
+
+        :param resource: ResourceModel object
+        :return: dict, with the presigned "download_url" and the number of seconds it "expires_in"; BadRequest, if the
+                 resource has no file
+        """
+        expires_in = get_settings().aws_s3_download_url_ttl_in_seconds
+        key = ResourceManager.file_key(resource)
+        return {
+            "download_url": get_storage().presign(key, "GET", expires_in),
+            "expires_in": expires_in,
+        }
+
     @staticmethod
     def delete_file(file_name):
         """
-        Delete a previously uploaded file.
+        Delete a previously uploaded file, unless other resources still link to the same content. The file is only
+        added to the outbox in the current transaction - it's deleted from the storage by the background worker, once
+        the change of the resource is committed.
 
         :param file_name: string, the name of the file to be deleted
-        :return: Nothing, if everything is okay; otherwise return errors
         """
-        try:
-            s3.delete_file(file_name)
-        except Exception as ex:
-            return ex
+        if StoredFileManager.release(file_name):
+            FileDeletionManager.schedule(file_name)
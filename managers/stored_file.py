@@ -0,0 +1,86 @@
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from db import db
+from models.resource import ResourceModel
+from models.stored_file import StoredFileModel
+
+
+class StoredFileManager:
+    @staticmethod
+    def add_reference(sha256, file_key):
+        """
+        Count one more resource linking to a content. If the content isn't stored yet, the file with the given key
+        becomes its stored copy; otherwise the key of the copy that is already stored is returned, and the new file
+        isn't needed. Safe to call from concurrent requests.
+
+        :param sha256: string, the hex SHA-256 hash of the content
+        :param file_key: string, the key of the just uploaded file with this content
+        :return: string, the key of the stored copy of the content
+        """
+        statement = (
+            insert(StoredFileModel)
+            .values(sha256=sha256, file_key=file_key, reference_count=1)
+            .on_conflict_do_update(
+                index_elements=[StoredFileModel.sha256],
+                set_={"reference_count": StoredFileModel.reference_count + 1},
+            )
+            .returning(StoredFileModel.file_key)
+        )
+        return db.session.execute(statement).scalar_one()
+
+    @staticmethod
+    def reference(sha256, owner_id):
+        """
+        Count one more resource linking to a content, if the content is stored already and the user has it in one of
+        their resources. The hash alone doesn't prove the user has the file, so the contents of the other users are
+        never given out this way - they have to be uploaded.
+
+        :param sha256: string, the hex SHA-256 hash of the content
+        :param owner_id: int, the ID of the user who wants to link the content to one more of their resources
+        :return: string, the key of the stored copy of the content; None, if the user has no such content
+        """
+        table = StoredFileModel.__table__
+        # The resources keep the URL of their file, which always ends with the key
+        owned = (
+            select(ResourceModel.resource_id)
+            .where(
+                ResourceModel.owner_id == owner_id,
+                func.right(ResourceModel.file_url, func.length(table.c.file_key) + 1)
+                == literal("/").concat(table.c.file_key),
+            )
+            .exists()
+        )
+        return db.session.execute(
+            table.update()
+            .where(table.c.sha256 == sha256, owned)
+            .values(reference_count=table.c.reference_count + 1)
+            .returning(table.c.file_key)
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def release(file_key):
+        """
+        Count one resource less linking to a file. When no resource links to it anymore, the file is forgotten.
+
+        :param file_key: string, the key of the file in the S3 bucket
+        :return: bool, True if the file isn't needed anymore and can be deleted from the S3 bucket (also for the files
+                 that aren't counted, e.g. the ones uploaded before the counting or with a presigned link)
+        """
+        table = StoredFileModel.__table__
+        count = db.session.execute(
+            table.update()
+            .where(table.c.file_key == file_key)
+            .values(reference_count=table.c.reference_count - 1)
+            .returning(table.c.reference_count)
+        ).scalar_one_or_none()
+        if count is None:
+            return True
+        if count > 0:
+            return False
+        db.session.execute(
+            table.delete().where(
+                table.c.file_key == file_key, table.c.reference_count <= 0
+            )
+        )
+        return True
@@ -1,9 +1,11 @@
 from werkzeug.exceptions import BadRequest
 
 from db import db
+from managers.user import UserManager
 from models import TagModel
 from models.resource import ResourceModel, resource_tag
 from schemas.response.tag import TagSchemaResponse
+from schemas.serializers import get_serializer
 
 
 class TagManager:
@@ -54,6 +56,7 @@ class TagManager:
 
         # If the tag doesn't exist, create it and return it
         db.session.add(data)
+        UserManager.bump_library_version(owner.user_id)
         db.session.commit()
         return TagModel.query.filter_by(tag=tag, owner_id=owner.user_id).first()
 
@@ -79,6 +82,11 @@ class TagManager:
         # Create the assignment and write it to the database
         statement = resource_tag.insert().values(tag_id=tag_id, resource_id=resource_id)
         db.session.execute(statement)
+        UserManager.bump_library_version(
+            db.session.query(TagModel.owner_id)
+            .filter(TagModel.tag_id == tag_id)
+            .scalar_subquery()
+        )
         db.session.commit()
         return ResourceModel.query.filter_by(resource_id=resource_id).first()
 
@@ -101,7 +109,7 @@ class TagManager:
         :param user_id: int, the requester (user) ID
         """
         tag = TagManager.find_tag(tag, user_id)
-        tag_id = TagSchemaResponse().dump(tag)["tag_id"]
+        tag_id = get_serializer(TagSchemaResponse).dump(tag)["tag_id"]
 
         # Delete assignments to the tag
         assignments = TagManager.find_assignments(tag_id=tag_id)
@@ -109,4 +117,5 @@ class TagManager:
 
         # Delete the tag
         db.session.delete(tag)
+        UserManager.bump_library_version(user_id)
         db.session.commit()
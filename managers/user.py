@@ -1,11 +1,12 @@
 from sqlalchemy import func
 from werkzeug.exceptions import BadRequest
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from db import db
-from managers.auth import AuthManager
+from managers.auth import AuthManager, invalidate_cached_user
+from managers.refresh_token import RefreshTokenManager
 from models import UserRole
 from models.user import UserModel
+from utils.password_hasher import password_hasher
 
 
 class UserManager:
@@ -15,13 +16,11 @@ class UserManager:
         Registers the user to the database.
 
         :param user_data: dict, data provided by the user (mandatory: "first_name", "last_name", "email" and "password")
-        :return: token: string, if everything is okay; otherwise returns BadRequest
+        :return: (token, refresh_token): strings, if everything is okay; otherwise returns BadRequest
         """
         if UserModel.query.filter(UserModel.email == user_data["email"]).count() == 0:
             # Hash the password, so we don't save it in raw format in the database
-            user_data["password"] = generate_password_hash(
-                user_data["password"], method="sha256"
-            )
+            user_data["password"] = password_hasher().generate(user_data["password"])
 
             # Set user role = user (this will be different for the admin registration, when we get there)
             user_data["user_role"] = UserRole.user
@@ -29,8 +28,10 @@ class UserManager:
             # Unpack the data and
             user = UserModel(**user_data)
             db.session.add(user)
+            db.session.flush()
+            refresh_token, _ = RefreshTokenManager.issue(user.user_id)
             db.session.commit()
-            return AuthManager.encode_token(user)
+            return AuthManager.encode_token(user), refresh_token
         raise BadRequest(
             "There is already an account with this e-mail. Please, log in or register with another e-mail \N{slightly smiling face}"
         )
@@ -41,7 +42,7 @@ class UserManager:
         Confirms that the user was previously registered to the library. Checks that the password provided is correct.
 
         :param login_data:dict, e-mail and password provided by the user
-        :return: If everything is okay, doesn't return anything, otherwise it returns BadRequest
+        :return: If everything is okay, (token, refresh_token), otherwise it returns BadRequest
         """
         user = UserModel.query.filter_by(email=login_data["email"]).first()
         if not user:
@@ -49,8 +50,10 @@ class UserManager:
                 "This e-mail hasn't been registered in the library. Please, register or check your input data \N{pensive face}"
             )
 
-        if check_password_hash(user.password, login_data["password"]):
-            return AuthManager.encode_token(user)
+        if password_hasher().check(user.password, login_data["password"]):
+            refresh_token, _ = RefreshTokenManager.issue(user.user_id)
+            db.session.commit()
+            return AuthManager.encode_token(user), refresh_token
         raise BadRequest(
             "The provided password is incorrect. Please, try again \N{pensive face}"
         )
@@ -74,10 +77,34 @@ class UserManager:
         :param user_id: int, the ID of the user
         :param data: dict, a dictionary of characteristics to be changed and their new values
         """
-        for key, value in data.items():
-            resource = UserModel.query.filter_by(user_id=user_id).update({key: value})
-
         UserModel.query.filter_by(user_id=user_id).update(
-            {"updated_datetime": func.now()}
+            {**data, "updated_datetime": func.now()}, synchronize_session=False
         )
         db.session.commit()
+        invalidate_cached_user(user_id)
+
+    @staticmethod
+    def get_library_version(user_id):
+        """
+        Get the current version of the user's library.
+
+        :param user_id: int, the ID of the user
+        :return: int, the library version; it changes every time the user's resources, tags or tag assignments change
+        """
+        return (
+            db.session.query(UserModel.library_version)
+            .filter(UserModel.user_id == user_id)
+            .scalar()
+        )
+
+    @staticmethod
+    def bump_library_version(user_id):
+        """
+        Mark that the user's library has changed. The change is written with the rest of the current transaction.
+
+        :param user_id: int or a scalar subquery returning the ID of the user
+        """
+        UserModel.query.filter(UserModel.user_id == user_id).update(
+            {"library_version": UserModel.library_version + 1},
+            synchronize_session=False,
+        )
@@ -69,6 +69,13 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info("No changes in schema detected.")
 
+    # the trigram indexes need the pg_trgm extension, so they are created only by
+    # their migration and aren't declared on the models
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == "index" and reflected and name.endswith("_trgm"):
+            return False
+        return True
+
     connectable = current_app.extensions["migrate"].db.get_engine()
 
     with connectable.connect() as connection:
@@ -76,6 +83,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions["migrate"].configure_args
         )
 
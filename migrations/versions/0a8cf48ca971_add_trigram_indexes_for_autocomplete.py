@@ -0,0 +1,42 @@
+"""add trigram indexes on the resource title and author for the autocomplete
+
+The indexes need the pg_trgm extension, so they aren't declared on the model (the tests create the tables without it).
+migrations/env.py leaves them out of the autogenerate comparison.
+
+Revision ID: 0a8cf48ca971
+Revises: 5919b04b9960
+Create Date: 2026-10-18 14:07:52.612903
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0a8cf48ca971"
+down_revision = "5919b04b9960"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_resource_title_trgm",
+        "resource",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_resource_author_trgm",
+        "resource",
+        ["author"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"author": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_resource_author_trgm", table_name="resource")
+    op.drop_index("ix_resource_title_trgm", table_name="resource")
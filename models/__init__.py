@@ -1,4 +1,7 @@
 from models.enums import *
+from models.file_deletion import *
+from models.refresh_token import *
 from models.resource import *
+from models.stored_file import *
 from models.tag import *
 from models.user import *
@@ -18,3 +18,12 @@ class UserRole(Enum):
 
     user = "user"
     admin = "admin"
+
+
+class FileDeletionStatus(Enum):
+    """
+    A simple Enum class for the possible statuses of a file waiting to be deleted from the S3 bucket.
+    """
+
+    pending = "pending"
+    dead = "dead"
@@ -0,0 +1,32 @@
+from sqlalchemy import func
+
+from db import db
+from models.enums import FileDeletionStatus
+
+
+class FileDeletionModel(db.Model):
+    """
+    A model for the outbox of the files that need to be deleted from the S3 bucket. A row is added in the same
+    transaction that removes the file from its resource, and the background worker deletes the files and their rows.
+    The files that couldn't be deleted after a number of attempts are left with status "dead" to be looked at.
+    """
+
+    __tablename__ = "file_deletion"
+
+    file_deletion_id = db.Column(db.Integer, primary_key=True)
+    file_key = db.Column(db.String(300), nullable=False)
+    status = db.Column(
+        db.Enum(FileDeletionStatus),
+        default=FileDeletionStatus.pending,
+        nullable=False,
+    )
+    attempts = db.Column(db.Integer, nullable=False, server_default="0")
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_datetime = db.Column(
+        db.DateTime, nullable=False, server_default=func.now()
+    )
+    created_datetime = db.Column(db.DateTime, server_default=func.now())
+
+    __table_args__ = (
+        db.Index("ix_file_deletion_status_next_attempt", status, next_attempt_datetime),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import func
+
+from db import db
+
+
+class RefreshTokenModel(db.Model):
+    """
+    A model for the creation of the refresh token table. Only the SHA-256 hash of every token is saved.
+    """
+
+    __tablename__ = "refresh_token"
+
+    refresh_token_id = db.Column(db.Integer, primary_key=True)
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.user_id"), nullable=False, index=True
+    )
+    user = db.relationship("UserModel", lazy="joined")
+    expires_datetime = db.Column(db.DateTime, nullable=False)
+    revoked_datetime = db.Column(db.DateTime, nullable=True)
+    replaced_by_id = db.Column(
+        db.Integer, db.ForeignKey("refresh_token.refresh_token_id"), nullable=True
+    )
+    created_datetime = db.Column(db.DateTime, server_default=func.now())
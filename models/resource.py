@@ -1,4 +1,5 @@
 from sqlalchemy import func, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from db import db
 from models.enums import ResourceStatus
@@ -38,3 +39,26 @@ class ResourceModel(db.Model):
     updated_datetime = db.Column(db.DateTime, server_default=func.now())
     tags = db.relationship("TagModel", secondary=resource_tag)
     file_url = db.Column(db.String(300), nullable=True)
+    # The weighted words of the title, author and notes, kept up to date by the database for the full-text search
+    search_vector = db.deferred(
+        db.Column(
+            TSVECTOR,
+            db.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(notes, '')), 'C')",
+                persisted=True,
+            ),
+        )
+    )
+    # Indexes for the filtered and sorted pages of the user's library
+    __table_args__ = (
+        db.Index("ix_resource_owner_created", owner_id, created_datetime, resource_id),
+        db.Index("ix_resource_owner_updated", owner_id, updated_datetime, resource_id),
+        db.Index("ix_resource_owner_title", owner_id, title, resource_id),
+        db.Index("ix_resource_owner_author", owner_id, author, resource_id),
+        db.Index(
+            "ix_resource_owner_status", owner_id, status, created_datetime, resource_id
+        ),
+        db.Index("ix_resource_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import func
+
+from db import db
+
+
+class StoredFileModel(db.Model):
+    """
+    A model for the files uploaded through the application, by the SHA-256 hash of their content. Every content is
+    stored in the S3 bucket only once, and the reference count tells how many resources link to it.
+    """
+
+    __tablename__ = "stored_file"
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    file_key = db.Column(db.String(300), nullable=False, unique=True)
+    reference_count = db.Column(db.Integer, nullable=False, server_default="1")
+    created_datetime = db.Column(db.DateTime, server_default=func.now())
@@ -22,3 +22,6 @@ class UserModel(db.Model):
     created_datetime = db.Column(db.DateTime, server_default=func.now())
     updated_datetime = db.Column(db.DateTime, server_default=func.now())
     user_role = db.Column(db.Enum(UserRole), nullable=False)
+    # Bumped by every change of the user's resources, tags and tag assignments, so the clients can tell when their
+    # copy of the library is out of date
+    library_version = db.Column(db.Integer, nullable=False, server_default="0")
@@ -1,4 +1,3 @@
-from decouple import config
 from marshmallow import Schema, fields, validate
 
 from utils.general_validators import validate_password
@@ -10,16 +9,7 @@ class AuthBase(Schema):
     """
 
     email = fields.Email(required=True)
-    password = fields.Str(
-        required=True,
-        validate=validate.And(
-            validate.Length(
-                min=int(config("PASSWORD_MIN_LENGTH")),
-                max=int(config("PASSWORD_MAX_LENGTH")),
-            ),
-            validate_password,
-        ),
-    )
+    password = fields.Str(required=True, validate=validate_password)
 
 
 class BaseResourceSchema(Schema):
@@ -1,4 +1,4 @@
-from marshmallow import fields, validate
+from marshmallow import fields, validate, Schema
 
 from schemas.base import AuthBase
 from utils.general_validators import validate_phone_number
@@ -14,3 +14,7 @@ class RegisterSchemaRequest(AuthBase):
 
 class LoginSchemaRequest(AuthBase):
     pass
+
+
+class RefreshTokenSchemaRequest(Schema):
+    refresh_token = fields.Str(required=True, validate=validate.Length(min=1))
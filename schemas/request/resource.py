@@ -1,5 +1,7 @@
 from marshmallow import fields, validate, Schema
+from marshmallow_enum import EnumField
 
+from models.enums import ResourceStatus
 from schemas.base import BaseResourceSchema
 
 
@@ -9,11 +11,76 @@ class ResourceSchemaRequest(BaseResourceSchema):
     rating = fields.Float(required=False, validate=validate.Range(min=0, max=5))
 
 
+class ImportResourceSchemaRequest(ResourceSchemaRequest):
+    tags = fields.List(
+        fields.Str(validate=validate.Length(min=1, max=50)), required=False
+    )
+
+
 class UpdateResourceSchemaRequest(ResourceSchemaRequest):
     resource_id = fields.Int(required=True)
     title = fields.Str(required=False, validate=validate.Length(min=3, max=150))
     author = fields.Str(required=False, validate=validate.Length(min=3, max=150))
 
 
+class BulkUpdateResourceSchemaRequest(Schema):
+    resources = fields.List(
+        fields.Nested(UpdateResourceSchemaRequest),
+        required=True,
+        validate=validate.Length(min=1, max=1000),
+    )
+
+
 class UploadFileResourceSchemaRequest(Schema):
     file = fields.Raw(required=True, type="file")
+
+
+class UploadUrlSchemaRequest(Schema):
+    filename = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    content_type = fields.Str(
+        load_default="application/octet-stream",
+        validate=validate.Length(min=3, max=100),
+    )
+    sha256 = fields.Str(required=False, validate=validate.Regexp(r"^[0-9a-f]{64}$"))
+
+
+class CompleteUploadSchemaRequest(Schema):
+    key = fields.Str(required=True, validate=validate.Length(min=1, max=300))
+
+
+class PageSchemaRequest(Schema):
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=500))
+    cursor = fields.Str(required=False)
+
+
+class ListResourceSchemaRequest(PageSchemaRequest):
+    sort = fields.Str(
+        load_default="created_datetime",
+        validate=validate.OneOf(
+            ["created_datetime", "updated_datetime", "title", "author"]
+        ),
+    )
+    order = fields.Str(load_default="asc", validate=validate.OneOf(["asc", "desc"]))
+    status = EnumField(ResourceStatus, by_value=True, required=False)
+    min_rating = fields.Float(required=False, validate=validate.Range(min=0, max=5))
+    max_rating = fields.Float(required=False, validate=validate.Range(min=0, max=5))
+    author = fields.Str(required=False, validate=validate.Length(min=1, max=150))
+    created_from = fields.DateTime(required=False)
+    created_to = fields.DateTime(required=False)
+
+
+class BulkStatusSchemaRequest(Schema):
+    resource_ids = fields.List(
+        fields.Int(), required=True, validate=validate.Length(min=1, max=1000)
+    )
+    status = EnumField(ResourceStatus, by_value=True, required=True)
+
+
+class SearchResourceSchemaRequest(PageSchemaRequest):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=200))
+
+
+class AutocompleteSchemaRequest(Schema):
+    q = fields.Str(required=True, validate=validate.Length(min=2, max=150))
+    field = fields.Str(load_default=None, validate=validate.OneOf(["title", "author"]))
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=50))
@@ -1,4 +1,4 @@
-from marshmallow import fields, validate
+from marshmallow import fields, validate, Schema
 from marshmallow_enum import EnumField
 
 from models.enums import ResourceStatus
@@ -23,3 +23,14 @@ class FullResourceSchemaResponse(ResourceSchemaResponse):
         TagShortSchemaResponse, many=True, validate=validate_tag_length
     )
     file_url = fields.Str(required=True, validate=validate.Length(min=3, max=300))
+
+
+class SearchResourceSchemaResponse(ResourceSchemaResponse):
+    rank = fields.Float(required=True)
+    snippet = fields.Str(required=True)
+
+
+class AutocompleteSchemaResponse(Schema):
+    field = fields.Str(required=True)
+    value = fields.Str(required=True)
+    similarity = fields.Float(required=True)
@@ -1,53 +1,256 @@
+import logging
+import time
+from threading import Lock
+
 import boto3
-from botocore.exceptions import ClientError
-from decouple import config
-from werkzeug.exceptions import InternalServerError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from werkzeug.exceptions import InternalServerError, NotFound
+
+from services.storage import FILE_NOT_FOUND_MESSAGE, FileInfo, Storage
+from settings import Settings
+
+MIB = 1024 * 1024
+
+logger = logging.getLogger(__name__)
 
 
-class S3Service:
+class TransferProgress:
+    """
+    Counts the bytes of one transfer, as boto3 reports them from its worker threads.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :param callback: function, optional; called with the number of bytes transferred so far, after every update
+        """
+        self.callback = callback
+        self.transferred = 0
+        self._lock = Lock()
+
+    def __call__(self, bytes_amount):
+        with self._lock:
+            self.transferred += bytes_amount
+            transferred = self.transferred
+        if self.callback is not None:
+            self.callback(transferred)
+
+
+class S3Service(Storage):
     """
     A class that will take care of the AWS S3 Bucket integration
     """
 
-    def __init__(self):
-        key = config("AWS_ACCESS_KEY_ID")
-        secret = config("AWS_SECRET_KEY")
-        self.region = config("AWS_S3_BUCKET_REGION")
-        self.bucket = config("AWS_S3_BUCKET_NAME")
+    def __init__(self, settings=None):
+        """
+        :param settings: Settings object, optional; if it isn't provided, the settings are read from the environment
+        """
+        settings = settings or Settings.from_env()
+        self.region = settings.aws_s3_bucket_region
+        self.bucket = settings.aws_s3_bucket_name
+        self.endpoint_url = settings.aws_s3_endpoint_url or None
         self.s3 = boto3.client(
             "s3",
             region_name=self.region,
-            aws_access_key_id=key,
-            aws_secret_access_key=secret,
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=settings.aws_access_key_id,
+            aws_secret_access_key=settings.aws_secret_key,
+            # Every thread of a multipart transfer needs its own connection, so the pool has to be at least as large.
+            # The presigned links are signed with SigV4 in every region - botocore would use SigV2 in the old ones.
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=settings.aws_s3_max_pool_connections,
+            ),
+        )
+        # Files larger than the threshold are sent in parts of the chunk size, up to max_concurrency parts at a time.
+        # At most 10 parts of a stream that can't be seeked are kept in the memory.
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.aws_s3_multipart_threshold_in_mb * MIB,
+            multipart_chunksize=settings.aws_s3_multipart_chunk_size_in_mb * MIB,
+            max_concurrency=settings.aws_s3_max_concurrency,
         )
+        self._lock = Lock()
+        self._transfers = 0
+        self._failed = 0
+        self._bytes = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
 
-    def upload_file(self, path, key):
+    def url(self, key):
         """
-        Upload a file to the S3 bucket.
+        Get the link to a file in the S3 bucket.
 
-        :param path: string, the path to the file's current location
         :param key: string, access key to the S3 bucket
+        :return: string, the URL of the file
+        """
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def metrics(self):
+        """
+        Get the statistics of the uploads made by the service so far.
+
+        :return: dict, with the number of finished and failed uploads, the uploaded bytes, the average throughput in MiB
+                 per second and the longest upload in seconds
+        """
+        with self._lock:
+            return {
+                "transfers": self._transfers,
+                "failed": self._failed,
+                "bytes": self._bytes,
+                "average_mib_per_second": self._bytes / MIB / self._total_seconds
+                if self._total_seconds
+                else 0.0,
+                "max_seconds": self._max_seconds,
+            }
+
+    def put(self, fileobj, key, progress=None):
+        """
+        Upload a file to the S3 bucket while it's being read. Large files are sent with a multipart upload, part by
+        part, so only a few parts are kept in the memory at a time and the file doesn't need to be saved anywhere first.
+
+        :param fileobj: file-like object with a read(size) method, returning bytes; it doesn't need to be seekable
+        :param key: string, access key to the S3 bucket
+        :param progress: function, optional; called with the number of bytes uploaded so far, while the upload goes on
         :return: url: string, a link to the location of the file in the S3 bucket
         """
+        transfer = TransferProgress(progress)
+        start = time.perf_counter()
+        failed = True
         try:
-            self.s3.upload_file(path, self.bucket, key)
-            return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
-        except ClientError as ex:
+            self.s3.upload_fileobj(
+                fileobj,
+                self.bucket,
+                key,
+                Config=self.transfer_config,
+                Callback=transfer,
+            )
+            failed = False
+            return self.url(key)
+        except (ClientError, S3UploadFailedError) as ex:
             raise InternalServerError(
                 "Sorry, the S3 bucket service is not available at the moment, please try a bit later \N{unamused face}"
             )
+        finally:
+            self._record(key, transfer.transferred, time.perf_counter() - start, failed)
 
-    def delete_file(self, key):
+    def _record(self, key, size, elapsed, failed):
+        """Add a finished upload to the metrics and log its throughput."""
+        with self._lock:
+            if failed:
+                self._failed += 1
+            else:
+                self._transfers += 1
+                self._bytes += size
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+        logger.info(
+            "%s %s: %d bytes in %.2f s (%.1f MiB/s)",
+            "failed to upload" if failed else "uploaded",
+            key,
+            size,
+            elapsed,
+            size / MIB / elapsed if elapsed else 0.0,
+        )
+
+    def get(self, key, start=0, end=None):
         """
-        Delete a file from the S3 bucket.
+        Open a file in the S3 bucket for reading. Only the asked bytes are requested, and they are streamed from S3
+        while they're being read.
 
         :param key: string, access key to the S3 bucket
-        :return: string message with the request status
+        :param start: int, the position of the first byte to be read
+        :param end: int, optional; the position after the last byte to be read, the end of the file by default
+        :return: file-like object with a read(size) method; NotFound, if there is no such file
         """
+        params = {"Bucket": self.bucket, "Key": key}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
         try:
-            self.s3.delete_object(Bucket=self.bucket, Key=key)
-            return "The file is now gone forever \N{unamused face}"
+            return self.s3.get_object(**params)["Body"]
         except ClientError as ex:
+            self._raise_for_missing(ex)
+
+    def stat(self, key):
+        """
+        Get the size, the ETag and the modification time of a file in the S3 bucket.
+
+        :param key: string, access key to the S3 bucket
+        :return: FileInfo object; NotFound, if there is no such file
+        """
+        try:
+            response = self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as ex:
+            self._raise_for_missing(ex)
+        return FileInfo(
+            size=response["ContentLength"],
+            etag=response["ETag"].strip('"'),
+            last_modified=response["LastModified"],
+        )
+
+    @staticmethod
+    def _raise_for_missing(ex):
+        """Turn the error of a request for a file into NotFound, if the file is missing, or InternalServerError."""
+        if ex.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            raise NotFound(FILE_NOT_FOUND_MESSAGE)
+        raise InternalServerError(
+            "Sorry, the S3 bucket service is not available at the moment, please try a bit later \N{unamused face}"
+        )
+
+    def presign(self, key, method, expires_in, content_type=None):
+        """
+        Create a link that lets the client upload (PUT) or download (GET) a file straight to or from the S3 bucket.
+
+        :param key: string, access key to the S3 bucket
+        :param method: string, "PUT" or "GET"
+        :param expires_in: int, for how many seconds the link can be used
+        :param content_type: string, optional; the Content-Type header an upload has to be sent with
+        :return: string, the presigned URL
+        """
+        params = {"Bucket": self.bucket, "Key": key}
+        if method == "PUT":
+            params["ContentType"] = content_type
+        return self.s3.generate_presigned_url(
+            "put_object" if method == "PUT" else "get_object",
+            Params=params,
+            ExpiresIn=expires_in,
+        )
+
+    def exists(self, key):
+        """
+        Check if a file is in the S3 bucket.
+
+        :param key: string, access key to the S3 bucket
+        :return: bool, True if the file exists
+        """
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
             raise InternalServerError(
                 "Sorry, the S3 bucket service is not available at the moment, please try a bit later \N{unamused face}"
             )
+
+    def delete(self, keys):
+        """
+        Delete many files from the S3 bucket with one request.
+
+        :param keys: list of strings, up to 1000 access keys to the S3 bucket
+        :return: dict, the keys that couldn't be deleted, with the error messages; all keys, if the whole request fails
+        """
+        try:
+            response = self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except (BotoCoreError, ClientError) as ex:
+            return {key: str(ex) for key in keys}
+        return {
+            error["Key"]: f"{error.get('Code')}: {error.get('Message')}"
+            for error in response.get("Errors", [])
+        }
@@ -0,0 +1,193 @@
+import hashlib
+import io
+import os
+import re
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from flask import url_for
+from itsdangerous import BadSignature, URLSafeSerializer
+from werkzeug.exceptions import Forbidden, NotFound
+
+from services.storage import FILE_NOT_FOUND_MESSAGE, FileInfo, Storage
+
+COPY_SIZE = 1024 * 1024
+
+KEY_PATTERN = re.compile(r"[^./\\][^/\\]*")
+
+
+class LocalStorage(Storage):
+    """
+    Keeps the files in a folder on the local disk, for development, tests and benchmarks without any network. The
+    files are spread over two levels of sub-folders by the hash of their key (e.g. "3f/a0/<key>"), so no folder gets
+    too large. Every file is written to a temporary file first and renamed when it's complete, so a file is either
+    missing or whole - never half-written.
+
+    The presigned links point to the application itself (StorageLinkResource), signed with the JWT secret.
+    """
+
+    def __init__(self, settings):
+        """
+        :param settings: Settings object
+        """
+        self.root = os.path.abspath(settings.local_storage_path)
+        self.serializer = URLSafeSerializer(settings.jwt_secret, salt="local-storage")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        """
+        Get the location of a file on the disk.
+
+        :param key: string, the key of the file
+        :return: string, the absolute path of the file; NotFound, if the key isn't a valid file name
+        """
+        if not KEY_PATTERN.fullmatch(key):
+            raise NotFound(FILE_NOT_FOUND_MESSAGE)
+        shard = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.root, shard[:2], shard[2:4], key)
+
+    def url(self, key):
+        """
+        Get the link to a file. It's made of the key only, so it doesn't show where the files are kept on the server
+        and stays valid when the folder is moved. The clients download the files through the application.
+        """
+        if not KEY_PATTERN.fullmatch(key):
+            raise NotFound(FILE_NOT_FOUND_MESSAGE)
+        return f"local://{key}"
+
+    def put(self, fileobj, key, progress=None):
+        path = self.path(key)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+
+        descriptor, temp_path = tempfile.mkstemp(dir=folder, prefix=".upload-")
+        try:
+            with open(descriptor, "wb") as temp:
+                _copy(fileobj, temp, progress)
+                temp.flush()
+                os.fsync(temp.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        _fsync_folder(folder)
+        return self.url(key)
+
+    def get(self, key, start=0, end=None):
+        """
+        Open a file for reading. It's a regular file, so the WSGI server can send it with sendfile(), without copying it
+        through Python.
+        """
+        try:
+            file = open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise NotFound(FILE_NOT_FOUND_MESSAGE)
+        file.seek(start)
+        return file
+
+    def stat(self, key):
+        try:
+            result = os.stat(self.path(key))
+        except FileNotFoundError:
+            raise NotFound(FILE_NOT_FOUND_MESSAGE)
+        return FileInfo(
+            size=result.st_size,
+            etag=f"{result.st_mtime_ns:x}-{result.st_size:x}",
+            last_modified=datetime.fromtimestamp(int(result.st_mtime), timezone.utc),
+        )
+
+    def delete(self, keys):
+        errors = {}
+        for key in keys:
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+            except (OSError, NotFound) as ex:
+                errors[key] = str(ex)
+        return errors
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def presign(self, key, method, expires_in, content_type=None):
+        token = self.serializer.dumps(
+            {
+                "key": key,
+                "method": method,
+                "content_type": content_type,
+                "expires": int(time.time()) + expires_in,
+            }
+        )
+        return url_for("storagelinkresource", token=token, _external=True)
+
+    def verify(self, token, method):
+        """
+        Check a presigned link made by this storage.
+
+        :param token: string, the signed part of the link
+        :param method: string, the HTTP method the link is used with
+        :return: (key, content_type): the key of the file and the content type an upload has to be sent with;
+                 Forbidden, if the link is forged, has expired or wasn't made for the method
+        """
+        try:
+            data = self.serializer.loads(token)
+        except BadSignature:
+            data = None
+        if not data or data["method"] != method or data["expires"] < time.time():
+            raise Forbidden(
+                "This link isn't valid anymore \N{unamused face} Please, ask for a new one."
+            )
+        return data["key"], data["content_type"]
+
+
+def _copy(source, target, progress=None):
+    """
+    Copy a stream into a file. A regular file is copied by the kernel, with sendfile(), any other stream is read a
+    MiB at a time.
+    """
+    copied = 0
+    offset = _file_offset(source)
+    if offset is not None:
+        target.flush()
+        while True:
+            sent = os.sendfile(target.fileno(), source.fileno(), offset, COPY_SIZE)
+            if not sent:
+                source.seek(offset)
+                return
+            offset += sent
+            copied += sent
+            if progress is not None:
+                progress(copied)
+
+    while True:
+        data = source.read(COPY_SIZE)
+        if not data:
+            return
+        target.write(data)
+        copied += len(data)
+        if progress is not None:
+            progress(copied)
+
+
+def _file_offset(source):
+    """The position of a regular file on the disk, which sendfile() can copy from; None, for any other stream."""
+    if not hasattr(os, "sendfile"):
+        return None
+    try:
+        if not stat.S_ISREG(os.fstat(source.fileno()).st_mode):
+            return None
+        return source.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _fsync_folder(folder):
+    """Make the rename of a file in the folder durable."""
+    descriptor = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+
+from flask import current_app
+
+from settings import get_settings
+
+FILE_NOT_FOUND_MESSAGE = (
+    "We can't find your file \N{pensive face} Maybe it was deleted in the meantime?"
+)
+
+# boto3 sessions aren't thread-safe, so the storage of an application is only created by one thread
+_storage_lock = Lock()
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    """
+    What the storage knows about a file, for the conditional and Range requests.
+    """
+
+    size: int
+    etag: str
+    last_modified: datetime
+
+
+class Storage(ABC):
+    """
+    The interface of the places the files of the resources are kept in. Every file is identified by its key, and the
+    resources keep the URL of their file, which always ends with the key. A storage that doesn't implement all methods
+    can't be created.
+    """
+
+    @abstractmethod
+    def url(self, key):
+        """
+        Get the link to a file.
+
+        :param key: string, the key of the file
+        :return: string, the URL of the file
+        """
+
+    @abstractmethod
+    def put(self, fileobj, key, progress=None):
+        """
+        Save a file while it's being read, without keeping it whole in the memory.
+
+        :param fileobj: file-like object with a read(size) method, returning bytes; it doesn't need to be seekable
+        :param key: string, the key of the file
+        :param progress: function, optional; called with the number of bytes saved so far, while the upload goes on
+        :return: url: string, the link to the saved file
+        """
+
+    @abstractmethod
+    def get(self, key, start=0, end=None):
+        """
+        Open a file for reading, from the given position. The file is only guaranteed to have the bytes up to the end,
+        so the ones after it shouldn't be read.
+
+        :param key: string, the key of the file
+        :param start: int, the position of the first byte to be read
+        :param end: int, optional; the position after the last byte to be read, the end of the file by default
+        :return: file-like object with a read(size) method and a close() method; NotFound, if there is no such file
+        """
+
+    @abstractmethod
+    def stat(self, key):
+        """
+        Get the size and the version of a file.
+
+        :param key: string, the key of the file
+        :return: FileInfo object; NotFound, if there is no such file
+        """
+
+    @abstractmethod
+    def delete(self, keys):
+        """
+        Delete many files at once. Files that don't exist count as deleted.
+
+        :param keys: list of strings, up to 1000 keys of files
+        :return: dict, the keys that couldn't be deleted, with the error messages
+        """
+
+    @abstractmethod
+    def exists(self, key):
+        """
+        Check if a file exists.
+
+        :param key: string, the key of the file
+        :return: bool, True if the file exists
+        """
+
+    @abstractmethod
+    def presign(self, key, method, expires_in, content_type=None):
+        """
+        Create a link that lets the client upload (PUT) or download (GET) a file without going through the API.
+
+        :param key: string, the key of the file
+        :param method: string, "PUT" or "GET"
+        :param expires_in: int, for how many seconds the link can be used
+        :param content_type: string, optional; the Content-Type header an upload has to be sent with
+        :return: string, the presigned URL
+        """
+
+
+def create_storage(settings):
+    """
+    Create the storage chosen in the settings.
+
+    :param settings: Settings object
+    :return: Storage object; ValueError, if there is no such storage backend
+    """
+    if settings.storage_backend == "s3":
+        from services.aws_s3_bucket import S3Service
+
+        return S3Service(settings)
+    if settings.storage_backend == "local":
+        from services.local_storage import LocalStorage
+
+        return LocalStorage(settings)
+    raise ValueError(
+        f"Unknown storage backend {settings.storage_backend!r}, use 's3' or 'local'"
+    )
+
+
+def get_storage():
+    """
+    Get the storage of the current application. It's created on first use, not with the application, so the workers
+    that never touch a file don't import boto3 or build an S3 client.
+
+    :return: Storage object
+    """
+    storage = current_app.extensions.get("storage")
+    if storage is None:
+        with _storage_lock:
+            storage = current_app.extensions.get("storage")
+            if storage is None:
+                storage = create_storage(get_settings())
+                current_app.extensions["storage"] = storage
+    return storage
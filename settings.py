@@ -0,0 +1,129 @@
+import os
+from dataclasses import dataclass, replace
+
+from decouple import config
+from flask import current_app
+
+from constants import ROOT_DIR
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    The application settings that are used while serving requests. They are read from the environment (or the .env
+    file) only once, when the application is created, and can't be changed afterwards.
+    """
+
+    jwt_secret: str
+    token_validity_in_minutes: int
+    refresh_token_validity_in_days: int
+    password_min_length: int
+    password_max_length: int
+    user_cache_size: int
+    user_cache_ttl_in_seconds: int
+    password_hash_workers: int
+    password_hash_queue_size: int
+    password_hash_retry_after_in_seconds: int
+    compress_min_size: int
+    compress_gzip_level: int
+    compress_brotli_level: int
+    compress_zstd_level: int
+    file_deletion_batch_size: int
+    file_deletion_max_attempts: int
+    file_deletion_interval_in_seconds: int
+    storage_backend: str
+    local_storage_path: str
+    aws_access_key_id: str
+    aws_secret_key: str
+    aws_s3_bucket_region: str
+    aws_s3_bucket_name: str
+    aws_s3_endpoint_url: str
+    aws_s3_max_pool_connections: int
+    aws_s3_multipart_threshold_in_mb: int
+    aws_s3_multipart_chunk_size_in_mb: int
+    aws_s3_max_concurrency: int
+    aws_s3_upload_url_ttl_in_seconds: int
+    aws_s3_download_url_ttl_in_seconds: int
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """
+        Read and parse all settings from the environment.
+
+        :param overrides: the settings that shouldn't be read from the environment, with their values
+        :return: Settings object
+        """
+        settings = cls(
+            jwt_secret=config("JWT_SECRET"),
+            token_validity_in_minutes=config(
+                "TOKEN_VALIDITY_VALUE_IN_MINUTES", cast=int
+            ),
+            refresh_token_validity_in_days=config(
+                "REFRESH_TOKEN_VALIDITY_IN_DAYS", default=30, cast=int
+            ),
+            password_min_length=config("PASSWORD_MIN_LENGTH", cast=int),
+            password_max_length=config("PASSWORD_MAX_LENGTH", cast=int),
+            user_cache_size=config("USER_CACHE_SIZE", default=10000, cast=int),
+            user_cache_ttl_in_seconds=config(
+                "USER_CACHE_TTL_IN_SECONDS", default=60, cast=int
+            ),
+            password_hash_workers=config(
+                "PASSWORD_HASH_WORKERS", default=os.cpu_count(), cast=int
+            ),
+            password_hash_queue_size=config(
+                "PASSWORD_HASH_QUEUE_SIZE", default=64, cast=int
+            ),
+            password_hash_retry_after_in_seconds=config(
+                "PASSWORD_HASH_RETRY_AFTER_IN_SECONDS", default=1, cast=int
+            ),
+            compress_min_size=config("COMPRESS_MIN_SIZE", default=1024, cast=int),
+            compress_gzip_level=config("COMPRESS_GZIP_LEVEL", default=6, cast=int),
+            compress_brotli_level=config("COMPRESS_BROTLI_LEVEL", default=4, cast=int),
+            compress_zstd_level=config("COMPRESS_ZSTD_LEVEL", default=3, cast=int),
+            file_deletion_batch_size=config(
+                "FILE_DELETION_BATCH_SIZE", default=1000, cast=int
+            ),
+            file_deletion_max_attempts=config(
+                "FILE_DELETION_MAX_ATTEMPTS", default=10, cast=int
+            ),
+            file_deletion_interval_in_seconds=config(
+                "FILE_DELETION_INTERVAL_IN_SECONDS", default=10, cast=int
+            ),
+            storage_backend=config("STORAGE_BACKEND", default="s3"),
+            local_storage_path=config(
+                "LOCAL_STORAGE_PATH", default=os.path.join(ROOT_DIR, "storage")
+            ),
+            aws_access_key_id=config("AWS_ACCESS_KEY_ID"),
+            aws_secret_key=config("AWS_SECRET_KEY"),
+            aws_s3_bucket_region=config("AWS_S3_BUCKET_REGION"),
+            aws_s3_bucket_name=config("AWS_S3_BUCKET_NAME"),
+            aws_s3_endpoint_url=config("AWS_S3_ENDPOINT_URL", default=""),
+            aws_s3_max_pool_connections=config(
+                "AWS_S3_MAX_POOL_CONNECTIONS", default=20, cast=int
+            ),
+            aws_s3_multipart_threshold_in_mb=config(
+                "AWS_S3_MULTIPART_THRESHOLD_IN_MB", default=8, cast=int
+            ),
+            aws_s3_multipart_chunk_size_in_mb=config(
+                "AWS_S3_MULTIPART_CHUNK_SIZE_IN_MB", default=8, cast=int
+            ),
+            aws_s3_max_concurrency=config(
+                "AWS_S3_MAX_CONCURRENCY", default=10, cast=int
+            ),
+            aws_s3_upload_url_ttl_in_seconds=config(
+                "AWS_S3_UPLOAD_URL_TTL_IN_SECONDS", default=3600, cast=int
+            ),
+            aws_s3_download_url_ttl_in_seconds=config(
+                "AWS_S3_DOWNLOAD_URL_TTL_IN_SECONDS", default=300, cast=int
+            ),
+        )
+        return replace(settings, **overrides)
+
+
+def get_settings():
+    """
+    Get the settings of the current application.
+
+    :return: Settings object
+    """
+    return current_app.extensions["settings"]
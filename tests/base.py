@@ -1,3 +1,8 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from db import db
 from managers.auth import AuthManager
 
 
@@ -13,3 +18,22 @@ def generate_token(user):
 
 def mock_uuid():
     return "11111111-1111-1111-1111-111111111111"
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the SQL statements sent to the database inside the with-block.
+
+    :return: statements: list of strings, filled with the executed statements when the block is left
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
@@ -1,29 +1,45 @@
+from datetime import datetime
+from decimal import Decimal
+
 from flask_testing import TestCase
 
 from config import create_app
 from db import db
+from models import ResourceStatus
+from utils.json_encoding import dumps
 
 AUTHORISED_ENDPOINTS_DATA = (
     ("POST", "/new_resource/"),
+    ("POST", "/import_resources/"),
     ("POST", "/tag_resource/"),
     ("POST", "/upload_file/1/"),
+    ("POST", "/upload_url/1/"),
+    ("POST", "/upload_complete/1/"),
     ("PUT", "/resource_status/1/read/"),
     ("PUT", "/resource_status/1/dropped/"),
     ("PUT", "/resource_status/1/to_read/"),
+    ("PUT", "/resource_status/"),
     ("PUT", "/update_resource/"),
+    ("PATCH", "/update_resources/"),
     ("PUT", "/update_user/"),
     ("DELETE", "/delete_resource/1/"),
     ("DELETE", "/delete_tag/1/"),
     ("DELETE", "/delete_file/1/"),
     ("GET", "/my_user/"),
     ("GET", "/my_resources/"),
+    ("GET", "/search_resources/"),
+    ("GET", "/autocomplete/"),
     ("GET", "/my_tags/"),
     ("GET", "/my_resources_with_tag/1/"),
+    ("GET", "/download_url/1/"),
+    ("GET", "/download/1/"),
 )
 
 UNAUTHORISED_ENDPOINTS_DATA = (
     ("POST", "/register/"),
     ("POST", "/login/"),
+    ("POST", "/refresh/"),
+    ("POST", "/revoke/"),
 )
 
 NO_INPUT_ENDPOINTS_DATA = (("GET", "/general_stats/"),)
@@ -127,3 +143,48 @@ class TestApp(TestCase):
             },
             headers,
         )
+
+    def test_json_encoding(self):
+        """
+        Make sure the datetimes, decimals and enums are encoded without any extra work, and errors keyed by the
+        index of a list item are encoded too.
+        """
+        data = {
+            "created_datetime": datetime(2022, 8, 21, 9, 30),
+            "rating": Decimal("4.50"),
+            "status": ResourceStatus.read,
+            "errors": {0: ["Not a valid integer."]},
+        }
+        self.assertEqual(
+            dumps(data),
+            b'{"created_datetime":"2022-08-21T09:30:00","rating":"4.50","status":"Read",'
+            b'"errors":{"0":["Not a valid integer."]}}',
+        )
+
+    def test_request_body_is_parsed_once(self):
+        """
+        Make sure the body is parsed only once, even though the schema validation and the endpoint both read it.
+        """
+        calls = []
+        loads = self.app.json.loads
+
+        def counting_loads(*args, **kwargs):
+            calls.append(args)
+            return loads(*args, **kwargs)
+
+        self.app.json.loads = counting_loads
+        resp = self.client.post(
+            "/login/", json={"email": "nobody@example.com", "password": "Some!Pass123"}
+        )
+        self.assertIn(resp.status_code, (400, 401))
+        self.assertEqual(len(calls), 1)
+
+    def test_invalid_json_raises(self):
+        """
+        Make sure a body that isn't valid JSON gets 400 BAD REQUEST.
+        """
+        resp = self.client.post(
+            "/login/", data="{not json", headers={"Content-Type": "application/json"}
+        )
+        self.assert400(resp)
+        self.assertEqual(resp.headers["Content-Type"], "application/json")
@@ -0,0 +1,161 @@
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from flask_testing import TestCase
+
+from config import create_app
+from db import db
+from managers.file_deletion import FileDeletionManager
+from models import FileDeletionModel, FileDeletionStatus, ResourceModel
+from services.aws_s3_bucket import S3Service
+from settings import get_settings
+from tests.base import generate_token
+from tests.factories import ResourceFactory, UserFactory
+
+
+class FakeS3:
+    """
+    Records the deleted keys and fails for the keys it's asked to.
+    """
+
+    def __init__(self, failing_keys=()):
+        self.failing_keys = set(failing_keys)
+        self.requests = []
+
+    def delete(self, keys):
+        self.requests.append(keys)
+        return {
+            key: "AccessDenied: Access Denied" for key in self.failing_keys & set(keys)
+        }
+
+
+class TestFileDeletion(TestCase):
+    """
+    A class to test the outbox of the files deleted from the S3 bucket.
+    """
+
+    def create_app(self):
+        return create_app("config.TestingConfig")
+
+    def setUp(self):
+        db.init_app(self.app)
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def make_due(self):
+        """Make all files in the outbox due right away, as if the retry delay had passed."""
+        FileDeletionModel.query.update(
+            {"next_attempt_datetime": db.func.now()}, synchronize_session=False
+        )
+        db.session.commit()
+
+    def test_delete_file_is_added_to_the_outbox(self):
+        """
+        Make sure deleting a file doesn't wait on S3, but saves the file in the outbox together with the change of
+        the resource.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource.file_url = "https://bucket.s3.eu-central-1.amazonaws.com/abc.pdf"
+        other = ResourceFactory(owner_id=user.user_id)
+        other.file_url = "https://bucket.s3.eu-central-1.amazonaws.com/def.pdf"
+        db.session.commit()
+        resource_id, other_id = resource.resource_id, other.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        with patch("managers.resource.get_storage") as storage:
+            resp = self.client.delete(f"/delete_file/{resource_id}/", headers=headers)
+            self.assert200(resp)
+            resp = self.client.delete(f"/delete_resource/{other_id}/", headers=headers)
+            self.assert200(resp)
+        self.assertEqual(storage.return_value.method_calls, [])
+
+        self.assertEqual(db.session.get(ResourceModel, resource_id).file_url, "")
+        self.assertEqual(
+            sorted(row.file_key for row in FileDeletionModel.query.all()),
+            ["abc.pdf", "def.pdf"],
+        )
+
+    def test_drain_deletes_files_in_one_batch(self):
+        """
+        Make sure the due files are deleted with one request and their rows are removed.
+        """
+        for key in ("a.pdf", "b.pdf", "a.pdf"):
+            FileDeletionManager.schedule(key)
+        db.session.commit()
+
+        s3 = FakeS3()
+        result = FileDeletionManager.drain(s3)
+
+        self.assertEqual(result, {"deleted": 3, "failed": 0, "dead": 0})
+        self.assertEqual(s3.requests, [["a.pdf", "b.pdf"]])
+        self.assertEqual(FileDeletionModel.query.count(), 0)
+
+    def test_drain_retries_failed_files_until_they_are_dead(self):
+        """
+        Make sure the files that couldn't be deleted are tried again later, and marked as dead after the last attempt.
+        """
+        FileDeletionManager.schedule("a.pdf")
+        FileDeletionManager.schedule("b.pdf")
+        db.session.commit()
+        s3 = FakeS3(failing_keys=["b.pdf"])
+
+        result = FileDeletionManager.drain(s3, max_attempts=2)
+        self.assertEqual(result, {"deleted": 1, "failed": 1, "dead": 0})
+        row = FileDeletionModel.query.one()
+        self.assertEqual((row.file_key, row.attempts), ("b.pdf", 1))
+        self.assertEqual(row.last_error, "AccessDenied: Access Denied")
+
+        # The failed file isn't due until the retry delay has passed
+        self.assertEqual(
+            FileDeletionManager.drain(s3), {"deleted": 0, "failed": 0, "dead": 0}
+        )
+
+        self.make_due()
+        result = FileDeletionManager.drain(s3, max_attempts=2)
+        self.assertEqual(result, {"deleted": 0, "failed": 0, "dead": 1})
+        self.assertEqual(FileDeletionModel.query.one().status, FileDeletionStatus.dead)
+
+        # Dead files are left alone, until they are given another chance
+        self.make_due()
+        self.assertEqual(
+            FileDeletionManager.drain(FakeS3()), {"deleted": 0, "failed": 0, "dead": 0}
+        )
+        self.assertEqual(FileDeletionManager.retry_dead(), 1)
+        self.assertEqual(
+            FileDeletionManager.drain(FakeS3()), {"deleted": 1, "failed": 0, "dead": 0}
+        )
+
+    def test_drain_keeps_files_when_s3_is_down(self):
+        """
+        Make sure all files of the batch are kept for later when the whole request to S3 fails.
+        """
+        FileDeletionManager.schedule("a.pdf")
+        db.session.commit()
+        s3 = S3Service(get_settings())
+        error = ClientError({"Error": {"Code": "SlowDown"}}, "DeleteObjects")
+
+        with patch.object(s3.s3, "delete_objects", side_effect=error):
+            result = FileDeletionManager.drain(s3)
+
+        self.assertEqual(result, {"deleted": 0, "failed": 1, "dead": 0})
+        self.assertIn("SlowDown", FileDeletionModel.query.one().last_error)
+
+    def test_drain_command(self):
+        """
+        Make sure the worker command drains the outbox.
+        """
+        FileDeletionManager.schedule("a.pdf")
+        db.session.commit()
+
+        with patch("commands.get_storage", return_value=FakeS3()):
+            result = self.app.test_cli_runner().invoke(
+                args=["drain-file-deletions", "--once"]
+            )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("deleted 1 files", result.output)
+        self.assertEqual(FileDeletionModel.query.count(), 0)
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from constants import ROOT_DIR
+
+# How long importing everything the application needs may take, in milliseconds. The best of a few runs is compared
+# with it, so a busy machine doesn't make the test fail.
+IMPORT_TIME_BUDGET_IN_MS = int(os.environ.get("IMPORT_TIME_BUDGET_IN_MS", 1000))
+RUNS = 3
+
+# The libraries only some requests or commands need, which are imported when they are first used
+LAZY_MODULES = (
+    "alembic",
+    "boto3",
+    "botocore",
+    "flask_migrate",
+    "multiprocessing",
+    "phonenumbers",
+)
+
+
+def import_times():
+    """
+    Create the application in a new interpreter, with -X importtime.
+
+    :return: dict, the modules imported on the way, with the cumulative time of each of them in microseconds
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from config import create_app; create_app('config.TestingConfig')",
+        ],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name] = int(cumulative)
+    return times
+
+
+class TestImportTime(TestCase):
+    """
+    A class to make sure the workers boot quickly - the heavy libraries aren't imported with the application, and
+    importing the rest stays within the budget.
+    """
+
+    def test_import_time_budget(self):
+        runs = [import_times() for _ in range(RUNS)]
+
+        modules = {name.strip().split(".")[0] for name in runs[0]}
+        self.assertEqual(sorted(modules.intersection(LAZY_MODULES)), [])
+
+        # Only the top-level imports, whose times include the modules they import themselves
+        best = min(
+            sum(time for name, time in times.items() if not name.startswith("  "))
+            for times in runs
+        )
+        self.assertLess(best / 1000, IMPORT_TIME_BUDGET_IN_MS)
@@ -0,0 +1,261 @@
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+from flask_testing import TestCase
+from werkzeug.exceptions import NotFound
+
+from config import create_app
+from db import db
+from models import ResourceModel
+from services.local_storage import LocalStorage
+from services.storage import Storage, get_storage
+from settings import Settings
+from tests.base import generate_token
+from tests.factories import ResourceFactory, UserFactory
+
+
+class TestLocalStorage(TestCase):
+    """
+    A class to test the storage of the files on the local disk, and the uploads and downloads through it.
+    """
+
+    def create_app(self):
+        self.folder = tempfile.TemporaryDirectory()
+        settings = Settings.from_env(
+            storage_backend="local", local_storage_path=self.folder.name
+        )
+        return create_app("config.TestingConfig", settings)
+
+    def setUp(self):
+        db.init_app(self.app)
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.folder.cleanup()
+
+    def stored_files(self):
+        """All files in the storage folder, with their paths relative to it."""
+        return sorted(
+            os.path.relpath(os.path.join(folder, name), self.folder.name)
+            for folder, _, names in os.walk(self.folder.name)
+            for name in names
+        )
+
+    def test_files_are_sharded_and_written_whole(self):
+        """
+        Make sure the files are spread over sub-folders, and a failed upload leaves nothing behind.
+        """
+        storage = get_storage()
+        self.assertIsInstance(storage, LocalStorage)
+
+        progress = []
+        url = storage.put(io.BytesIO(b"a" * 3_000_000), "a.pdf", progress.append)
+        self.assertEqual(progress, [1048576, 2097152, 3000000])
+        [path] = self.stored_files()
+        self.assertRegex(path, r"^[0-9a-f]{2}/[0-9a-f]{2}/a\.pdf$")
+        self.assertEqual(url, "local://a.pdf")
+        self.assertTrue(storage.exists("a.pdf"))
+        with storage.get("a.pdf") as file:
+            self.assertEqual(file.read(), b"a" * 3_000_000)
+
+        # A regular file is copied with sendfile(), from where it has been read up to
+        with tempfile.TemporaryFile() as source:
+            source.write(b"header|content")
+            source.seek(7)
+            storage.put(source, "b.pdf")
+            self.assertEqual(source.read(), b"")
+        with storage.get("b.pdf") as file:
+            self.assertEqual(file.read(), b"content")
+
+        class BrokenStream:
+            def read(self, size):
+                raise ConnectionResetError()
+
+        with self.assertRaises(ConnectionResetError):
+            storage.put(BrokenStream(), "c.pdf")
+        self.assertEqual(len(self.stored_files()), 2)
+        self.assertFalse(storage.exists("c.pdf"))
+
+        self.assertEqual(storage.delete(["a.pdf", "b.pdf", "missing.pdf"]), {})
+        self.assertEqual(self.stored_files(), [])
+        for key in ("../a.pdf", ".hidden", "a/b.pdf"):
+            with self.assertRaises(NotFound):
+                storage.get(key)
+
+    def test_incomplete_storage_cant_be_created(self):
+        """
+        Make sure a storage that doesn't implement the whole interface fails when it's created, not on first use.
+        """
+
+        class NoStatStorage(Storage):
+            def url(self, key):
+                return key
+
+        with self.assertRaises(TypeError):
+            NoStatStorage()
+
+    def test_upload_and_download_through_the_local_storage(self):
+        """
+        Make sure the files are uploaded through the application and with presigned links, and downloaded with them.
+        """
+        user = UserFactory()
+        resource_id = ResourceFactory(owner_id=user.user_id).resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.post(
+            f"/upload_file/{resource_id}/",
+            headers=headers,
+            data={"file": (io.BytesIO(b"first book"), "book.pdf")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(resp.status_code, 201)
+        file_url = db.session.get(ResourceModel, resource_id).file_url
+        self.assertRegex(file_url, r"^local://[0-9a-f-]{36}\.pdf$")
+        self.assertIn(file_url, resp.json["message"])
+        self.assertNotIn(self.folder.name, resp.json["message"])
+
+        resp = self.client.post(
+            f"/upload_url/{resource_id}/",
+            headers=headers,
+            json={"filename": "book.pdf", "content_type": "application/pdf"},
+        )
+        upload_url, key = resp.json["upload_url"], resp.json["key"]
+        self.assertTrue(upload_url.startswith("http://localhost/storage/"))
+
+        resp = self.client.put(
+            upload_url, data=b"second book", content_type="text/plain"
+        )
+        self.assert400(resp)
+        resp = self.client.put(
+            upload_url, data=b"second book", content_type="application/pdf"
+        )
+        self.assert200(resp)
+        self.assert403(self.client.get(upload_url))
+        self.assert403(
+            self.client.put(
+                upload_url.replace("/storage/", "/storage/x"), data=b"forged"
+            )
+        )
+
+        resp = self.client.post(
+            f"/upload_complete/{resource_id}/", headers=headers, json={"key": key}
+        )
+        self.assertEqual(resp.status_code, 201)
+
+        resp = self.client.get(f"/download_url/{resource_id}/", headers=headers)
+        download_url = resp.json["download_url"]
+        resp = self.client.get(download_url)
+        self.assert200(resp)
+        self.assertEqual(resp.data, b"second book")
+        resp.close()
+        resp = self.client.get(download_url, headers={"Range": "bytes=7-"})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, b"book")
+        resp.close()
+
+        with patch("services.local_storage.time.time", return_value=10**10):
+            self.assert403(self.client.get(download_url))
+
+    def test_download_with_ranges_and_conditions(self):
+        """
+        Make sure the file is downloaded whole or in parts, with sendfile() where possible, and not sent again when
+        the client has the same version.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        storage = get_storage()
+        resource.file_url = storage.put(io.BytesIO(b"0123456789"), "book.pdf")
+        db.session.commit()
+        url = f"/download/{resource.resource_id}/"
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        wrapped = []
+
+        def file_wrapper(file, buffer_size):
+            wrapped.append(file)
+            return iter(lambda: file.read(buffer_size), b"")
+
+        def download(**extra_headers):
+            resp = self.client.get(
+                url,
+                headers={**headers, **extra_headers},
+                environ_base={"wsgi.file_wrapper": file_wrapper},
+            )
+            data = resp.data
+            resp.close()
+            return resp, data
+
+        resp, data = download()
+        self.assert200(resp)
+        self.assertEqual(data, b"0123456789")
+        self.assertEqual(resp.content_length, 10)
+        self.assertEqual(resp.mimetype, "application/pdf")
+        self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+        self.assertIn("private", resp.headers["Cache-Control"])
+        self.assertIn("attachment", resp.headers["Content-Disposition"])
+        self.assertEqual(len(wrapped), 1)
+        etag, last_modified = resp.headers["ETag"], resp.headers["Last-Modified"]
+
+        for conditions in (
+            {"If-None-Match": etag},
+            {"If-Modified-Since": last_modified},
+        ):
+            resp, data = download(**conditions)
+            self.assertEqual(resp.status_code, 304)
+            self.assertEqual(data, b"")
+
+        # The rest of the file goes through sendfile(), a part in the middle is read
+        resp, data = download(Range="bytes=6-")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(data, b"6789")
+        self.assertEqual(resp.headers["Content-Range"], "bytes 6-9/10")
+        self.assertEqual(len(wrapped), 2)
+        resp, data = download(Range="bytes=2-4")
+        self.assertEqual((resp.status_code, data), (206, b"234"))
+        self.assertEqual(len(wrapped), 2)
+        resp, data = download(Range="bytes=-3")
+        self.assertEqual((resp.status_code, data), (206, b"789"))
+
+        # A range of another version of the file gives the whole file
+        resp, data = download(Range="bytes=6-", **{"If-Range": etag})
+        self.assertEqual((resp.status_code, data), (206, b"6789"))
+        resp, data = download(Range="bytes=6-", **{"If-Range": '"old-version"'})
+        self.assertEqual((resp.status_code, data), (200, b"0123456789"))
+        resp, data = download(Range="bytes=6-", **{"If-Range": last_modified})
+        self.assertEqual(resp.status_code, 206)
+
+        resp, data = download(Range="bytes=10-")
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp.headers["Content-Range"], "bytes */10")
+
+        resp = self.client.head(url, headers=headers)
+        self.assert200(resp)
+        self.assertEqual((resp.content_length, resp.data), (10, b""))
+
+    def test_download_without_file_raises(self):
+        """
+        Make sure only the owner can download the file, and only if there is one.
+        """
+        user = UserFactory()
+        other = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        url = f"/download/{resource.resource_id}/"
+
+        resp = self.client.get(
+            url, headers={"Authorization": f"Bearer {generate_token(user)}"}
+        )
+        self.assert400(resp)
+        resp = self.client.get(
+            url, headers={"Authorization": f"Bearer {generate_token(other)}"}
+        )
+        self.assert403(resp)
+
+        resource.file_url = get_storage().url("deleted.pdf")
+        db.session.commit()
+        resp = self.client.get(
+            url, headers={"Authorization": f"Bearer {generate_token(user)}"}
+        )
+        self.assert404(resp)
@@ -1,11 +1,34 @@
+import gzip
+import hashlib
+import io
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
 from flask_testing import TestCase
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from werkzeug.exceptions import BadRequest
 
 from config import create_app
 from db import db
 from managers.resource import ResourceManager
-from models import ResourceModel, resource_tag
-from tests.base import generate_token
+from models import (
+    FileDeletionModel,
+    ResourceModel,
+    ResourceStatus,
+    StoredFileModel,
+    TagModel,
+    resource_tag,
+)
+from managers.tag import TagManager
+from services.aws_s3_bucket import S3Service
+from services.storage import FileInfo, get_storage
+from settings import Settings
+from tests.base import generate_token, count_queries
 from tests.factories import UserFactory, ResourceFactory, TagFactory
+from utils.importers import LARGE_ITEM_MESSAGE, MAX_ITEM_SIZE, iter_json_array
+from utils.uploads import READ_SIZE, stream_uploaded_file
 
 
 class TestResource(TestCase):
@@ -221,6 +244,316 @@ class TestResource(TestCase):
             == "Don't try to trick us, this resource doesn't exist! 😉"
         )
 
+    def upload(self, resource_id, headers, content, uploaded):
+        """
+        Upload a file to a resource, with the S3 upload replaced by reading the file into the uploaded list.
+        """
+
+        def put(fileobj, key):
+            uploaded.append((key, fileobj.read()))
+
+        with patch.object(get_storage(), "put", side_effect=put):
+            return self.client.post(
+                f"/upload_file/{resource_id}/",
+                headers=headers,
+                data={"note": "skipped", "file": (io.BytesIO(content), "book.pdf")},
+                content_type="multipart/form-data",
+            )
+
+    def test_upload_file_is_streamed(self):
+        """
+        Make sure the uploaded file is sent to S3 while it's being read from the request, with the other form fields
+        skipped, and the link is saved in the resource.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource_id = resource.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        content = bytes(range(256)) * 12000
+        uploaded = []
+
+        resp = self.upload(resource_id, headers, content, uploaded)
+
+        self.assertEqual(resp.status_code, 201)
+        [(key, data)] = uploaded
+        self.assertTrue(key.endswith(".pdf"))
+        self.assertEqual(data, content)
+        self.assertTrue(
+            db.session.get(ResourceModel, resource_id).file_url.endswith(f"/{key}")
+        )
+
+    def test_upload_file_is_stored_once(self):
+        """
+        Make sure the same content is stored only once, no matter how many resources link to it, and it's deleted only
+        when the last resource stops linking to it.
+        """
+        user = UserFactory()
+        user2 = UserFactory()
+        resource_id = ResourceFactory(owner_id=user.user_id).resource_id
+        resource2_id = ResourceFactory(owner_id=user2.user_id).resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        headers2 = {"Authorization": f"Bearer {generate_token(user2)}"}
+        content = b"the same book" * 1000
+        sha256 = hashlib.sha256(content).hexdigest()
+        uploaded = []
+
+        self.assertEqual(
+            self.upload(resource_id, headers, content, uploaded).status_code, 201
+        )
+        self.assertEqual(
+            self.upload(resource2_id, headers2, content, uploaded).status_code, 201
+        )
+
+        # The second copy was uploaded, but it's deleted in favour of the first one
+        (key, _), (key2, _) = uploaded
+        url = db.session.get(ResourceModel, resource_id).file_url
+        self.assertTrue(url.endswith(f"/{key}"))
+        self.assertEqual(db.session.get(ResourceModel, resource2_id).file_url, url)
+        self.assertEqual(
+            [row.file_key for row in FileDeletionModel.query.all()], [key2]
+        )
+        stored = StoredFileModel.query.one()
+        self.assertEqual((stored.sha256, stored.file_key), (sha256, key))
+        self.assertEqual(stored.reference_count, 2)
+
+        # With the hash of known content, the file isn't read or uploaded at all
+        resource3_id = ResourceFactory(owner_id=user.user_id).resource_id
+        resp = self.client.post(
+            f"/upload_file/{resource3_id}/",
+            headers={**headers, "X-Content-SHA256": sha256},
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(uploaded), 2)
+        self.assertEqual(db.session.get(ResourceModel, resource3_id).file_url, url)
+        db.session.expire_all()
+        self.assertEqual(StoredFileModel.query.one().reference_count, 3)
+
+        # A user without the content can't get it with the hash alone - the file has to be uploaded
+        user3 = UserFactory()
+        resource4_id = ResourceFactory(owner_id=user3.user_id).resource_id
+        headers3 = {"Authorization": f"Bearer {generate_token(user3)}"}
+        resp = self.client.post(
+            f"/upload_file/{resource4_id}/",
+            headers={**headers3, "X-Content-SHA256": sha256},
+        )
+        self.assert400(resp)
+        resp = self.client.post(
+            f"/upload_url/{resource4_id}/",
+            headers=headers3,
+            json={"filename": "book.pdf", "sha256": sha256},
+        )
+        self.assert200(resp)
+        self.assertIn("upload_url", resp.json)
+        self.assertIsNone(db.session.get(ResourceModel, resource4_id).file_url)
+        db.session.expire_all()
+        self.assertEqual(StoredFileModel.query.one().reference_count, 3)
+
+        # The file is deleted only with the last resource linking to it
+        for number, (resource_id, headers) in enumerate(
+            ((resource_id, headers), (resource2_id, headers2), (resource3_id, headers))
+        ):
+            resp = self.client.delete(
+                f"/delete_resource/{resource_id}/", headers=headers
+            )
+            self.assert200(resp)
+            deleted = [row.file_key for row in FileDeletionModel.query.all()]
+            self.assertEqual(deleted, [key2] if number < 2 else [key2, key])
+        self.assertEqual(StoredFileModel.query.count(), 0)
+
+    def test_upload_file_with_wrong_hash_raises(self):
+        """
+        Make sure a file that doesn't match the hash sent with it is refused and deleted.
+        """
+        user = UserFactory()
+        resource_id = ResourceFactory(owner_id=user.user_id).resource_id
+        uploaded = []
+        headers = {
+            "Authorization": f"Bearer {generate_token(user)}",
+            "X-Content-SHA256": hashlib.sha256(b"another book").hexdigest(),
+        }
+
+        resp = self.upload(resource_id, headers, b"a book", uploaded)
+
+        self.assert400(resp)
+        [(key, _)] = uploaded
+        self.assertEqual([row.file_key for row in FileDeletionModel.query.all()], [key])
+        self.assertEqual(StoredFileModel.query.count(), 0)
+        self.assertIsNone(db.session.get(ResourceModel, resource_id).file_url)
+
+        headers["X-Content-SHA256"] = "not a hash"
+        self.assert400(self.upload(resource_id, headers, b"a book", uploaded))
+
+    def test_upload_file_without_file_raises(self):
+        """
+        Make sure the user is reminded to attach the file, if there isn't one in the request.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        url = f"/upload_file/{resource.resource_id}/"
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        message = (
+            "You probably forgot to attach the file 🙂 Please, provide it in the "
+            "form-data section, with key = file."
+        )
+
+        with patch("managers.resource.get_storage") as storage:
+            for data in (
+                {"note": "no file here"},
+                {"other": (io.BytesIO(b"x"), "a.pdf")},
+            ):
+                resp = self.client.post(
+                    url, headers=headers, data=data, content_type="multipart/form-data"
+                )
+                self.assert400(resp)
+                self.assertEqual(resp.json["message"], message)
+            resp = self.client.post(url, headers=headers, json={})
+            self.assert400(resp)
+        self.assertEqual(storage.return_value.method_calls, [])
+
+    def test_stream_uploaded_file_reads_the_body_in_pieces(self):
+        """
+        Make sure the file is read from the request body as it's needed, not all at once.
+        """
+        boundary = "boundary"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="big.pdf"\r\n\r\n'
+        ).encode()
+        body += b"a" * (5 * 1024 * 1024) + f"\r\n--{boundary}--\r\n".encode()
+        stream = io.BytesIO(body)
+
+        file = stream_uploaded_file(stream, f"multipart/form-data; boundary={boundary}")
+        self.assertEqual(file.filename, "big.pdf")
+        self.assertEqual(file.stream.read(1024), b"a" * 1024)
+        self.assertLess(stream.tell(), 4 * READ_SIZE)
+        self.assertEqual(len(file.stream.read()), 5 * 1024 * 1024 - 1024)
+
+    def test_presigned_upload_and_download(self):
+        """
+        Make sure the user gets a link to upload the file straight to S3, the upload is linked to the resource once the
+        file is there, the old file is deleted, and the user gets a link to download the new file.
+        """
+        # A region where botocore would sign with SigV2, unless told otherwise
+        self.app.extensions["storage"] = S3Service(
+            Settings.from_env(
+                storage_backend="s3",
+                aws_s3_bucket_region="eu-west-1",
+                aws_s3_endpoint_url="",
+            )
+        )
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource.file_url = "https://bucket.s3.eu-central-1.amazonaws.com/old.pdf"
+        db.session.commit()
+        resource_id = resource.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.post(
+            f"/upload_url/{resource_id}/",
+            headers=headers,
+            json={"filename": "book.pdf", "content_type": "application/pdf"},
+        )
+        self.assert200(resp)
+        key = resp.json["key"]
+        self.assertRegex(key, rf"^{resource_id}-[0-9a-f-]{{36}}\.pdf$")
+        self.assertEqual(resp.json["method"], "PUT")
+        self.assertEqual(resp.json["headers"], {"Content-Type": "application/pdf"})
+        self.assertIn(f"/{key}?", resp.json["upload_url"])
+        self.assertIn("X-Amz-Expires=3600", resp.json["upload_url"])
+
+        url = f"/upload_complete/{resource_id}/"
+        with patch.object(get_storage(), "exists", return_value=False):
+            resp = self.client.post(url, headers=headers, json={"key": key})
+        self.assert400(resp)
+
+        with patch.object(get_storage(), "exists", return_value=True) as exists:
+            resp = self.client.post(url, headers=headers, json={"key": key})
+        self.assertEqual(resp.status_code, 201)
+        exists.assert_called_once_with(key)
+        self.assertTrue(
+            db.session.get(ResourceModel, resource_id).file_url.endswith(f"/{key}")
+        )
+        self.assertEqual(
+            [row.file_key for row in FileDeletionModel.query.all()], ["old.pdf"]
+        )
+
+        resp = self.client.get(f"/download_url/{resource_id}/", headers=headers)
+        self.assert200(resp)
+        self.assertIn(f"/{key}?", resp.json["download_url"])
+        self.assertEqual(resp.json["expires_in"], 300)
+        self.assertIn("X-Amz-Expires=300", resp.json["download_url"])
+
+    def test_presigned_upload_of_another_resource_raises(self):
+        """
+        Make sure an upload can't be completed with a key made for another resource, and there is no download link
+        for a resource without a file.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        other = ResourceFactory(owner_id=user.user_id)
+        resource_id, other_id = resource.resource_id, other.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.post(
+            f"/upload_url/{other_id}/", headers=headers, json={"filename": "a.pdf"}
+        )
+        self.assertEqual(
+            resp.json["headers"], {"Content-Type": "application/octet-stream"}
+        )
+        for key in (resp.json["key"], "../../secret.pdf"):
+            with patch.object(get_storage(), "exists", return_value=True):
+                resp = self.client.post(
+                    f"/upload_complete/{resource_id}/",
+                    headers=headers,
+                    json={"key": key},
+                )
+            self.assert400(resp)
+        self.assertIsNone(db.session.get(ResourceModel, resource_id).file_url)
+
+        resp = self.client.get(f"/download_url/{resource_id}/", headers=headers)
+        self.assert400(resp)
+
+    def test_download_file_is_streamed_from_s3(self):
+        """
+        Make sure a file in the S3 bucket is streamed through the API, with only the asked part requested from S3.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource.file_url = "https://bucket.s3.eu-central-1.amazonaws.com/book.pdf"
+        db.session.commit()
+        url = f"/download/{resource.resource_id}/"
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        content = bytes(range(256)) * 4096
+        info = FileInfo(len(content), "abc", datetime(2022, 8, 21, tzinfo=timezone.utc))
+        requested = []
+
+        def get(key, start=0, end=None):
+            requested.append((key, start, end))
+            return io.BytesIO(content[start:end])
+
+        storage = get_storage()
+        with patch.object(storage, "stat", return_value=info), patch.object(
+            storage, "get", side_effect=get
+        ):
+            resp = self.client.get(url, headers=headers)
+            self.assert200(resp)
+            self.assertTrue(resp.is_streamed)
+            self.assertEqual(resp.data, content)
+
+            resp = self.client.get(
+                url, headers={**headers, "Range": "bytes=1000-", "If-Range": '"abc"'}
+            )
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp.data, content[1000:])
+
+            resp = self.client.get(url, headers={**headers, "If-None-Match": '"abc"'})
+            self.assertEqual(resp.status_code, 304)
+
+        self.assertEqual(
+            requested,
+            [("book.pdf", 0, len(content)), ("book.pdf", 1000, len(content))],
+        )
+
     def test_get_resource_by_tag(self):
         """
         Make sure you get all resources by tag.
@@ -284,3 +617,835 @@ class TestResource(TestCase):
             db.session.query(resource_tag).filter_by(tag_id=tag12.tag_id).count() == 2
         )
         assert db.session.query(resource_tag).filter_by(tag_id=tag2.tag_id).count() == 1
+
+    def test_get_resources_pages(self):
+        """
+        Make sure the resources are returned page by page, and that following the cursors returns every resource once.
+        """
+        url = "/my_resources/"
+
+        user = UserFactory()
+        user2 = UserFactory()
+        resources = [ResourceFactory(owner_id=user.user_id) for _ in range(5)]
+        ResourceFactory(owner_id=user2.user_id)
+
+        token = generate_token(user)
+        headers = {
+            "Authorization": f"Bearer {token}",
+        }
+
+        seen = []
+        cursor = None
+        while True:
+            query = {"limit": 2}
+            if cursor:
+                query["cursor"] = cursor
+            resp = self.client.get(url, headers=headers, query_string=query)
+            self.assert200(resp)
+            assert len(resp.json["resources"]) <= 2
+            seen += [resource["resource_id"] for resource in resp.json["resources"]]
+            cursor = resp.json["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [resource.resource_id for resource in resources]
+
+        # Descending order
+        resp = self.client.get(
+            url, headers=headers, query_string={"order": "desc", "limit": 3}
+        )
+        self.assert200(resp)
+        assert [resource["resource_id"] for resource in resp.json["resources"]] == [
+            resource.resource_id for resource in reversed(resources)
+        ][:3]
+
+        # The cursor can't be used with a different order
+        resp = self.client.get(
+            url, headers=headers, query_string={"cursor": resp.json["next_cursor"]}
+        )
+        self.assert400(resp)
+
+        resp = self.client.get(url, headers=headers, query_string={"cursor": "abc"})
+        self.assert400(resp)
+        assert (
+            resp.json["message"]
+            == "This cursor is invalid 😒 Please, use the next_cursor value from the previous page."
+        )
+
+    def test_get_resources_filters(self):
+        """
+        Make sure the resources can be filtered by status, rating and author.
+        """
+        url = "/my_resources/"
+
+        user = UserFactory()
+        read = ResourceFactory(
+            owner_id=user.user_id, status=ResourceStatus.read, rating="4.5"
+        )
+        ResourceFactory(owner_id=user.user_id, rating="1")
+        by_author = ResourceFactory(
+            owner_id=user.user_id, author="Ursula K. Le Guin", rating="3"
+        )
+
+        token = generate_token(user)
+        headers = {
+            "Authorization": f"Bearer {token}",
+        }
+
+        resp = self.client.get(url, headers=headers, query_string={"status": "Read"})
+        self.assert200(resp)
+        assert [resource["resource_id"] for resource in resp.json["resources"]] == [
+            read.resource_id
+        ]
+
+        resp = self.client.get(
+            url, headers=headers, query_string={"min_rating": 2, "max_rating": 4}
+        )
+        assert [resource["resource_id"] for resource in resp.json["resources"]] == [
+            by_author.resource_id
+        ]
+
+        resp = self.client.get(
+            url, headers=headers, query_string={"author": "Ursula K. Le Guin"}
+        )
+        assert [resource["resource_id"] for resource in resp.json["resources"]] == [
+            by_author.resource_id
+        ]
+
+        resp = self.client.get(url, headers=headers, query_string={"author": "Nobody"})
+        self.assert200(resp)
+        assert resp.json["resources"] == []
+
+        resp = self.client.get(url, headers=headers, query_string={"sort": "rating"})
+        self.assert400(resp)
+
+    def test_get_resource_by_tag_constant_queries(self):
+        """
+        Make sure the number of SQL statements doesn't depend on the number of resources with the tag.
+        """
+        user = UserFactory()
+        small_tag = TagFactory(owner_id=user.user_id, tag="small")
+        large_tag = TagFactory(owner_id=user.user_id, tag="large")
+        for _ in range(2):
+            TagManager.assign_tag(
+                ResourceFactory(owner_id=user.user_id).resource_id, small_tag.tag_id
+            )
+        for _ in range(20):
+            TagManager.assign_tag(
+                ResourceFactory(owner_id=user.user_id).resource_id, large_tag.tag_id
+            )
+
+        token = generate_token(user)
+        headers = {
+            "Authorization": f"Bearer {token}",
+        }
+        small_url = f"/my_resources_with_tag/{small_tag.tag}/"
+        large_url = f"/my_resources_with_tag/{large_tag.tag}/"
+
+        # Resolve the token once, so the user lookup is cached for both requests
+        self.client.get(small_url, headers=headers)
+
+        with count_queries() as small_statements:
+            small_resp = self.client.get(small_url, headers=headers)
+        with count_queries() as large_statements:
+            large_resp = self.client.get(large_url, headers=headers)
+
+        assert len(small_resp.json["resources"]) == 2
+        assert len(large_resp.json["resources"]) == 20
+        # The version of the library for the ETag, then the resources
+        assert len(small_statements) == len(large_statements) == 2
+
+        # The pages of a tag contain every resource once
+        resp = self.client.get(large_url, headers=headers, query_string={"limit": 15})
+        first_page = [resource["resource_id"] for resource in resp.json["resources"]]
+        resp = self.client.get(
+            large_url,
+            headers=headers,
+            query_string={"limit": 15, "cursor": resp.json["next_cursor"]},
+        )
+        second_page = [resource["resource_id"] for resource in resp.json["resources"]]
+        assert len(set(first_page + second_page)) == 20
+        assert resp.json["next_cursor"] is None
+
+    def test_get_all_resources_constant_queries(self):
+        """
+        Make sure the tags of the listed resources are loaded in a fixed number of queries, no matter how many
+        resources there are.
+        """
+        url = "/my_resources/"
+
+        small_user = UserFactory()
+        large_user = UserFactory()
+        for user, count in ((small_user, 2), (large_user, 20)):
+            tag = TagFactory(owner_id=user.user_id)
+            for _ in range(count):
+                TagManager.assign_tag(
+                    ResourceFactory(owner_id=user.user_id).resource_id, tag.tag_id
+                )
+
+        small_headers = {"Authorization": f"Bearer {generate_token(small_user)}"}
+        large_headers = {"Authorization": f"Bearer {generate_token(large_user)}"}
+
+        # Resolve the tokens once, so the user lookups are cached for both requests
+        self.client.get(url, headers=small_headers)
+        self.client.get(url, headers=large_headers)
+
+        with count_queries() as small_statements:
+            small_resp = self.client.get(url, headers=small_headers)
+        with count_queries() as large_statements:
+            large_resp = self.client.get(url, headers=large_headers)
+
+        assert len(small_resp.json["resources"]) == 2
+        assert len(large_resp.json["resources"]) == 20
+        for resource in large_resp.json["resources"]:
+            assert len(resource["tags"]) == 1
+        # The version of the library for the ETag, the resources and their tags
+        assert len(small_statements) == len(large_statements) == 3
+
+    def test_change_and_delete_resource_single_select(self):
+        """
+        Make sure the status change and delete endpoints check that the resource exists and belongs to the user
+        with a single query.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource_id = resource.resource_id
+        TagManager.assign_tag(resource_id, TagFactory(owner_id=user.user_id).tag_id)
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        # Resolve the token once, so the user lookup is cached for the next requests
+        self.client.get("/my_resources/", headers=headers)
+
+        for url in (
+            f"/resource_status/{resource_id}/read/",
+            f"/resource_status/{resource_id}/dropped/",
+            f"/resource_status/{resource_id}/to_read/",
+        ):
+            db.session.expunge_all()
+            with count_queries() as statements:
+                resp = self.client.put(url, headers=headers)
+            self.assert200(resp)
+            selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+            assert len(selects) == 1
+
+        db.session.expunge_all()
+        with count_queries() as statements:
+            resp = self.client.delete(
+                f"/delete_resource/{resource_id}/", headers=headers
+            )
+        self.assert200(resp)
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+        assert ResourceModel.query.filter_by(resource_id=resource_id).count() == 0
+        assert (
+            db.session.query(resource_tag).filter_by(resource_id=resource_id).count()
+            == 0
+        )
+
+    def test_change_resource_status(self):
+        """
+        Make sure a status change is saved together with the update time, in a single statement.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource_id = resource.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        with count_queries() as statements:
+            resp = self.client.put(
+                f"/resource_status/{resource_id}/dropped/", headers=headers
+            )
+        self.assert200(resp)
+        updates = [
+            s for s in statements if s.lstrip().upper().startswith("UPDATE RESOURCE")
+        ]
+        assert len(updates) == 1
+
+        db.session.expire_all()
+        resource = ResourceModel.query.filter_by(resource_id=resource_id).first()
+        assert resource.status == ResourceStatus.dropped
+        assert resource.updated_datetime >= resource.created_datetime
+
+    def test_change_resource_status_bulk(self):
+        """
+        Make sure the status of many resources is changed with one statement, and only if they all belong to the user.
+        """
+        url = "/resource_status/"
+        user = UserFactory()
+        other_user = UserFactory()
+        resources = [ResourceFactory(owner_id=user.user_id) for _ in range(5)]
+        other_resource = ResourceFactory(owner_id=other_user.user_id)
+        resource_ids = [resource.resource_id for resource in resources]
+        other_resource_id = other_resource.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        # Resolve the token once, so the user lookup is cached for the next requests
+        self.client.get("/my_resources/", headers=headers)
+
+        with count_queries() as statements:
+            resp = self.client.put(
+                url,
+                headers=headers,
+                json={"resource_ids": resource_ids, "status": "Read"},
+            )
+        self.assert200(resp)
+        assert (
+            resp.json["message"]
+            == "You successfully changed the status of 5 resources to Read"
+        )
+        # One UPDATE for the resources and one for the version of the library
+        assert [s.split()[:2] for s in statements] == [
+            ["UPDATE", "resource"],
+            ["UPDATE", '"user"'],
+        ]
+
+        db.session.expire_all()
+        assert ResourceModel.query.filter(
+            ResourceModel.resource_id.in_(resource_ids),
+            ResourceModel.status == ResourceStatus.read,
+        ).count() == len(resource_ids)
+
+        # Another user's resource in the list means nothing is changed
+        resp = self.client.put(
+            url,
+            headers=headers,
+            json={
+                "resource_ids": resource_ids + [other_resource_id],
+                "status": "Dropped",
+            },
+        )
+        self.assert403(resp)
+        assert (
+            resp.json["message"]
+            == "You need to be the owner of these resources to change or delete them 😒"
+        )
+
+        # Non-existent resources are reported back
+        resp = self.client.put(
+            url,
+            headers=headers,
+            json={"resource_ids": resource_ids + [-1], "status": "Dropped"},
+        )
+        self.assert400(resp)
+        assert (
+            resp.json["message"]
+            == "Don't try to trick us, these resources don't exist: [-1] 😉"
+        )
+
+        db.session.expire_all()
+        assert (
+            ResourceModel.query.filter(
+                ResourceModel.status == ResourceStatus.dropped
+            ).count()
+            == 0
+        )
+
+        # An invalid status is refused
+        resp = self.client.put(
+            url, headers=headers, json={"resource_ids": resource_ids, "status": "Lost"}
+        )
+        self.assert400(resp)
+
+    def test_update_resource_single_statement(self):
+        """
+        Make sure all changed fields of a resource are saved with one statement.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        resource_id = resource.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+        data = {
+            "resource_id": resource_id,
+            "title": "New title",
+            "author": "New author",
+            "link": "https://example.com",
+            "notes": "Some notes",
+            "rating": 4.5,
+        }
+
+        with count_queries() as statements:
+            resp = self.client.put("/update_resource/", headers=headers, json=data)
+        self.assert200(resp)
+        updates = [
+            s for s in statements if s.lstrip().upper().startswith("UPDATE RESOURCE")
+        ]
+        assert len(updates) == 1
+
+        db.session.expire_all()
+        resource = ResourceModel.query.filter_by(resource_id=resource_id).first()
+        assert resource.title == "New title"
+        assert resource.notes == "Some notes"
+        assert float(resource.rating) == 4.5
+
+    def test_update_resources_bulk(self):
+        """
+        Make sure many resources are updated in one transaction, with one statement per set of changed fields, and
+        only if they all belong to the user.
+        """
+        url = "/update_resources/"
+        user = UserFactory()
+        other_user = UserFactory()
+        resource_ids = [
+            ResourceFactory(owner_id=user.user_id).resource_id for _ in range(4)
+        ]
+        other_resource_id = ResourceFactory(owner_id=other_user.user_id).resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        # Resolve the token once, so the user lookup is cached for the next requests
+        self.client.get("/my_resources/", headers=headers)
+
+        data = {
+            "resources": [
+                {"resource_id": resource_ids[0], "rating": 1},
+                {"resource_id": resource_ids[1], "rating": 2},
+                {"resource_id": resource_ids[2], "title": "Third", "notes": "Note"},
+                {"resource_id": resource_ids[3], "notes": "Other", "title": "Fourth"},
+            ]
+        }
+        with count_queries() as statements:
+            resp = self.client.patch(url, headers=headers, json=data)
+        self.assert200(resp)
+        assert resp.json["message"] == "You successfully updated 4 resources."
+        # One query to check the owners, then one UPDATE for the ratings, one for the titles and notes and one for the
+        # version of the library
+        assert len(statements) == 4
+
+        db.session.expire_all()
+        resources = {
+            resource.resource_id: resource
+            for resource in ResourceModel.query.filter(
+                ResourceModel.resource_id.in_(resource_ids)
+            )
+        }
+        assert float(resources[resource_ids[0]].rating) == 1
+        assert float(resources[resource_ids[1]].rating) == 2
+        assert resources[resource_ids[2]].title == "Third"
+        assert resources[resource_ids[3]].title == "Fourth"
+        assert resources[resource_ids[3]].notes == "Other"
+
+        # Another user's resource in the list means nothing is changed
+        data = {
+            "resources": [
+                {"resource_id": resource_ids[0], "title": "Changed"},
+                {"resource_id": other_resource_id, "title": "Changed"},
+            ]
+        }
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert403(resp)
+
+        # So do non-existent resources and repeated resources
+        data["resources"][1]["resource_id"] = -1
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert400(resp)
+        assert (
+            resp.json["message"]
+            == "Don't try to trick us, these resources don't exist: [-1] 😉"
+        )
+        data["resources"][1]["resource_id"] = resource_ids[0]
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert400(resp)
+
+        db.session.expire_all()
+        assert ResourceModel.query.filter_by(title="Changed").count() == 0
+
+        # Every update has to match the schema of a single update
+        data = {"resources": [{"resource_id": resource_ids[0], "rating": 7}]}
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert400(resp)
+
+    def test_update_resources_bulk_with_string_ids(self):
+        """
+        Make sure the IDs sent as strings are loaded as numbers, so they are found, counted as repeated and reported
+        like any other ID.
+        """
+        url = "/update_resources/"
+        user = UserFactory()
+        resource_ids = [
+            ResourceFactory(owner_id=user.user_id).resource_id for _ in range(2)
+        ]
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        data = {
+            "resources": [
+                {"resource_id": str(resource_ids[0]), "rating": "3"},
+                {"resource_id": resource_ids[1], "title": "Second"},
+            ]
+        }
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert200(resp)
+        db.session.expire_all()
+        assert float(db.session.get(ResourceModel, resource_ids[0]).rating) == 3
+        assert db.session.get(ResourceModel, resource_ids[1]).title == "Second"
+
+        # The same resource as a string and as a number is still repeated
+        data["resources"][1]["resource_id"] = resource_ids[0]
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert400(resp)
+        assert resp.json["message"] == "Please, send every resource only once 🙂"
+
+        # Unknown IDs of both kinds are reported together
+        data["resources"][0]["resource_id"] = "-2"
+        data["resources"][1]["resource_id"] = -1
+        resp = self.client.patch(url, headers=headers, json=data)
+        self.assert400(resp)
+        assert (
+            resp.json["message"]
+            == "Don't try to trick us, these resources don't exist: [-2, -1] 😉"
+        )
+
+    def test_import_resources_json(self):
+        """
+        Make sure resources are imported from a JSON array in chunks, with their tags, and that the invalid rows are
+        reported back.
+        """
+        url = "/import_resources/"
+        user = UserFactory()
+        existing_tag = TagManager.register("classics", user)
+        existing_tag_id = existing_tag.tag_id
+        headers = {
+            "Authorization": f"Bearer {generate_token(user)}",
+            "Content-Type": "application/json",
+        }
+        rows = [
+            {"title": f"Book {number}", "author": "Some Author", "rating": 4}
+            for number in range(7)
+        ]
+        rows[0]["tags"] = ["classics", "novels", "novels"]
+        rows[5]["tags"] = ["novels"]
+        rows[6]["notes"] = "Tabs\tnew lines\r\nand a backslash \\N"
+        rows[2] = {"title": "No author"}
+        rows[4]["rating"] = 9
+        rows.append("not a resource")
+
+        with patch("managers.resource.IMPORT_CHUNK_SIZE", 2):
+            resp = self.client.post(url, headers=headers, data=json.dumps(rows))
+        self.assertStatus(resp, 201)
+        assert resp.json["imported"] == 5
+        assert [error["row"] for error in resp.json["errors"]] == [3, 5, 8]
+        assert resp.json["errors"][0]["errors"] == {
+            "author": ["Missing data for required field."]
+        }
+
+        resources = ResourceModel.query.filter_by(owner_id=user.user_id).all()
+        assert sorted(resource.title for resource in resources) == [
+            "Book 0",
+            "Book 1",
+            "Book 3",
+            "Book 5",
+            "Book 6",
+        ]
+        tags = TagModel.query.filter_by(owner_id=user.user_id).all()
+        assert sorted(tag.tag for tag in tags) == ["classics", "novels"]
+        book = ResourceModel.query.filter_by(title="Book 0").first()
+        assert sorted(tag.tag for tag in book.tags) == ["classics", "novels"]
+        assert existing_tag_id in [tag.tag_id for tag in book.tags]
+        book = ResourceModel.query.filter_by(title="Book 5").first()
+        assert [tag.tag for tag in book.tags] == ["novels"]
+        book = ResourceModel.query.filter_by(title="Book 6").first()
+        assert book.notes == "Tabs\tnew lines\r\nand a backslash \\N"
+        assert book.link is None
+        assert book.status == ResourceStatus.pending
+        assert book.created_datetime is not None
+
+    def test_import_resources_json_broken_or_large_raises(self):
+        """
+        Make sure broken JSON is refused without reading the rest of the request, that items cut by the reads are still
+        decoded, and that a too large item is refused.
+        """
+        url = "/import_resources/"
+        user = UserFactory()
+        headers = {
+            "Authorization": f"Bearer {generate_token(user)}",
+            "Content-Type": "application/json",
+        }
+
+        class CountingStream(io.BytesIO):
+            reads = 0
+
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+
+        padding = json.dumps([{"title": "Dune", "notes": "x" * 1000}] * 1000)
+        stream = CountingStream(('[{"title" "Dune"}, ' + padding[1:]).encode())
+        with self.assertRaises(BadRequest):
+            list(iter_json_array(stream))
+        assert stream.reads == 1
+
+        # Items and numbers cut at every position of the reads are put together
+        rows = [{"title": "Dune", "rating": -1.25e-3, "notes": "é" * 300}] * 50
+        with patch("utils.importers.READ_SIZE", 7):
+            stream = io.BytesIO(json.dumps(rows).encode())
+            assert list(iter_json_array(stream)) == rows
+
+        data = json.dumps([{"title": "Dune", "notes": "x" * (MAX_ITEM_SIZE + 1)}])
+        resp = self.client.post(url, headers=headers, data=data)
+        self.assert400(resp)
+        assert resp.json["message"] == LARGE_ITEM_MESSAGE
+        assert ResourceModel.query.filter_by(owner_id=user.user_id).count() == 0
+
+    def test_import_resources_csv(self):
+        """
+        Make sure resources are imported from a CSV file, and that a broken file is refused.
+        """
+        url = "/import_resources/"
+        user = UserFactory()
+        headers = {
+            "Authorization": f"Bearer {generate_token(user)}",
+            "Content-Type": "text/csv",
+        }
+        data = (
+            "title,author,link,rating,tags\n"
+            "Dune,Frank Herbert,,4.5,sci-fi; classics\n"
+            "Emma,Jane Austen,https://example.com,,\n"
+            "X,Nobody,,,\n"
+        )
+        resp = self.client.post(url, headers=headers, data=data)
+        self.assertStatus(resp, 201)
+        assert resp.json["imported"] == 2
+        assert resp.json["errors"] == [
+            {"row": 3, "errors": {"title": ["Length must be between 3 and 150."]}}
+        ]
+
+        book = ResourceModel.query.filter_by(title="Dune").first()
+        assert float(book.rating) == 4.5
+        assert sorted(tag.tag for tag in book.tags) == ["classics", "sci-fi"]
+        book = ResourceModel.query.filter_by(title="Emma").first()
+        assert book.link == "https://example.com"
+        assert book.status == ResourceStatus.pending
+
+        headers["Content-Type"] = "application/json"
+        resp = self.client.post(url, headers=headers, data='[{"title": "Dune"')
+        self.assert400(resp)
+
+    def test_search_resources(self):
+        """
+        Make sure the search finds only the user's resources, ranks the title matches first, highlights the matching
+        words and pages the results.
+        """
+        url = "/search_resources/"
+        user = UserFactory()
+        other_user = UserFactory()
+        in_notes = ResourceFactory(
+            owner_id=user.user_id,
+            title="Emma",
+            author="Jane Austen",
+            notes="Mentions the desert planet of the dunes once",
+        )
+        in_title = ResourceFactory(
+            owner_id=user.user_id,
+            title="Dune",
+            author="Frank Herbert",
+            notes="Spice and sand",
+        )
+        ResourceFactory(
+            owner_id=user.user_id,
+            title="Persuasion",
+            author="Jane Austen",
+            notes="Nothing to see here",
+        )
+        ResourceFactory(
+            owner_id=other_user.user_id,
+            title="Dune Messiah",
+            author="Frank Herbert",
+            notes="Dune again",
+        )
+        in_notes_id, in_title_id = in_notes.resource_id, in_title.resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.get(url, headers=headers, query_string={"q": "dune"})
+        self.assert200(resp)
+        results = resp.json["resources"]
+        assert [result["resource_id"] for result in results] == [
+            in_title_id,
+            in_notes_id,
+        ]
+        assert results[0]["rank"] > results[1]["rank"]
+        assert "\u0002Dune\u0003" in results[0]["snippet"]
+        assert "\u0002dunes\u0003" in results[1]["snippet"]
+        assert all("<b>" not in result["snippet"] for result in results)
+        assert resp.json["next_cursor"] is None
+
+        # The web search syntax is supported
+        resp = self.client.get(
+            url, headers=headers, query_string={"q": '"jane austen" -desert'}
+        )
+        assert [result["title"] for result in resp.json["resources"]] == ["Persuasion"]
+
+        # The results come one page at a time
+        resp = self.client.get(
+            url, headers=headers, query_string={"q": "dune", "limit": 1}
+        )
+        assert [result["resource_id"] for result in resp.json["resources"]] == [
+            in_title_id
+        ]
+        resp = self.client.get(
+            url,
+            headers=headers,
+            query_string={"q": "dune", "limit": 1, "cursor": resp.json["next_cursor"]},
+        )
+        assert [result["resource_id"] for result in resp.json["resources"]] == [
+            in_notes_id
+        ]
+        assert resp.json["next_cursor"] is None
+
+        resp = self.client.get(
+            url, headers=headers, query_string={"q": "dune", "cursor": "invalid"}
+        )
+        self.assert400(resp)
+        resp = self.client.get(url, headers=headers)
+        self.assert400(resp)
+
+    def test_autocomplete(self):
+        """
+        Make sure the autocomplete suggests the user's titles and authors even when they are misspelled.
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError:
+            self.skipTest("The pg_trgm extension isn't available in the test database")
+
+        url = "/autocomplete/"
+        user = UserFactory()
+        other_user = UserFactory()
+        ResourceFactory(
+            owner_id=user.user_id, title="Pride and Prejudice", author="Jane Austen"
+        )
+        ResourceFactory(owner_id=user.user_id, title="Emma", author="Jane Austen")
+        ResourceFactory(owner_id=user.user_id, title="Dune", author="Frank Herbert")
+        ResourceFactory(
+            owner_id=other_user.user_id, title="Jane Eyre", author="Charlotte Bronte"
+        )
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.get(url, headers=headers, query_string={"q": "jane austin"})
+        self.assert200(resp)
+        suggestions = resp.json["suggestions"]
+        assert suggestions[0]["field"] == "author"
+        assert suggestions[0]["value"] == "Jane Austen"
+        assert [suggestion["value"] for suggestion in suggestions].count(
+            "Jane Austen"
+        ) == 1
+        assert "Charlotte Bronte" not in [
+            suggestion["value"] for suggestion in suggestions
+        ]
+
+        resp = self.client.get(
+            url, headers=headers, query_string={"q": "prejudise", "field": "title"}
+        )
+        assert [suggestion["value"] for suggestion in resp.json["suggestions"]] == [
+            "Pride and Prejudice"
+        ]
+
+        resp = self.client.get(
+            url, headers=headers, query_string={"q": "jane", "field": "title"}
+        )
+        assert resp.json["suggestions"] == []
+
+    def test_autocomplete_invalid_query(self):
+        """
+        Make sure the autocomplete needs at least two characters and a valid field.
+        """
+        user = UserFactory()
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.get(
+            "/autocomplete/", headers=headers, query_string={"q": "j"}
+        )
+        self.assert400(resp)
+        resp = self.client.get(
+            "/autocomplete/",
+            headers=headers,
+            query_string={"q": "jane", "field": "notes"},
+        )
+        self.assert400(resp)
+
+    def test_get_all_resources_not_modified(self):
+        """
+        Make sure a client with an up-to-date copy of the resources gets 304 NOT MODIFIED without loading the
+        resources, and a new copy after any change of the library.
+        """
+        url = "/my_resources/"
+        user = UserFactory()
+        other_user = UserFactory()
+        resource_id = ResourceFactory(owner_id=user.user_id).resource_id
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.get(url, headers=headers)
+        self.assert200(resp)
+        etag = resp.headers["ETag"]
+        assert resp.headers["Cache-Control"] == "private, no-cache"
+
+        with count_queries() as statements:
+            resp = self.client.get(url, headers={**headers, "If-None-Match": etag})
+        self.assertStatus(resp, 304)
+        assert resp.headers["ETag"] == etag
+        assert resp.data == b""
+        assert len(statements) == 1
+
+        # Another user's changes don't matter
+        self.client.post(
+            "/new_resource/",
+            headers={"Authorization": f"Bearer {generate_token(other_user)}"},
+            json={"title": "Other title", "author": "Other author"},
+        )
+        resp = self.client.get(url, headers={**headers, "If-None-Match": etag})
+        self.assertStatus(resp, 304)
+
+        # Every change of the library gives a new version
+        for method, change_url, data in (
+            ("put", f"/resource_status/{resource_id}/read/", None),
+            ("put", "/update_resource/", {"resource_id": resource_id, "rating": 3}),
+            ("post", "/tag_resource/", {"resource_id": resource_id, "tag": ["new"]}),
+            ("post", "/new_resource/", {"title": "New title", "author": "New author"}),
+            ("delete", f"/delete_resource/{resource_id}/", None),
+        ):
+            resp = getattr(self.client, method)(change_url, headers=headers, json=data)
+            assert resp.status_code in (200, 201)
+            resp = self.client.get(url, headers={**headers, "If-None-Match": etag})
+            self.assert200(resp)
+            assert resp.headers["ETag"] != etag
+            etag = resp.headers["ETag"]
+
+    def test_get_all_resources_compressed(self):
+        """
+        Make sure the large lists of resources are compressed with the algorithm the client accepts, the small
+        responses aren't, and the compressed responses can still be revalidated with their ETag.
+        """
+        url = "/my_resources/"
+        user = UserFactory()
+        for _ in range(20):
+            ResourceFactory(owner_id=user.user_id)
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        plain = self.client.get(url, headers=headers)
+        assert "Content-Encoding" not in plain.headers
+
+        for algorithm in ("gzip", "br", "zstd"):
+            resp = self.client.get(
+                url, headers={**headers, "Accept-Encoding": algorithm}
+            )
+            self.assert200(resp)
+            assert resp.headers["Content-Encoding"] == algorithm
+            assert resp.headers["Vary"] == "Accept-Encoding"
+            assert int(resp.headers["Content-Length"]) < len(plain.data) / 2
+
+        resp = self.client.get(url, headers={**headers, "Accept-Encoding": "gzip"})
+        assert gzip.decompress(resp.data) == plain.data
+        resp = self.client.get(
+            url,
+            headers={
+                **headers,
+                "Accept-Encoding": "gzip",
+                "If-None-Match": resp.headers["ETag"],
+            },
+        )
+        self.assertStatus(resp, 304)
+
+        # The small responses aren't worth compressing
+        resp = self.client.get(
+            "/my_tags/", headers={**headers, "Accept-Encoding": "gzip"}
+        )
+        self.assert200(resp)
+        assert "Content-Encoding" not in resp.headers
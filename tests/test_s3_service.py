@@ -0,0 +1,111 @@
+import io
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from werkzeug.exceptions import InternalServerError, NotFound
+
+from services.aws_s3_bucket import MIB, S3Service
+from services.storage import FileInfo
+from settings import Settings
+
+
+class TestS3Service(TestCase):
+    """
+    A class to test the configuration and the metrics of the S3 transfers, without any requests to S3.
+    """
+
+    def make_service(self, **overrides):
+        settings = Settings.from_env(
+            **{
+                "aws_s3_bucket_region": "eu-central-1",
+                "aws_s3_bucket_name": "library",
+                "aws_s3_endpoint_url": "",
+                "aws_s3_max_pool_connections": 32,
+                "aws_s3_multipart_threshold_in_mb": 16,
+                "aws_s3_multipart_chunk_size_in_mb": 32,
+                "aws_s3_max_concurrency": 8,
+                **overrides,
+            }
+        )
+        return S3Service(settings)
+
+    def test_transfer_configuration(self):
+        """
+        Make sure the connection pool and the multipart transfers are configured from the settings.
+        """
+        s3 = self.make_service()
+
+        self.assertEqual(s3.s3.meta.config.max_pool_connections, 32)
+        self.assertEqual(s3.transfer_config.multipart_threshold, 16 * MIB)
+        self.assertEqual(s3.transfer_config.multipart_chunksize, 32 * MIB)
+        self.assertEqual(s3.transfer_config.max_request_concurrency, 8)
+
+        # The presigned links are signed with SigV4 in the regions where botocore would still use SigV2
+        for region in ("us-east-1", "eu-west-1", "eu-central-1"):
+            s3 = self.make_service(aws_s3_bucket_region=region)
+            url = s3.presign("a.pdf", "GET", 300)
+            self.assertIn("X-Amz-Algorithm=AWS4-HMAC-SHA256", url)
+            self.assertIn("X-Amz-Expires=300", url)
+            self.assertNotIn("AWSAccessKeyId", url)
+        self.assertEqual(
+            s3.url("a.pdf"), "https://library.s3.eu-central-1.amazonaws.com/a.pdf"
+        )
+        s3 = self.make_service(aws_s3_endpoint_url="http://localhost:9000/")
+        self.assertEqual(s3.url("a.pdf"), "http://localhost:9000/library/a.pdf")
+
+    def test_upload_progress_and_metrics(self):
+        """
+        Make sure the progress of every upload is reported, and the uploads are counted in the metrics.
+        """
+        s3 = self.make_service()
+
+        def upload_fileobj(fileobj, bucket, key, Config, Callback):
+            self.assertIs(Config, s3.transfer_config)
+            while True:
+                data = fileobj.read(MIB)
+                if not data:
+                    break
+                Callback(len(data))
+
+        progress = []
+        with patch.object(s3.s3, "upload_fileobj", side_effect=upload_fileobj):
+            url = s3.put(io.BytesIO(b"a" * (3 * MIB)), "a.pdf", progress.append)
+
+        self.assertEqual(url, "https://library.s3.eu-central-1.amazonaws.com/a.pdf")
+        self.assertEqual(progress, [MIB, 2 * MIB, 3 * MIB])
+        metrics = s3.metrics()
+        self.assertEqual((metrics["transfers"], metrics["failed"]), (1, 0))
+        self.assertEqual(metrics["bytes"], 3 * MIB)
+        self.assertGreater(metrics["average_mib_per_second"], 0)
+
+        error = ClientError({"Error": {"Code": "SlowDown"}}, "PutObject")
+        with patch.object(s3.s3, "upload_fileobj", side_effect=error):
+            with self.assertRaises(InternalServerError):
+                s3.put(io.BytesIO(b"a"), "b.pdf")
+        self.assertEqual(s3.metrics()["failed"], 1)
+
+    def test_ranges_and_file_information(self):
+        """
+        Make sure only the asked bytes of a file are requested from S3, and its size and version are read from it.
+        """
+        s3 = self.make_service()
+        with patch.object(s3.s3, "get_object", return_value={"Body": "body"}) as get:
+            self.assertEqual(s3.get("a.pdf"), "body")
+            s3.get("a.pdf", 5)
+            s3.get("a.pdf", 5, 10)
+        self.assertEqual(
+            [call.kwargs.get("Range") for call in get.call_args_list],
+            [None, "bytes=5-", "bytes=5-9"],
+        )
+
+        modified = datetime(2022, 8, 21, 9, 30, 15, tzinfo=timezone.utc)
+        response = {"ContentLength": 10, "ETag": '"abc"', "LastModified": modified}
+        with patch.object(s3.s3, "head_object", return_value=response):
+            self.assertEqual(s3.stat("a.pdf"), FileInfo(10, "abc", modified))
+
+        error = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        with patch.object(s3.s3, "head_object", side_effect=error):
+            with self.assertRaises(NotFound):
+                s3.stat("a.pdf")
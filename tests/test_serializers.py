@@ -0,0 +1,102 @@
+from datetime import datetime
+from decimal import Decimal
+
+from flask_testing import TestCase
+from marshmallow import Schema, fields, post_dump
+
+from config import create_app
+from db import db
+from models import ResourceModel, ResourceStatus, TagModel
+from schemas.response.resource import (
+    AutocompleteSchemaResponse,
+    FullResourceSchemaResponse,
+    ResourceSchemaResponse,
+)
+from schemas.response.tag import TagSchemaResponse
+from schemas.response.user import UserSchemaResponse
+from schemas.serializers import get_serializer
+from tests.factories import ResourceFactory, TagFactory, UserFactory
+from utils.json_encoding import dumps
+
+
+class TestSerializers(TestCase):
+    """
+    A class to test that the compiled serializers give exactly the output of marshmallow.
+    """
+
+    def create_app(self):
+        return create_app("config.TestingConfig")
+
+    def setUp(self):
+        db.init_app(self.app)
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def assert_same_dump(self, schema_class, obj, many=False):
+        expected = schema_class().dump(obj, many=many)
+        actual = get_serializer(schema_class).dump(obj, many=many)
+        self.assertEqual(actual, expected)
+        self.assertEqual(dumps(actual), dumps(expected))
+
+    def test_models_are_dumped_like_marshmallow(self):
+        """
+        Dump resources with and without tags, files and ratings, along with their tags and owner.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        other = ResourceFactory(
+            owner_id=user.user_id, rating=None, status=ResourceStatus.read
+        )
+        other.file_url = "https://bucket.s3.amazonaws.com/file.pdf"
+        tag = TagFactory(tag="fantasy", owner_id=user.user_id)
+        resource.tags.append(tag)
+        resource.tags.append(TagFactory(tag="classic", owner_id=user.user_id))
+        db.session.commit()
+
+        resources = ResourceModel.query.order_by(ResourceModel.resource_id).all()
+        self.assert_same_dump(FullResourceSchemaResponse, resources, many=True)
+        self.assert_same_dump(ResourceSchemaResponse, resources, many=True)
+        self.assert_same_dump(FullResourceSchemaResponse, resources[0])
+        self.assert_same_dump(TagSchemaResponse, TagModel.query.all(), many=True)
+        self.assert_same_dump(UserSchemaResponse, user)
+
+    def test_other_objects_are_dumped_like_marshmallow(self):
+        """
+        Dump dicts with missing and None values, and values of other types that marshmallow converts.
+        """
+        rows = [
+            {"field": "title", "value": "Dune", "similarity": Decimal("0.5")},
+            {"field": "author", "value": b"Frank Herbert", "similarity": 1},
+            {"field": None, "similarity": None},
+            {},
+        ]
+        self.assert_same_dump(AutocompleteSchemaResponse, rows, many=True)
+        self.assert_same_dump(
+            ResourceSchemaResponse,
+            {
+                "resource_id": "5",
+                "title": 42,
+                "created_datetime": datetime(2022, 8, 21, 9, 30, 15, 123),
+                "status": ResourceStatus.dropped,
+            },
+        )
+
+    def test_schemas_with_hooks_are_dumped_by_marshmallow(self):
+        """
+        Make sure a schema with a post dump hook still gets its hook applied.
+        """
+
+        class UpperSchema(Schema):
+            title = fields.Str()
+
+            @post_dump
+            def upper(self, data, **kwargs):
+                return {key: value.upper() for key, value in data.items()}
+
+        self.assertEqual(
+            get_serializer(UpperSchema).dump([{"title": "dune"}], many=True),
+            [{"title": "DUNE"}],
+        )
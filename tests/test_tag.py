@@ -231,3 +231,27 @@ class TestTag(TestCase):
         for tag in data2["tag"]:
             tag_id2 = TagModel.query.filter_by(tag=tag, owner_id=user2.user_id).first()
             db.session.query(resource_tag).filter_by(tag_id=tag_id2.tag_id).count() == 1
+
+    def test_get_all_tags_not_modified(self):
+        """
+        Make sure a client with an up-to-date copy of the tags gets 304 NOT MODIFIED, and a new copy after a tag
+        is deleted.
+        """
+        user = UserFactory()
+        resource = ResourceFactory(owner_id=user.user_id)
+        TagManager.assign_tag(
+            resource.resource_id, TagManager.register("fiction", user).tag_id
+        )
+        headers = {"Authorization": f"Bearer {generate_token(user)}"}
+
+        resp = self.client.get("/my_tags/", headers=headers)
+        self.assert200(resp)
+        etag = resp.headers["ETag"]
+
+        resp = self.client.get("/my_tags/", headers={**headers, "If-None-Match": etag})
+        self.assertStatus(resp, 304)
+
+        self.client.delete("/delete_tag/fiction/", headers=headers)
+        resp = self.client.get("/my_tags/", headers={**headers, "If-None-Match": etag})
+        self.assert200(resp)
+        assert resp.headers["ETag"] != etag
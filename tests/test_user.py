@@ -2,9 +2,13 @@ from flask_testing import TestCase
 
 from config import create_app
 from db import db
+from managers.auth import user_cache
+from managers.refresh_token import RefreshTokenManager
 from models import UserModel
 from schemas.response.user import UserSchemaResponse
-from tests.base import generate_token
+from settings import Settings
+from utils.password_hasher import password_hasher
+from tests.base import generate_token, count_queries
 from tests.factories import UserFactory
 
 
@@ -152,10 +156,13 @@ class TestUser(TestCase):
             "company": "Random Comp",
             "job_position": "Tester",
         }
-        resp = self.client.put(url, headers=headers, json=data)
+        with count_queries() as statements:
+            resp = self.client.put(url, headers=headers, json=data)
         self.assert200(resp)
 
         assert resp.json["message"] == "You successfully updated your user information."
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE")]
+        assert len(updates) == 1
 
         new_user = UserModel.query.filter_by(user_id=user.user_id).first()
         new_user_info = UserSchemaResponse().dump(new_user)
@@ -184,3 +191,226 @@ class TestUser(TestCase):
             resp.json["message"]
             == "You need to provide us with information to be updated."
         )
+
+    def test_token_user_is_cached(self):
+        """
+        Make sure the user behind a token is read from the database only once, and that the cached user is dropped
+        when the user information is updated.
+        """
+        url = "/my_user/"
+
+        user = UserFactory()
+        token = generate_token(user)
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        cache = user_cache()
+
+        self.assert200(self.client.get(url, headers=headers))
+        self.assert200(self.client.get(url, headers=headers))
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+        assert cache.get(token).user_id == user.user_id
+
+        resp = self.client.put(
+            "/update_user/", headers=headers, json={"company": "Cached Inc"}
+        )
+        self.assert200(resp)
+        assert cache.stats()["size"] == 0
+
+        resp = self.client.get(url, headers=headers)
+        self.assert200(resp)
+        assert resp.json["user"]["company"] == "Cached Inc"
+        assert cache.get(token).company == "Cached Inc"
+
+    def test_password_hashing_metrics(self):
+        """
+        Make sure the passwords are hashed in the worker pool and that the hashing is measured.
+        """
+        headers = {
+            "Content-Type": "application/json",
+        }
+        data = {
+            "password": "Aa@123!53",
+            "first_name": "Sarah",
+            "last_name": "Brown",
+            "email": "testemail@example.com",
+        }
+        resp = self.client.post("/register/", headers=headers, json=data)
+        assert resp.status_code == 201
+
+        login_data = {"email": data["email"], "password": data["password"]}
+        resp = self.client.post("/login/", headers=headers, json=login_data)
+        self.assert200(resp)
+
+        metrics = password_hasher().metrics()
+        assert metrics["hashed"] == 2
+        assert metrics["rejected"] == 0
+        assert metrics["in_flight"] == 0
+        assert metrics["max_seconds"] > 0
+
+    def test_refresh_token_rotation(self):
+        """
+        Make sure a refresh token can be exchanged for a new token once, and that reusing it revokes all refresh tokens
+        of the user.
+        """
+        headers = {
+            "Content-Type": "application/json",
+        }
+        data = {
+            "password": "Aa@123!53",
+            "first_name": "Sarah",
+            "last_name": "Brown",
+            "email": "testemail@example.com",
+        }
+        resp = self.client.post("/register/", headers=headers, json=data)
+        assert resp.status_code == 201
+        first_refresh_token = resp.json["refresh_token"]
+
+        resp = self.client.post(
+            "/refresh/", headers=headers, json={"refresh_token": first_refresh_token}
+        )
+        self.assert200(resp)
+        second_refresh_token = resp.json["refresh_token"]
+        assert second_refresh_token != first_refresh_token
+
+        auth_headers = {"Authorization": f"Bearer {resp.json['token']}"}
+        self.assert200(self.client.get("/my_user/", headers=auth_headers))
+
+        # Reusing the first token revokes the second one as well
+        resp = self.client.post(
+            "/refresh/", headers=headers, json={"refresh_token": first_refresh_token}
+        )
+        self.assert401(resp)
+        assert (
+            resp.json["message"]
+            == "Sorry, this refresh token has already been used 😒. Please, log in again."
+        )
+        resp = self.client.post(
+            "/refresh/", headers=headers, json={"refresh_token": second_refresh_token}
+        )
+        self.assert401(resp)
+
+    def test_revoke_refresh_token(self):
+        """
+        Make sure a revoked or unknown refresh token can't be used to get a new token.
+        """
+        headers = {
+            "Content-Type": "application/json",
+        }
+        resp = self.client.post(
+            "/refresh/", headers=headers, json={"refresh_token": "not-a-token"}
+        )
+        self.assert401(resp)
+        assert (
+            resp.json["message"]
+            == "Sorry, your refresh token is invalid 😒. Please, log in again."
+        )
+
+        user = UserFactory()
+        refresh_token, _ = RefreshTokenManager.issue(user.user_id)
+        db.session.commit()
+
+        resp = self.client.post(
+            "/revoke/", headers=headers, json={"refresh_token": refresh_token}
+        )
+        self.assert200(resp)
+
+        resp = self.client.post(
+            "/refresh/", headers=headers, json={"refresh_token": refresh_token}
+        )
+        self.assert401(resp)
+
+
+class TestUserCustomSettings(TestCase):
+    """
+    A class to test that the application settings can be overridden for a single application.
+    """
+
+    def create_app(self):
+        return create_app(
+            "config.TestingConfig",
+            settings=Settings.from_env(
+                token_validity_in_minutes=5, password_min_length=10
+            ),
+        )
+
+    def setUp(self):
+        db.init_app(self.app)
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def test_register_uses_app_settings(self):
+        """
+        Make sure that the registration validates the password and issues the token with the application settings.
+        """
+        url = "/register/"
+        headers = {
+            "Content-Type": "application/json",
+        }
+        data = {
+            "password": "Aa@123!53",
+            "first_name": "Sarah",
+            "last_name": "Brown",
+            "email": "testemail@example.com",
+        }
+        resp = self.client.post(url, headers=headers, json=data)
+        self.assert400(resp)
+        assert (
+            resp.json["message"]
+            == "Your password is too short, it needs to have at least 10 characters."
+        )
+
+        data["password"] = "Aa@123!5345"
+        resp = self.client.post(url, headers=headers, json=data)
+        assert resp.status_code == 201
+        assert (
+            resp.json["message"]
+            == "Welcome to our library! This token will only be valid for the next 5 minutes. After that you'll need to log in \N{winking face}"
+        )
+
+
+class TestUserBusyPasswordHasher(TestCase):
+    """
+    A class to test that the registration and login are refused quickly when the password hasher is busy.
+    """
+
+    def create_app(self):
+        return create_app(
+            "config.TestingConfig",
+            settings=Settings.from_env(
+                password_hash_workers=0,
+                password_hash_queue_size=0,
+                password_hash_retry_after_in_seconds=3,
+            ),
+        )
+
+    def setUp(self):
+        db.init_app(self.app)
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def test_busy_hasher_returns_service_unavailable(self):
+        """
+        Make sure the users get 503 SERVICE UNAVAILABLE and a Retry-After header, when there is no place for their
+        password in the hashing queue.
+        """
+        headers = {
+            "Content-Type": "application/json",
+        }
+        user = UserFactory()
+        data = {"email": user.email, "password": "Somepass1@"}
+        resp = self.client.post("/login/", headers=headers, json=data)
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "3"
+        assert (
+            resp.json["message"]
+            == "We are getting too many requests at the moment. Please, try again in a few seconds \N{pensive face}"
+        )
+        assert password_hasher().metrics()["rejected"] == 1
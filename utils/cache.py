@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TTLCache:
+    """
+    A small, thread-safe LRU cache whose entries also expire after a given number of seconds. It is meant to live for
+    the whole life of the worker process, so it counts its hits and misses to make it easy to check how useful it is.
+    """
+
+    def __init__(self, maxsize, ttl):
+        """
+        :param maxsize: int, the maximum number of entries; the least recently used entry is dropped when it's reached
+        :param ttl: int, the default number of seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Get an entry from the cache. Expired entries are removed and count as a miss.
+
+        :param key: hashable, the key of the entry
+        :return: the cached value or None, if there is no valid entry for this key
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """
+        Put an entry in the cache, dropping the least recently used one if the cache is full.
+
+        :param key: hashable, the key of the entry
+        :param value: the value to be cached
+        :param ttl: int, optional number of seconds the entry stays valid; it can't be longer than the cache's TTL
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate):
+        """
+        Remove all entries whose value matches the predicate.
+
+        :param predicate: function, takes a cached value and returns True if the entry has to be removed
+        """
+        with self._lock:
+            for key in [
+                key for key, (value, _) in self._data.items() if predicate(value)
+            ]:
+                del self._data[key]
+
+    def clear(self):
+        """
+        Remove all entries and reset the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        :return: dict, the number of hits, misses and entries currently in the cache
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+    def __len__(self):
+        return len(self._data)
@@ -1,7 +1,10 @@
-from flask import request
+from flask import Response, request
+from flask_api import status
 from werkzeug.exceptions import BadRequest, Forbidden
+from werkzeug.http import quote_etag
 
 from managers.auth import auth
+from managers.user import UserManager
 
 
 def validate_schema(schema_name):
@@ -27,6 +30,62 @@ def validate_schema(schema_name):
     return decorated_function
 
 
+def validate_query_schema(schema_name):
+    """
+    Validate that the provided query string parameters match the requested schema.
+
+    :param schema_name: schema
+    :return If everything is okay, func(*args, **kwargs): the function that is modified by the decorator
+            If there is an error - BadRequest with a long list of errors
+    """
+
+    def decorated_function(func):
+        def wrapper(*args, **kwargs):
+            schema = schema_name()
+            errors = schema.validate(request.args)
+            if not errors:
+                return func(*args, **kwargs)
+            raise BadRequest(errors)
+
+        return wrapper
+
+    return decorated_function
+
+
+def library_etag(func):
+    """
+    Tag the response with the version of the user's library as an ETag. If the client already has the response for
+    this version (it sends the ETag back in the If-None-Match header), answer with 304 NOT MODIFIED right away,
+    without loading anything else from the database.
+
+    :param func: the function that is modified by the decorator; it has to be called by a logged in user
+    :return If the library has changed, the response of func(*args, **kwargs) with an ETag header
+            If it hasn't - an empty response with 304 NOT MODIFIED
+    """
+
+    def wrapper(*args, **kwargs):
+        owner = auth.current_user()
+        etag = f"{owner.user_id}-{UserManager.get_library_version(owner.user_id)}"
+        headers = {"ETag": quote_etag(etag), "Cache-Control": "private, no-cache"}
+        # The compression adds the algorithm to the ETag (e.g. "1-5:gzip"), the version is the same
+        client_etags = {
+            client_etag.split(":")[0]
+            for client_etag in request.if_none_match.as_set(include_weak=True)
+        }
+        if request.if_none_match.star_tag or etag in client_etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = func(*args, **kwargs)
+        if not isinstance(response, tuple):
+            response = (response, status.HTTP_200_OK)
+        data, code = response[:2]
+        if code != status.HTTP_200_OK:
+            return response
+        return data, code, {**(response[2] if len(response) > 2 else {}), **headers}
+
+    return wrapper
+
+
 def permission_required(role):
     """
     Validate that the user has the necessary role to perform an action.
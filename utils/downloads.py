@@ -0,0 +1,109 @@
+import io
+import mimetypes
+import os
+import stat
+
+from flask import Response, request
+from werkzeug.datastructures import ContentRange
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
+
+READ_SIZE = 256 * 1024
+
+
+def _read_chunks(file, length):
+    """Read the given number of bytes from the file, piece by piece, and close it."""
+    try:
+        while length > 0:
+            data = file.read(min(READ_SIZE, length))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+    finally:
+        file.close()
+
+
+def _is_regular_file(file):
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+
+def _byte_range(info):
+    """
+    Find the part of the file the request asks for. A Range header is ignored when it can't be parsed, asks for more
+    than one range, or its If-Range doesn't match the current version of the file - then the whole file is sent.
+
+    :param info: FileInfo object, the file in the storage
+    :return: (start, end): the position of the first byte and the position after the last one; None for the whole
+             file; RequestedRangeNotSatisfiable, if the range is outside the file
+    """
+    byte_range = request.range
+    if byte_range is None or len(byte_range.ranges) != 1:
+        return None
+
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != info.etag:
+        return None
+    if if_range.date is not None and if_range.date != info.last_modified.replace(
+        microsecond=0
+    ):
+        return None
+
+    bounds = byte_range.range_for_length(info.size)
+    if bounds is None:
+        raise RequestedRangeNotSatisfiable(length=info.size)
+    return bounds
+
+
+def send_stored_file(storage, key):
+    """
+    Send a file from the storage, without ever keeping it whole in the memory. The response has an ETag and a
+    Last-Modified date, so the client can check its copy with If-None-Match or If-Modified-Since (304 NOT MODIFIED),
+    and continue a download with Range and If-Range (206 PARTIAL CONTENT).
+
+    A file on the local disk is handed to the WSGI server as a file, so it can be sent with sendfile(); a file in the S3
+    bucket is streamed through, with only the asked bytes requested from S3.
+
+    :param storage: Storage object
+    :param key: string, the key of the file
+    :return: Response object; NotFound, if there is no such file; RequestedRangeNotSatisfiable, if the range is outside
+             the file
+    """
+    info = storage.stat(key)
+    response = Response(
+        mimetype=mimetypes.guess_type(key)[0] or "application/octet-stream"
+    )
+    response.set_etag(info.etag)
+    response.last_modified = info.last_modified
+    response.accept_ranges = "bytes"
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.headers.set("Content-Disposition", "attachment", filename=key)
+
+    if not is_resource_modified(
+        request.environ, etag=info.etag, last_modified=info.last_modified
+    ):
+        response.status_code = 304
+        return response
+
+    bounds = _byte_range(info)
+    start, end = bounds or (0, info.size)
+    if bounds is not None:
+        response.status_code = 206
+        response.content_range = ContentRange("bytes", start, end, info.size)
+    response.content_length = end - start
+    if request.method == "HEAD":
+        return response
+
+    file = storage.get(key, start, end)
+    if end == info.size and _is_regular_file(file):
+        # The rest of a regular file - the server can send it with sendfile(), straight from the disk
+        response.response = wrap_file(request.environ, file, READ_SIZE)
+    else:
+        response.response = _read_chunks(file, end - start)
+    response.direct_passthrough = True
+    return response
@@ -1,8 +1,8 @@
-import phonenumbers
-from decouple import config
 from flask import request
 from werkzeug.exceptions import BadRequest
 
+from settings import get_settings
+
 
 def validate_password(password):
     """
@@ -28,14 +28,15 @@ def validate_password(password):
         "&",
         "+",
     ]
-    if len(password) < int(config("PASSWORD_MIN_LENGTH")):
+    settings = get_settings()
+    if len(password) < settings.password_min_length:
         raise BadRequest(
-            f"Your password is too short, it needs to have at least {config('PASSWORD_MIN_LENGTH')} characters."
+            f"Your password is too short, it needs to have at least {settings.password_min_length} characters."
         )
 
-    if len(password) > int(config("PASSWORD_MAX_LENGTH")):
+    if len(password) > settings.password_max_length:
         raise BadRequest(
-            f"Your password is too long, it needs to have at most {config('PASSWORD_MAX_LENGTH')} characters."
+            f"Your password is too long, it needs to have at most {settings.password_max_length} characters."
         )
 
     if not any(char.isdigit() for char in password):
@@ -62,6 +63,9 @@ def validate_phone_number(phone_number):
 
     """
     if "phone" in request.get_json():
+        # phonenumbers loads its metadata of all countries on import, so it's only imported when there's a number
+        import phonenumbers
+
         phone = request.get_json()["phone"]
         try:
             if not phonenumbers.is_valid_number(phonenumbers.parse(phone)):
@@ -1,15 +1,35 @@
-import os
+import base64
+import binascii
+import json
 
-from constants import TEMP_FILE_FOLDER
+from werkzeug.exceptions import BadRequest
 
+INVALID_CURSOR_MESSAGE = "This cursor is invalid \N{unamused face} Please, use the next_cursor value from the previous page."
 
-def delete_local_file(name):
+
+def encode_cursor(values):
+    """
+    Encodes the position of the last returned item, so the client can ask for the next page.
+
+    :param values: list, JSON-serializable values describing the position (e.g. the sort value and the ID of the item)
+    :return: string, an opaque URL-safe cursor
     """
-    Deletes a file from the local temp folder. By default it uses the location to the temp folder in the project.
-    :param name: string, the name of the file to be deleted
-    :return Nothing if the delete is successful; Errors if the delete is unsuccessful
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor previously created by encode_cursor.
+
+    :param cursor: string, the cursor provided by the client
+    :return: list, the values describing the position; BadRequest, if the cursor is invalid
     """
     try:
-        os.remove(os.path.join(TEMP_FILE_FOLDER, name))
-    except Exception as ex:
-        raise ex
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list):
+        raise BadRequest(INVALID_CURSOR_MESSAGE)
+    return values
@@ -0,0 +1,169 @@
+import codecs
+import csv
+import io
+import json
+
+from werkzeug.exceptions import BadRequest
+
+from db import db
+
+INVALID_IMPORT_MESSAGE = "We couldn't read your file \N{pensive face} Please, send a JSON array of resources or a CSV file with a header row."
+LARGE_ITEM_MESSAGE = "One of your resources is too large \N{pensive face} Please, keep every resource under 1 MiB."
+
+READ_SIZE = 64 * 1024
+# The most a single item of a JSON array can take, so one huge item can't fill the memory
+MAX_ITEM_SIZE = 1024 * 1024
+# How close to the end of the buffer a decoding error has to be, to be caused by an item cut in the middle of a
+# number or a literal (e.g. "-Infin") rather than by broken JSON
+CUT_TOKEN_SIZE = 16
+
+
+def _is_cut(error, buffer):
+    """
+    Check if a JSON decoding error could be caused only by the end of the buffer, so reading more could fix it.
+
+    :param error: JSONDecodeError object
+    :param buffer: string, the text being decoded
+    :return: bool, True if the item may just be incomplete
+    """
+    # A string that isn't closed runs to the end of the buffer, the error points to where it starts
+    return (
+        error.msg.startswith("Unterminated string")
+        or error.pos >= len(buffer) - CUT_TOKEN_SIZE
+    )
+
+
+def iter_json_array(stream):
+    """
+    Read the items of a JSON array one by one, without loading the whole array in the memory. Broken JSON is refused
+    as soon as it's found, and no item may be larger than MAX_ITEM_SIZE.
+
+    :param stream: file-like object with a read(size) method, returning bytes
+    :return: generator of the decoded items; BadRequest, if the stream isn't a valid JSON array or an item is too large
+    """
+    reader = codecs.getreader("utf-8")(stream)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    exhausted = False
+
+    def fill(size=READ_SIZE):
+        nonlocal buffer, position, exhausted
+        chunk = reader.read(size)
+        if not chunk:
+            exhausted = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def next_character():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or exhausted:
+                return buffer[position] if position < len(buffer) else ""
+            fill()
+
+    try:
+        if next_character() != "[":
+            raise BadRequest(INVALID_IMPORT_MESSAGE)
+        position += 1
+        if next_character() == "]":
+            return
+
+        while True:
+            # Decode the next item; if it's cut by the end of the buffer, read more and try again
+            next_character()
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as ex:
+                    if exhausted or not _is_cut(ex, buffer):
+                        raise BadRequest(INVALID_IMPORT_MESSAGE)
+                    end = None
+                if end is not None and (end < len(buffer) or exhausted):
+                    break
+                if len(buffer) - position > MAX_ITEM_SIZE:
+                    raise BadRequest(LARGE_ITEM_MESSAGE)
+                # Read as much as there is already, so a large item is decoded only a few times
+                fill(max(READ_SIZE, len(buffer) - position))
+            if end - position > MAX_ITEM_SIZE:
+                raise BadRequest(LARGE_ITEM_MESSAGE)
+            position = end
+            yield item
+
+            separator = next_character()
+            position += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise BadRequest(INVALID_IMPORT_MESSAGE)
+    except UnicodeDecodeError:
+        raise BadRequest(INVALID_IMPORT_MESSAGE)
+
+
+def iter_csv_rows(stream, list_fields=(), list_separator=";"):
+    """
+    Read the rows of a CSV file with a header row one by one, without loading the whole file in the memory.
+    Empty cells are left out of the rows.
+
+    :param stream: file-like object with a read(size) method, returning bytes
+    :param list_fields: tuple of strings, the columns whose values are lists, split by the list_separator
+    :param list_separator: string, the separator of the values in the list columns
+    :return: generator of dicts, one per row; BadRequest, if the stream isn't a valid CSV file
+    """
+    lines = codecs.getreader("utf-8")(stream)
+    try:
+        for row in csv.DictReader(lines):
+            if None in row:
+                raise BadRequest(INVALID_IMPORT_MESSAGE)
+            row = {key: value for key, value in row.items() if value not in (None, "")}
+            for field in list_fields:
+                if field in row:
+                    row[field] = [
+                        value.strip()
+                        for value in row[field].split(list_separator)
+                        if value.strip()
+                    ]
+            yield row
+    except (csv.Error, UnicodeDecodeError):
+        raise BadRequest(INVALID_IMPORT_MESSAGE)
+
+
+def copy_value(value):
+    """
+    Format a value for the text format of PostgreSQL COPY.
+
+    :param value: the value to be written; None is written as NULL
+    :return: string, the escaped value
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(table, columns, rows):
+    """
+    Write rows to a table with PostgreSQL COPY, in the transaction of the current database session.
+
+    :param table: string, the name of the table
+    :param columns: tuple of strings, the names of the columns, in the order of the values in the rows
+    :param rows: iterable of tuples, the values of the rows
+    """
+    data = io.StringIO()
+    for row in rows:
+        data.write("\t".join(copy_value(value) for value in row))
+        data.write("\n")
+    data.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", data)
+    finally:
+        cursor.close()
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+import orjson
+from flask import current_app, make_response
+from flask.json.provider import JSONProvider
+
+# Marshmallow's errors for the items of a list are keyed by their index, so the keys aren't always strings
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def default(obj):
+    """
+    Serialize the types orjson doesn't know. Datetimes, dates, enums, UUIDs and dataclasses are handled natively.
+
+    :param obj: the object to be serialized
+    :return: string, for Decimal (like Flask does, so no precision is lost); TypeError for anything else
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, option=OPTIONS):
+    """
+    Encode an object as JSON.
+
+    :param obj: the object to be encoded
+    :param option: int, orjson options
+    :return: bytes, the UTF-8 encoded JSON document
+    """
+    return orjson.dumps(obj, default=default, option=option)
+
+
+def loads(data):
+    """
+    Decode a JSON document.
+
+    :param data: bytes or string, the JSON document
+    :return: the decoded object; orjson.JSONDecodeError (a ValueError), if the document isn't valid JSON
+    """
+    return orjson.loads(data)
+
+
+def output_json(data, code, headers=None):
+    """
+    The JSON representation of the API, a faster drop-in for the one of flask_restful. Like it, the body ends with a
+    new line and is indented in debug mode.
+    """
+    option = OPTIONS | orjson.OPT_APPEND_NEWLINE
+    if current_app.debug:
+        option |= orjson.OPT_INDENT_2
+    resp = make_response(dumps(data, option), code)
+    resp.headers.extend(headers or {})
+    return resp
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    The JSON provider of the application. request.get_json() decodes the body with it, and keeps the result for the
+    rest of the request, so the decorators and the endpoint share the same parsed body.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
@@ -0,0 +1,127 @@
+import time
+import weakref
+from threading import BoundedSemaphore, Lock
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords in a pool of worker processes, so the CPU-heavy work doesn't block the threads serving
+    the other endpoints. Only a limited number of passwords can wait for a worker - when they are all taken, the request
+    is refused right away with 503 SERVICE UNAVAILABLE and a Retry-After header.
+    """
+
+    def __init__(self, workers, queue_size, retry_after):
+        """
+        :param workers: int, the number of worker processes; with 0 the passwords are hashed on the request thread
+        :param queue_size: int, how many passwords can wait for a free worker
+        :param retry_after: int, the number of seconds the clients are asked to wait when all places are taken
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self._slots = (
+            BoundedSemaphore(workers + queue_size) if workers + queue_size else None
+        )
+        self._executor = None
+        self._lock = Lock()
+        self._in_flight = 0
+        self._hashed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def generate(self, password):
+        """
+        Hash a password.
+
+        :param password: string, the raw password
+        :return: string, the hashed password
+        """
+        return self._run(generate_password_hash, password, method="sha256")
+
+    def check(self, password_hash, password):
+        """
+        Check that a password matches a previously generated hash.
+
+        :param password_hash: string, the hash saved in the database
+        :param password: string, the raw password
+        :return: bool, True if the password is correct
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def metrics(self):
+        """
+        Get the current state of the hasher.
+
+        :return: dict, with the number of passwords being hashed or waiting ("in_flight"), waiting only ("queue_depth"),
+                 hashed so far, refused because the queue was full, and the average and maximum hashing time in seconds
+        """
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+                "hashed": self._hashed,
+                "rejected": self._rejected,
+                "average_seconds": self._total_seconds / self._hashed
+                if self._hashed
+                else 0.0,
+                "max_seconds": self._max_seconds,
+            }
+
+    def _run(self, function, *args, **kwargs):
+        """
+        Run the function in a worker process, if there is a free place for it.
+
+        :return: the result of the function; ServiceUnavailable, if there are too many passwords waiting already
+        """
+        if self._slots is None or not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ServiceUnavailable(
+                "We are getting too many requests at the moment. Please, try again in a few seconds \N{pensive face}",
+                retry_after=self.retry_after,
+            )
+
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            if self.workers == 0:
+                return function(*args, **kwargs)
+            return self._get_executor().submit(function, *args, **kwargs).result()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                self._hashed += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+            self._slots.release()
+
+    def _get_executor(self):
+        """
+        Start the worker processes the first time they are needed. multiprocessing is imported only then, too.
+
+        :return: ProcessPoolExecutor object
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    weakref.finalize(self, self._executor.shutdown, wait=False)
+        return self._executor
+
+
+def password_hasher():
+    """
+    Get the password hasher of the current application.
+
+    :return: PasswordHasher object
+    """
+    return current_app.extensions["password_hasher"]
@@ -0,0 +1,113 @@
+import hashlib
+import io
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import NEED_DATA, Data, Epilogue, File, MultipartDecoder
+
+MISSING_FILE_MESSAGE = "You probably forgot to attach the file \N{slightly smiling face} Please, provide it in the form-data section, with key = file."
+
+READ_SIZE = 64 * 1024
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    A read-only file over an iterator of byte strings, so the chunks can be read as a stream.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            self._chunk = next(self._chunks, None)
+            if self._chunk is None:
+                self._chunk = b""
+                return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+class HashingReader:
+    """
+    Computes the SHA-256 hash of a stream while it's being read. Like the stream it wraps, it can't be seeked.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.hash.update(data)
+        return data
+
+    def hexdigest(self):
+        """The hex SHA-256 hash of everything read so far."""
+        return self.hash.hexdigest()
+
+
+def _multipart_events(stream, boundary):
+    """
+    Decode a multipart body while it's being read, READ_SIZE bytes at a time.
+
+    :return: generator of the werkzeug multipart events; BadRequest, if the body is cut or malformed
+    """
+    decoder = MultipartDecoder(boundary)
+    while True:
+        try:
+            event = decoder.next_event()
+        except ValueError:
+            raise BadRequest(MISSING_FILE_MESSAGE)
+        if isinstance(event, Epilogue):
+            return
+        if event is not NEED_DATA:
+            yield event
+            continue
+        if decoder.complete:
+            raise BadRequest(MISSING_FILE_MESSAGE)
+        decoder.receive_data(stream.read(READ_SIZE) or None)
+
+
+def _file_data(events):
+    for event in events:
+        if isinstance(event, Data):
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+    raise BadRequest(MISSING_FILE_MESSAGE)
+
+
+def stream_uploaded_file(stream, content_type, field_name="file"):
+    """
+    Find a file in a multipart/form-data body and read it while the body is still being received, so it's never saved
+    on the disk or kept whole in the memory. The parts before the file are skipped, the ones after it aren't read.
+
+    :param stream: file-like object with a read(size) method, the request body (request.stream)
+    :param content_type: string, the Content-Type header of the request, with the multipart boundary
+    :param field_name: string, the name of the form field with the file
+    :return: FileStorage object, with the file name and a stream of the file content; BadRequest, if there isn't a file
+    """
+    mimetype, options = parse_options_header(content_type)
+    if mimetype != "multipart/form-data" or not options.get("boundary"):
+        raise BadRequest(MISSING_FILE_MESSAGE)
+
+    events = _multipart_events(stream, options["boundary"].encode())
+    for event in events:
+        if isinstance(event, File) and event.name == field_name and event.filename:
+            reader = io.BufferedReader(ChunkReader(_file_data(events)), READ_SIZE)
+            return FileStorage(
+                stream=reader,
+                filename=event.filename,
+                name=field_name,
+                headers=event.headers,
+            )
+    raise BadRequest(MISSING_FILE_MESSAGE)